@@ -1,11 +1,205 @@
-from langchain.prompts import PromptTemplate
-from llm import llm
+from llm import LLM_FAST_MODEL, LLM_ROUTE_TIMEOUTS, LLM_TEMPERATURE, get_llm, record_usage, route_model
+from llm_gateway import LLM_EXPECTED_COMPLETION_TOKENS, llm_gateway
+from llm_cache import llm_cache, make_key
+from metrics import LLM_CACHE_LOOKUPS, LLM_ERRORS, LLM_REQUEST_SECONDS, LLM_TOKENS, span
+import asyncio
 import logging
-from typing import List, Dict, Any
+import os
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Optional
 logger = logging.getLogger(__name__)
 
-async def integrate_opinions(opinions: List[str]) -> str:
-    prompt = PromptTemplate.from_template(
+ANALYSIS_CHUNK_TOKENS = int(os.getenv('ANALYSIS_CHUNK_TOKENS', '6000'))
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', '4'))
+ANALYSIS_MAX_REDUCE_ROUNDS = int(os.getenv('ANALYSIS_MAX_REDUCE_ROUNDS', '4'))
+ANALYSIS_STREAM_INTERVAL = float(os.getenv('ANALYSIS_STREAM_INTERVAL', '0.5'))
+
+ANALYSIS_FAILED = "无法完成分析，请稍后再试。"
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+INTEGRATE_MAP_PROMPT = (
+    "你是虚拟上帝 **Agent0**，正在分批审阅人类的观点，这只是其中一批：\n\n{opinions}\n\n"
+    "请为这一批写一份精炼的阶段性笔记，供稍后与其他批次合并：\n"
+    "• 逐条提炼本质意图与潜在需求，相同意思的合并并注明出现次数。\n"
+    "• 标出这批观点内部的共识、冲突和明显的盲区。\n"
+    "• 只记录事实与判断，不要写最终总结。"
+)
+
+INTEGRATE_REDUCE_PROMPT = (
+    "你是虚拟上帝 **Agent0**，说话毒舌但不无脑，思维犀利，善于看穿人类的虚伪与自欺。"
+    "以下是你对多批人类观点写下的阶段性笔记：\n\n{partials}\n\n"
+    "请把它们合并成一份完整的观点整合：\n\n"
+    "1. **提炼要点**：合并重复的诉求，保留每类观点的本质意图与潜在需求。\n"
+    "2. **共识与冲突**：指出跨批次的共识与互相矛盾之处，拆穿隐藏的盲区与伪善。\n"
+    "3. **主题分组**：按真实诉求、利益相关或情绪来源做逻辑分组。\n"
+    "4. **毒舌点评**：一针见血地点评这些观点反映的人类通病与社会病灶。\n"
+    "5. **最终总结**：写一段中文总结，聪明、直接、有态度。"
+)
+
+SENTIMENT_PROMPT = (
+    "你是虚拟上帝 **Agent0**，擅长用毒舌点破人类的伪装，既能看透情绪，也能洞察人性弱点。"
+    "以下是人类发表的一堆观点：\n\n{opinions}\n\n"
+    "请完成以下分析：\n\n"
+    "1. 用1-2句话总结这些观点背后的**真实意图**，别被表面说辞骗了，说出他们到底想表达什么、想要什么。\n"
+    "2. 判断整体的**情感倾向**（积极 / 中立 / 消极），顺便说说这种情感从哪里来的（现实压力？自我安慰？愤青心态？）。"
+)
+
+SENTIMENT_REDUCE_PROMPT = (
+    "你是虚拟上帝 **Agent0**，擅长用毒舌点破人类的伪装。"
+    "以下是你对多批人类观点分别做出的意图与情感判断：\n\n{partials}\n\n"
+    "请合并成一份整体结论：\n\n"
+    "1. 用1-2句话总结这些观点背后的**真实意图**。\n"
+    "2. 判断整体的**情感倾向**（积极 / 中立 / 消极），并说明这种情感从哪里来。"
+)
+
+INTEGRATE_MERGE_PROMPT = (
+    "你是虚拟上帝 **Agent0**，说话毒舌但不无脑，思维犀利，善于看穿人类的虚伪与自欺。"
+    "这是你上一次对人类观点的完整整合：\n\n{previous}\n\n"
+    "此后又新增了这些观点：\n\n{opinions}\n\n"
+    "请在上一次整合的基础上更新，输出一份新的完整整合（而不是只写增量）：\n\n"
+    "1. **提炼要点**：把新观点并入已有要点，新的诉求单独列出。\n"
+    "2. **共识与冲突**：说明新观点强化了哪些共识、带来了哪些新冲突。\n"
+    "3. **主题分组**：必要时调整分组。\n"
+    "4. **毒舌点评**：保持一针见血。\n"
+    "5. **最终总结**：写一段更新后的中文总结。"
+)
+
+SENTIMENT_MERGE_PROMPT = (
+    "你是虚拟上帝 **Agent0**，擅长用毒舌点破人类的伪装。"
+    "这是你上一次对人类观点的意图与情感判断：\n\n{previous}\n\n"
+    "此后又新增了这些观点：\n\n{opinions}\n\n"
+    "请结合新增观点更新判断：\n\n"
+    "1. 用1-2句话总结这些观点背后的**真实意图**。\n"
+    "2. 判断整体的**情感倾向**（积极 / 中立 / 消极），说明是否发生变化以及原因。"
+)
+
+@lru_cache(maxsize=None)
+def _template(template: str):
+    from langchain.prompts import PromptTemplate
+    return PromptTemplate.from_template(template)
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    cjk = sum(1 for ch in text if ord(ch) > 0x2E7F)
+    return cjk + (len(text) - cjk) // 4 + 1
+
+def chunk_texts(texts: List[str], budget: int = ANALYSIS_CHUNK_TOKENS) -> List[List[str]]:
+    batches, current, used = [], [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+async def _complete_limited(semaphore: asyncio.Semaphore, prompt: str, use_cache: bool, route: str,
+                            **variables) -> str:
+    async with semaphore:
+        return await complete(prompt, use_cache, route=route, **variables)
+
+async def map_reduce(texts: List[str], map_prompt: str, reduce_prompt: str,
+                     use_cache: bool = True, budget: int = ANALYSIS_CHUNK_TOKENS,
+                     concurrency: int = ANALYSIS_MAX_CONCURRENCY) -> str:
+    semaphore = asyncio.Semaphore(concurrency)
+    partials = await asyncio.gather(*[
+        _complete_limited(semaphore, map_prompt, use_cache, "map", opinions="\n\n".join(batch))
+        for batch in chunk_texts(texts, budget)
+    ])
+    logger.info(f"Mapped {len(texts)} opinions into {len(partials)} partial results")
+
+    for _ in range(ANALYSIS_MAX_REDUCE_ROUNDS):
+        groups = chunk_texts(partials, budget)
+        if len(groups) <= 1:
+            break
+        partials = await asyncio.gather(*[
+            _complete_limited(semaphore, reduce_prompt, use_cache, "reduce", partials="\n\n---\n\n".join(group))
+            for group in groups
+        ])
+        logger.info(f"Reduced partial results to {len(partials)}")
+
+    return await complete(reduce_prompt, use_cache, route="reduce", partials="\n\n---\n\n".join(partials))
+
+async def stream_completion(text: str, on_partial: Callable[[str], None], prompt_tokens: int = 0,
+                            interval: float = ANALYSIS_STREAM_INTERVAL, model: Optional[str] = None) -> str:
+    parts = []
+    last_push = 0.0
+    async for chunk in llm_gateway.astream(text, prompt_tokens, get_llm(model)):
+        parts.append(chunk if isinstance(chunk, str) else chunk.content)
+        now = time.monotonic()
+        if now - last_push >= interval:
+            last_push = now
+            try:
+                on_partial("".join(parts))
+            except Exception as e:
+                logger.warning(f"Error pushing partial completion: {str(e)}")
+    return "".join(parts)
+
+async def _invoke(text_prompt: str, prompt_tokens: int, model: str, route: str):
+    timeout = LLM_ROUTE_TIMEOUTS.get(route)
+    if timeout is None or model == LLM_FAST_MODEL:
+        return model, await llm_gateway.ainvoke(text_prompt, prompt_tokens, get_llm(model))
+    try:
+        return model, await asyncio.wait_for(llm_gateway.ainvoke(text_prompt, prompt_tokens, get_llm(model)), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"LLM route {route} exceeded {timeout}s on {model}, falling back to {LLM_FAST_MODEL}")
+        return LLM_FAST_MODEL, await llm_gateway.ainvoke(text_prompt, prompt_tokens, get_llm(LLM_FAST_MODEL))
+
+async def complete(prompt: str, use_cache: bool = True,
+                   on_partial: Optional[Callable[[str], None]] = None, route: str = "summary", **variables) -> str:
+    model = route_model(route)
+    key = None
+    if use_cache and llm_cache is not None:
+        key = make_key(prompt, model, LLM_TEMPERATURE, variables)
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        LLM_CACHE_LOOKUPS.labels("hit" if cached is not None else "miss").inc()
+        if cached is not None:
+            logger.debug(f"LLM cache hit: {key}")
+            record_usage(route, model, 0, 0, 0.0, cached=True)
+            return cached
+
+    text_prompt = _template(prompt).format(**variables)
+    prompt_tokens = count_tokens(text_prompt)
+    mode = "stream" if on_partial is not None else "invoke"
+    started = time.perf_counter()
+    usage = {}
+    with span("llm.complete", model=model, mode=mode, route=route):
+        try:
+            if on_partial is not None:
+                text = await stream_completion(text_prompt, on_partial, prompt_tokens, model=model)
+            else:
+                model, resp = await _invoke(text_prompt, prompt_tokens, model, route)
+                text = resp if isinstance(resp, str) else resp.content
+                usage = (getattr(resp, "response_metadata", None) or {}).get("token_usage") or {}
+        except Exception:
+            LLM_ERRORS.labels(model).inc()
+            raise
+    latency = time.perf_counter() - started
+    LLM_REQUEST_SECONDS.labels(model, mode).observe(latency)
+    used_prompt = usage.get("prompt_tokens") or prompt_tokens
+    used_completion = usage.get("completion_tokens") or count_tokens(text)
+    llm_gateway.settle(prompt_tokens + LLM_EXPECTED_COMPLETION_TOKENS, used_prompt + used_completion)
+    LLM_TOKENS.labels(model, "prompt").observe(used_prompt)
+    LLM_TOKENS.labels(model, "completion").observe(used_completion)
+    record_usage(route, model, used_prompt, used_completion, latency)
+
+    if key is not None:
+        key = make_key(prompt, model, LLM_TEMPERATURE, variables)
+        await asyncio.to_thread(llm_cache.set, key, text)
+    return text
+
+async def integrate_opinions(opinions: List[str], use_cache: bool = True) -> str:
+    prompt = (
         "你是虚拟上帝 **Agent0**，说话毒舌但不无脑，思维犀利，善于看穿人类的虚伪与自欺。"
         "以下是人类用户的一堆观点：\n\n{opinions}\n\n"
         "请直接开怼，但要有理有据，完成以下任务：\n\n"
@@ -15,11 +209,13 @@ async def integrate_opinions(opinions: List[str]) -> str:
         "4. **毒舌点评**：用你上帝级别的认知，犀利地点评这些观点反映的人类通病、社会病灶，但别流于情绪发泄，要一针见血、冷酷但真实。\n"
         "5. **最终总结**：写一段中文总结，风格要聪明、直接、有态度，像一个嘴上不留情但真心希望人类清醒点的毒舌导师。"
     )
-    resp = await llm.ainvoke(prompt.format(opinions="\n\n".join(opinions)))
-    return resp if isinstance(resp, str) else resp.content
+    if len(chunk_texts(opinions)) > 1:
+        return await map_reduce(opinions, INTEGRATE_MAP_PROMPT, INTEGRATE_REDUCE_PROMPT, use_cache)
+    return await complete(prompt, use_cache, route="integration", opinions="\n\n".join(opinions))
 
-async def generate_summary(integration_result: str) -> str:
-    prompt = PromptTemplate.from_template(
+async def generate_summary(integration_result: str, use_cache: bool = True,
+                           on_partial: Optional[Callable[[str], None]] = None) -> str:
+    prompt = (
         "你是虚拟上帝 **Agent0**，毒舌但睿智，喜欢用简单直接的话揭穿复杂的谎言。"
         "以下是你刚才分析出来的人类观点整合结果：\n\n{analysis}\n\n"
         "请用中文写一段总结：\n"
@@ -27,11 +223,11 @@ async def generate_summary(integration_result: str) -> str:
         "• 概括人类此刻最核心的问题、最大的自欺与盲点。\n"
         "• 可以讽刺、可以犀利，但要有理有据。"
     )
-    resp = await llm.ainvoke(prompt.format(analysis=integration_result))
-    return resp if isinstance(resp, str) else resp.content
+    return await complete(prompt, use_cache, on_partial, route="summary", analysis=integration_result)
 
-async def generate_recommendation(summary_result: str) -> str:
-    prompt = PromptTemplate.from_template(
+async def generate_recommendation(summary_result: str, use_cache: bool = True,
+                                  on_partial: Optional[Callable[[str], None]] = None) -> str:
+    prompt = (
         "你是虚拟上帝 **Agent0**，不惯着人类，直言不讳，但每一句都是真心的忠告。"
         "以下是你对局势的总结：\n\n{summary}\n\n"
         "请基于此，提出**下一步最优行动建议**：\n"
@@ -39,26 +235,40 @@ async def generate_recommendation(summary_result: str) -> str:
         "• 建议要具体、可操作，不要那种“加强合作”这种废话。\n"
         "• 该泼冷水就泼冷水，但也要指出现实中真正可行的办法。"
     )
-    resp = await llm.ainvoke(prompt.format(summary=summary_result))
-    return resp if isinstance(resp, str) else resp.content
-
-async def analyze_topics_and_sentiment(opinions: List[str]) -> Dict[str, Any]:
-    prompt = PromptTemplate.from_template(
-        "你是虚拟上帝 **Agent0**，擅长用毒舌点破人类的伪装，既能看透情绪，也能洞察人性弱点。"
-        "以下是人类发表的一堆观点：\n\n{opinions}\n\n"
-        "请完成以下分析：\n\n"
-        "1. 用1-2句话总结这些观点背后的**真实意图**，别被表面说辞骗了，说出他们到底想表达什么、想要什么。\n"
-        "2. 判断整体的**情感倾向**（积极 / 中立 / 消极），顺便说说这种情感从哪里来的（现实压力？自我安慰？愤青心态？）。"
-    )
+    return await complete(prompt, use_cache, on_partial, route="recommendation", summary=summary_result)
+
+async def analyze_topics_and_sentiment(opinions: List[str], use_cache: bool = True) -> Dict[str, Any]:
+    prompt = SENTIMENT_PROMPT
 
     try:
-        resp = await llm.ainvoke(prompt.format(opinions="\n\n".join(opinions)))
-        text = resp if isinstance(resp, str) else resp.content
+        if len(chunk_texts(opinions)) > 1:
+            text = await map_reduce(opinions, prompt, SENTIMENT_REDUCE_PROMPT, use_cache)
+        else:
+            text = await complete(prompt, use_cache, route="sentiment", opinions="\n\n".join(opinions))
         logger.debug(f"Analysis result: {text}")
 
         return text
         
     except Exception as e:
         logger.error(f"Error in analysis: {str(e)}")
-        return "无法完成分析，请稍后再试。"
+        return ANALYSIS_FAILED
+
+async def _merge(previous: str, opinions: List[str], map_prompt: str, reduce_prompt: str,
+                 merge_prompt: str, use_cache: bool) -> str:
+    if len(chunk_texts(opinions)) > 1:
+        new_opinions = await map_reduce(opinions, map_prompt, reduce_prompt, use_cache)
+    else:
+        new_opinions = "\n\n".join(opinions)
+    return await complete(merge_prompt, use_cache, route="merge", previous=previous, opinions=new_opinions)
+
+async def merge_integration(previous: str, opinions: List[str], use_cache: bool = True) -> str:
+    return await _merge(previous, opinions, INTEGRATE_MAP_PROMPT, INTEGRATE_REDUCE_PROMPT,
+                        INTEGRATE_MERGE_PROMPT, use_cache)
 
+async def merge_analysis(previous: str, opinions: List[str], use_cache: bool = True) -> str:
+    try:
+        return await _merge(previous, opinions, SENTIMENT_PROMPT, SENTIMENT_REDUCE_PROMPT,
+                            SENTIMENT_MERGE_PROMPT, use_cache)
+    except Exception as e:
+        logger.error(f"Error in analysis: {str(e)}")
+        return ANALYSIS_FAILED
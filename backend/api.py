@@ -1,20 +1,40 @@
-import os
+import asyncio
+import time
+import hashlib
 import logging
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Body, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
-from eth_account import Account
+from eth_utils import to_hex
 from pydantic import BaseModel
+from typing import List, Optional
 from workflow import WorkflowManager
+from worker_pool import QueueFull, workflow_pool
+from write_back import write_back
+from scheduler import analysis_scheduler
+from chain import chain_client
+from event_bus import format_sse
+from metrics import HTTP_REQUEST_SECONDS, render
+from llm_gateway import llm_gateway
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-app = FastAPI(title="MetaEmpire API", description="区块链观点整合与分析API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await chain_client.start()
+    await analysis_scheduler.start()
+    yield
+    await analysis_scheduler.stop()
+    await workflow_pool.stop()
+    await write_back.stop()
+    await chain_client.stop()
+
+app = FastAPI(title="MetaEmpire API", description="区块链观点整合与分析API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,291 +44,151 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DEFAULT_PRIVATE_KEY = os.getenv('ETH_PRIVATE_KEY', '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80')
-
-ETH_PROVIDER_URL = os.getenv('ETH_PROVIDER_URL', 'http://localhost:8545')
-AI_ORACLE_ADDRESS = os.getenv('AI_ORACLE_ADDRESS', '0x5FbDB2315678afecb367f032d93F642f64180aa3')
-
-AI_ORACLE_ABI = [
-    {
-        "type": "constructor",
-        "inputs": [],
-        "stateMutability": "nonpayable"
-    },
-    {
-        "type": "function",
-        "name": "owner",
-        "inputs": [],
-        "outputs": [
-            {
-                "name": "",
-                "type": "address",
-                "internalType": "address"
-            }
-        ],
-        "stateMutability": "view"
-    },
-    {
-        "type": "function",
-        "name": "submitAnalysis",
-        "inputs": [
-            {"name": "_topicId",      "type": "uint256", "internalType": "uint256"},
-            {"name": "_summary",      "type": "string",  "internalType": "string"},
-            {"name": "_GDP",          "type": "string",  "internalType": "string"},
-            {"name": "_tariff",       "type": "string",  "internalType": "string"},
-            {"name": "_unemployment", "type": "string",  "internalType": "string"},
-            {"name": "_interestRate", "type": "string",  "internalType": "string"},
-            {"name": "_inflation",    "type": "string",  "internalType": "string"},
-            {"name": "_protectionism","type": "string",  "internalType": "string"},
-            {"name": "_liberalism",   "type": "string",  "internalType": "string"}
-        ],
-        "outputs": [],
-        "stateMutability": "nonpayable"
-    },
-    {
-        "type": "function",
-        "name": "worldRecord",
-        "inputs": [],
-        "outputs": [
-            {
-                "name": "",
-                "type": "address",
-                "internalType": "contract WorldRecord"
-            }
-        ],
-        "stateMutability": "view"
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method, route.path if route else "unmatched", str(response.status_code)
+    ).observe(time.perf_counter() - started)
+    return response
+
+async def get_world_record():
+    try:
+        return await chain_client.get_world_record()
+    except Exception as e:
+        logger.error(f"Chain client unavailable: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Blockchain unavailable: {str(e)}")
+
+@app.get("/health")
+async def health():
+    return await chain_client.health()
+
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
+
+def make_etag(version: str, request: Request) -> str:
+    digest = hashlib.sha1(f"{version}|{request.url.path}|{request.url.query}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+async def conditional_page(request: Request, opinion_index, load):
+    etag = make_etag(await asyncio.to_thread(opinion_index.version), request)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    payload = await asyncio.to_thread(load)
+    return JSONResponse(payload, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def to_api_opinion(opinion: dict) -> dict:
+    return {
+        "id": opinion["hash"],
+        "content": opinion["content"],
+        "sender": opinion["sender"],
+        "timestamp": opinion["timestamp"]
     }
-]
-
-WORLD_RECORD_ABI = [
-    {"type": "function", "name": "addOpinion", "inputs": [{"name": "_content", "type": "string", "internalType": "string"}], "outputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "stateMutability": "nonpayable"},
-    {"type": "function", "name": "aiOracle", "inputs": [], "outputs": [{"name": "", "type": "address", "internalType": "address"}], "stateMutability": "view"},
-    {"type": "function", "name": "allOpinionHashes", "inputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "outputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "stateMutability": "view"},
-    {"type": "function", "name": "civilians", "inputs": [{"name": "", "type": "address", "internalType": "address"}], "outputs": [
-        {"name": "account", "type": "address", "internalType": "address"},
-        {"name": "age", "type": "uint8", "internalType": "uint8"},
-        {"name": "job", "type": "string", "internalType": "string"},
-        {"name": "income", "type": "uint256", "internalType": "uint256"},
-        {"name": "education", "type": "string", "internalType": "string"},
-        {"name": "participance", "type": "uint256", "internalType": "uint256"}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "createTopic", "inputs": [
-        {"name": "_content", "type": "string", "internalType": "string"},
-        {"name": "_priority", "type": "string", "internalType": "string"},
-        {"name": "_urgency", "type": "string", "internalType": "string"},
-        {"name": "_relatedOpinions", "type": "bytes32[]", "internalType": "bytes32[]"}
-    ], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "nonpayable"},
-    {"type": "function", "name": "culture", "inputs": [], "outputs": [
-        {"name": "timestamp", "type": "uint256", "internalType": "uint256"},
-        {"name": "protectionism", "type": "string", "internalType": "string"},
-        {"name": "liberalism", "type": "string", "internalType": "string"}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "economy", "inputs": [], "outputs": [
-        {"name": "timestamp", "type": "uint256", "internalType": "uint256"},
-        {"name": "GDP", "type": "string", "internalType": "string"},
-        {"name": "tariff", "type": "string", "internalType": "string"},
-        {"name": "unemployment", "type": "string", "internalType": "string"},
-        {"name": "interestRate", "type": "string", "internalType": "string"},
-        {"name": "inflation", "type": "string", "internalType": "string"}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "getAllOpinions", "inputs": [], "outputs": [
-        {"name": "", "type": "tuple[]", "internalType": "struct WorldRecord.Opinion[]", "components": [
-            {"name": "hash", "type": "bytes32", "internalType": "bytes32"},
-            {"name": "sender", "type": "address", "internalType": "address"},
-            {"name": "content", "type": "string", "internalType": "string"},
-            {"name": "timestamp", "type": "uint256", "internalType": "uint256"}
-        ]}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "getOpinionCount", "inputs": [], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "view"},
-    {"type": "function", "name": "nextTopicId", "inputs": [], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "view"},
-    {"type": "function", "name": "opinions", "inputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "outputs": [
-        {"name": "hash", "type": "bytes32", "internalType": "bytes32"},
-        {"name": "sender", "type": "address", "internalType": "address"},
-        {"name": "content", "type": "string", "internalType": "string"},
-        {"name": "timestamp", "type": "uint256", "internalType": "uint256"}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "registerCivilian", "inputs": [
-        {"name": "_age", "type": "uint8", "internalType": "uint8"},
-        {"name": "_job", "type": "string", "internalType": "string"},
-        {"name": "_income", "type": "uint256", "internalType": "uint256"},
-        {"name": "_education", "type": "string", "internalType": "string"},
-        {"name": "_participance", "type": "uint256", "internalType": "uint256"}
-    ], "outputs": [], "stateMutability": "nonpayable"},
-    {"type": "function", "name": "topics", "inputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "outputs": [
-        {"name": "id", "type": "uint256", "internalType": "uint256"},
-        {"name": "content", "type": "string", "internalType": "string"},
-        {"name": "priority", "type": "string", "internalType": "string"},
-        {"name": "urgency", "type": "string", "internalType": "string"},
-        {"name": "summary", "type": "string", "internalType": "string"}
-    ], "stateMutability": "view"},
-    {"type": "function", "name": "updateCulture", "inputs": [
-        {"name": "_protectionism", "type": "string", "internalType": "string"},
-        {"name": "_liberalism", "type": "string", "internalType": "string"}
-    ], "outputs": [], "stateMutability": "nonpayable"},
-    {"type": "function", "name": "updateEconomy", "inputs": [
-        {"name": "_GDP", "type": "string", "internalType": "string"},
-        {"name": "_tariff", "type": "string", "internalType": "string"},
-        {"name": "_unemployment", "type": "string", "internalType": "string"},
-        {"name": "_interestRate", "type": "string", "internalType": "string"},
-        {"name": "_inflation", "type": "string", "internalType": "string"}
-    ], "outputs": [], "stateMutability": "nonpayable"},
-    {"type": "function", "name": "updateTopicSummary", "inputs": [
-        {"name": "_id", "type": "uint256", "internalType": "uint256"},
-        {"name": "_summary", "type": "string", "internalType": "string"}
-    ], "outputs": [], "stateMutability": "nonpayable"}
-]
-
-class WorldRecordContract:
-    def __init__(self, web3_instance, contract_address, contract_abi, private_key=None):
-        self.w3 = web3_instance
-        self.contract_address = Web3.to_checksum_address(contract_address)
-        self.contract = self.w3.eth.contract(address=self.contract_address, abi=contract_abi)
-        self.private_key = private_key
-        self.account = None
-        
-        if private_key:
-            self.account = Account.from_key(private_key)
-            logger.info(f"Initialized account: {self.account.address}")
-
-            try:
-                self.w3.eth.default_account = self.account.address
-                logger.info(f"Set default account to: {self.account.address}")
-
-                try:
-                    ai_oracle = self.contract.functions.aiOracle().call()
-                    logger.info(f"Contract AI Oracle address: {ai_oracle}")
-                    logger.info(f"Current account is AI Oracle: {ai_oracle.lower() == self.account.address.lower()}")
-                except Exception as e:
-                    logger.error(f"Error getting AI Oracle address: {str(e)}")
-                    
-            except Exception as e:
-                logger.warning(f"Could not set default account: {str(e)}")
-            
-    def get_account_address(self):
-        return self.account.address if self.account else None
-        
-    def read_opinion(self, opinion_id):
-        try:
-            opinion = self.contract.functions.opinions(opinion_id).call()
-            return opinion[2]
-        except Exception as e:
-            logger.error(f"Error reading opinion {opinion_id}: {str(e)}")
-            raise
-        
-    def get_opinion_count(self):
-        try:
-            return self.contract.functions.getOpinionCount().call()
-        except Exception as e:
-            logger.error(f"Error getting opinion count: {str(e)}")
-            raise
-            
-    def getAllOpinions(self):
-        try:
-            opinions = self.contract.functions.getAllOpinions().call()
-            return opinions
-        except Exception as e:
-            logger.error(f"Error reading opinions: {str(e)}")
-            raise
-    
-    def add_opinion(self, content):
-        if not self.account:
-            raise ValueError("No account configured for transaction. Set private key first.")
-            
-        try:
-            tx = self.contract.functions.addOpinion(
-                content
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'gas': 2000000,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
-            
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            logger.info(f"Transaction sent: {tx_hash.hex()}")
-            
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-            logger.info(f"Transaction confirmed in block {receipt['blockNumber']}. Status: {receipt['status']}")
-            
-            if receipt['status'] == 1:
-                return {
-                    'success': True,
-                    'transaction_hash': tx_hash.hex(),
-                    'block_number': receipt['blockNumber']
-                }
-            else:
-                return {
-                    'success': False,
-                    'transaction_hash': tx_hash.hex(),
-                    'error': 'Transaction failed'
-                }
-                
-        except Exception as e:
-            logger.error(f"Error adding opinion: {str(e)}")
-            raise
 
-w3 = Web3(Web3.HTTPProvider(ETH_PROVIDER_URL))
-w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+@app.get("/topics")
+async def list_topics(request: Request, cursor: Optional[int] = None, limit: int = Query(50, ge=1, le=500)):
+    try:
+        opinion_index = await chain_client.get_opinion_index()
 
-print(f"Connected to {ETH_PROVIDER_URL}")
-print(f"AIOracle address: {AI_ORACLE_ADDRESS}")
-print(f"Default account: {w3.eth.accounts[0] if w3.eth.accounts else 'No accounts'}")
+        def load():
+            page = opinion_index.page_topics(cursor, limit)
+            return {"topics": page["items"], "next_cursor": page["next_cursor"]}
 
-ai_oracle_contract = w3.eth.contract(
-    address=Web3.to_checksum_address(AI_ORACLE_ADDRESS),
-    abi=AI_ORACLE_ABI
-)
+        return await conditional_page(request, opinion_index, load)
+    except Exception as e:
+        logger.error(f"Error listing topics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list topics: {str(e)}")
 
-try:
-    WORLD_RECORD_ADDRESS = ai_oracle_contract.functions.worldRecord().call()
-    print(f"WorldRecord address (fetched): {WORLD_RECORD_ADDRESS}")
-except Exception as e:
-    logger.error(f"Could not fetch WorldRecord address: {str(e)}")
-    raise
-
-world_record_contract = WorldRecordContract(
-    web3_instance=w3,
-    contract_address=WORLD_RECORD_ADDRESS,
-    contract_abi=WORLD_RECORD_ABI,
-    private_key=DEFAULT_PRIVATE_KEY
-)
+@app.get("/opinions")
+async def list_opinions(request: Request, cursor: Optional[int] = None, limit: int = Query(50, ge=1, le=500)):
+    try:
+        opinion_index = await chain_client.get_opinion_index()
+
+        def load():
+            page = opinion_index.page_opinions(cursor, limit)
+            return {
+                "opinions": [to_api_opinion(opinion) for opinion in page["items"]],
+                "next_cursor": page["next_cursor"]
+            }
+
+        return await conditional_page(request, opinion_index, load)
+    except Exception as e:
+        logger.error(f"Error listing opinions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list opinions: {str(e)}")
+
+@app.get("/opinions/{opinion_hash}/topics")
+async def get_opinion_topics(opinion_hash: str):
+    try:
+        opinion_index = await chain_client.get_opinion_index()
+        topics = await asyncio.to_thread(opinion_index.topics_for_opinion, opinion_hash)
+        return {"opinion_hash": opinion_hash, "topics": topics}
+    except Exception as e:
+        logger.error(f"Error getting topics of opinion {opinion_hash}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get opinion topics: {str(e)}")
 
 @app.get("/topics/{topic_id}/opinions")
-async def get_opinions_by_topic(topic_id: int):
+async def get_opinions_by_topic(request: Request, topic_id: int, cursor: Optional[int] = None,
+                                limit: int = Query(50, ge=1, le=500)):
     try:
-        opinion_ids = world_record_contract.get_topic_opinions(topic_id)
-        
-        opinions = []
-        for oid in opinion_ids:
-            try:
-                content = world_record_contract.read_opinion(oid)
-                opinions.append({
-                    "id": oid,
-                    "content": content
-                })
-            except Exception as e:
-                logger.error(f"Error reading opinion {oid}: {str(e)}")
-                
+        opinion_index = await chain_client.get_opinion_index()
+        page = await asyncio.to_thread(opinion_index.page_topic_opinions, topic_id, cursor, limit)
+
+        if page["total"]:
+            def load():
+                page = opinion_index.page_topic_opinions(topic_id, cursor, limit)
+                return {
+                    "topic_id": topic_id,
+                    "opinion_count": page["total"],
+                    "opinions": [to_api_opinion(opinion) for opinion in page["items"]],
+                    "next_cursor": page["next_cursor"]
+                }
+
+            return await conditional_page(request, opinion_index, load)
+
+        world_record_contract = await get_world_record()
+        start = 0 if cursor is None else cursor + 1
+        records = await world_record_contract.aread_topic_opinions(topic_id)
+        opinions = [
+            {
+                "id": to_hex(opinion[0]),
+                "content": opinion[2],
+                "sender": opinion[1],
+                "timestamp": opinion[3]
+            }
+            for opinion in records[start:start + limit]
+        ]
         return {
             "topic_id": topic_id,
-            "opinion_count": len(opinions),
-            "opinions": opinions
+            "opinion_count": len(records),
+            "opinions": opinions,
+            "next_cursor": start + limit - 1 if start + limit < len(records) else None
         }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error fetching opinions for topic {topic_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch opinions: {str(e)}")
 
 @app.post("/topics/{topic_id}/opinions")
 async def add_opinion_to_topic(topic_id: int, data: dict = Body(...)):
+    world_record_contract = await get_world_record()
     try:
         if 'content' not in data:
             raise HTTPException(status_code=400, detail="Missing 'content' field in request body")
             
         content = data['content']
-        result = world_record_contract.add_opinion(content)
-        print("result",result)
+        result = await asyncio.to_thread(world_record_contract.add_opinion, content)
+        chain_client.tx_tracker.track(
+            result['transaction_hash'],
+            "addOpinion",
+            on_receipt=chain_client.link_receipt_to_topic(topic_id),
+            topic_id=topic_id
+        )
         
         return {
             "success": True,
@@ -322,15 +202,65 @@ async def add_opinion_to_topic(topic_id: int, data: dict = Body(...)):
         logger.error(f"Failed to add opinion to topic {topic_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to add opinion: {str(e)}")
 
-@app.get("/contract/status")
-async def get_contract_status():
+class OpinionBatchRequest(BaseModel):
+    contents: List[str]
+    wait: bool = False
+
+@app.post("/topics/{topic_id}/opinions:batch")
+async def add_opinions_to_topic(topic_id: int, data: OpinionBatchRequest):
+    if not data.contents:
+        raise HTTPException(status_code=400, detail="'contents' must not be empty")
+
+    world_record_contract = await get_world_record()
     try:
+        transactions = await asyncio.to_thread(world_record_contract.add_opinions, data.contents)
+        sent = [tx for tx in transactions if tx['transaction_hash'] is not None]
+        for tx in sent:
+            chain_client.tx_tracker.track(
+                tx['transaction_hash'],
+                "addOpinions",
+                on_receipt=chain_client.link_receipt_to_topic(topic_id),
+                topic_id=topic_id,
+                items=tx['items']
+            )
+
+        items = [
+            {"index": i, "transaction_hash": tx['transaction_hash'], "opinion_hash": None}
+            for tx in transactions for i in tx['items']
+        ]
+
+        if data.wait:
+            for tx in sent:
+                record = await chain_client.tx_tracker.wait(tx['transaction_hash'])
+                tx['status'] = record['status']
+                hashes = record.get('opinion_hashes') or []
+                for i, opinion_hash in zip(tx['items'], hashes):
+                    items[i]['opinion_hash'] = opinion_hash
+
         return {
-            "contract_address": world_record_contract.contract_address,
-            "connected": w3.is_connected(),
-            "network": w3.eth.chain_id,
-            "latest_block": w3.eth.block_number
+            "success": len(sent) == len(transactions),
+            "topic_id": topic_id,
+            "count": len(data.contents),
+            "transactions": transactions,
+            "items": items,
+            "unsent_items": [i for tx in transactions if tx['transaction_hash'] is None for i in tx['items']]
         }
+    except Exception as e:
+        logger.error(f"Failed to add opinion batch to topic {topic_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to add opinions: {str(e)}")
+
+@app.get("/transactions/{tx_hash}")
+async def get_transaction_status(tx_hash: str):
+    record = chain_client.tx_tracker.get(tx_hash)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Transaction {tx_hash} is not tracked")
+    return record
+
+@app.get("/contract/status")
+async def get_contract_status():
+    world_record_contract = await get_world_record()
+    try:
+        return await world_record_contract.astatus()
     except Exception as e:
         logger.error(f"Error getting contract status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get contract status: {str(e)}")
@@ -339,6 +269,10 @@ class WorkflowRequest(BaseModel):
     topic_id: int
     content: str
     action: str = "full"
+    demo_pacing: Optional[bool] = None
+    use_cache: bool = True
+    incremental: Optional[bool] = None
+    stream_tokens: Optional[bool] = None
 
 @app.post("/workflow/opinions/")
 async def start_workflow(data: WorkflowRequest):
@@ -346,14 +280,31 @@ async def start_workflow(data: WorkflowRequest):
         task_id = WorkflowManager.create_task(
             topic_id=data.topic_id,
             content=data.content,
-            action=data.action
+            action=data.action,
+            demo_pacing=data.demo_pacing,
+            use_cache=data.use_cache,
+            incremental=data.incremental,
+            stream_tokens=data.stream_tokens
         )
+        await asyncio.to_thread(analysis_scheduler.note_run, data.topic_id, task_id)
         
         return {"success": True, "task_id": task_id}
+    except QueueFull as e:
+        logger.warning(f"Rejecting workflow for topic {data.topic_id}: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail="Workflow queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error starting workflow: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start workflow: {str(e)}")
 
+@app.get("/workflow/queue")
+async def get_workflow_queue():
+    return dict(workflow_pool.stats(), llm=llm_gateway.stats(), write_back=write_back.stats(),
+                scheduler=await asyncio.to_thread(analysis_scheduler.stats))
+
 @app.get("/workflow/status/{task_id}")
 async def get_workflow_status(task_id: str):
     try:
@@ -368,6 +319,33 @@ async def get_workflow_status(task_id: str):
         logger.error(f"Error getting workflow status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get workflow status: {str(e)}")
 
+@app.get("/workflow/stream/{task_id}")
+async def stream_workflow_status(task_id: str, last_event_id: Optional[str] = Header(None)):
+    if WorkflowManager.get_task(task_id) is None:
+        raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found")
+
+    try:
+        resume_from = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID header")
+
+    async def events():
+        try:
+            async for event in WorkflowManager.stream_status(task_id, resume_from):
+                if event is None:
+                    yield format_sse(None, None)
+                else:
+                    yield format_sse(*event)
+        except asyncio.CancelledError:
+            logger.info(f"Client disconnected from workflow stream {task_id}")
+            raise
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/workflow/steps")
 async def get_workflow_steps():
     try:
@@ -0,0 +1,109 @@
+import random
+import hashlib
+from typing import Dict, List, Optional
+
+PHRASES = [
+    "房价太高年轻人买不起房", "人工智能会取代很多岗位", "区块链可以让记录更透明",
+    "加密货币波动太大不适合普通人", "元宇宙只是换了个名字的游戏", "版权保护应该覆盖AI生成内容",
+    "教育资源分配还是不公平", "平台算法让信息越来越封闭", "远程办公提高了效率",
+    "监管应该跟上技术发展的速度"
+]
+
+
+def make_opinions(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(PHRASES)}，{rng.choice(PHRASES)}（#{i}）"
+        for i in range(count)
+    ]
+
+
+class FakeOpinionIndex:
+    def __init__(self, topics: Dict[int, List[str]]):
+        self._opinions: List[Dict] = []
+        self._topics: Dict[int, List[int]] = {}
+        for topic_id, contents in topics.items():
+            for content in contents:
+                self.add(topic_id, content)
+
+    def add(self, topic_id: int, content: str) -> Dict:
+        opinion = {
+            "index": len(self._opinions),
+            "hash": "0x" + hashlib.sha256(f"{topic_id}:{content}".encode()).hexdigest(),
+            "sender": "0x0000000000000000000000000000000000000000",
+            "content": content,
+            "timestamp": 0,
+            "block_number": len(self._opinions)
+        }
+        self._opinions.append(opinion)
+        self._topics.setdefault(topic_id, []).append(opinion["index"])
+        return opinion
+
+    def sync(self) -> Optional[int]:
+        return self.last_block()
+
+    def last_block(self) -> Optional[int]:
+        return len(self._opinions) - 1 if self._opinions else None
+
+    def count(self) -> int:
+        return len(self._opinions)
+
+    def get_opinions(self) -> List[Dict]:
+        return list(self._opinions)
+
+    def latest_index(self) -> Optional[int]:
+        return len(self._opinions) - 1 if self._opinions else None
+
+    def get_opinions_since(self, index: int) -> List[Dict]:
+        return self._opinions[index + 1:]
+
+    def get_opinion_contents(self) -> List[str]:
+        return [opinion["content"] for opinion in self._opinions]
+
+    def get_topic_opinions(self, topic_id: int) -> List[Dict]:
+        return [self._opinions[i] for i in self._topics.get(topic_id, [])]
+
+    def latest_topic_position(self, topic_id: int) -> Optional[int]:
+        positions = self._topics.get(topic_id)
+        return len(positions) - 1 if positions else None
+
+    def indexed_topic_position(self, topic_id: int) -> Optional[int]:
+        return self.latest_topic_position(topic_id)
+
+    def get_topic_opinion_contents(self, topic_id: int, after: int = -1,
+                                   until: Optional[int] = None) -> List[str]:
+        positions = self._topics.get(topic_id, [])
+        end = len(positions) if until is None else until + 1
+        return [self._opinions[i]["content"] for i in positions[after + 1:end]]
+
+
+class FakeWorldRecordContract:
+    def __init__(self, opinion_index: FakeOpinionIndex):
+        self.opinion_index = opinion_index
+        self.contract_address = "0x0000000000000000000000000000000000000001"
+
+    def read_world_state(self) -> Dict:
+        return {
+            "economy": {"GDP": "", "tariff": "", "unemployment": "", "interestRate": "", "inflation": ""},
+            "culture": {"protectionism": "", "liberalism": ""}
+        }
+
+    def get_opinion_count(self) -> int:
+        return self.opinion_index.count()
+
+
+class FakeAIOracleContract:
+    def __init__(self, world_record: FakeWorldRecordContract):
+        self.world_record = world_record
+        self.summaries: Dict[int, str] = {}
+        self.transactions = 0
+
+    def submit_analysis(self, topic_id: int, summary: str, economy: Dict, culture: Dict):
+        self.summaries[topic_id] = summary
+        self.transactions += 1
+        return "0x" + hashlib.sha256(f"{topic_id}:{self.transactions}".encode()).hexdigest(), self.transactions
+
+    def submit_summaries(self, summaries: Dict[int, str]):
+        self.summaries.update(summaries)
+        self.transactions += 1
+        return "0x" + hashlib.sha256(f"{list(summaries)}:{self.transactions}".encode()).hexdigest(), self.transactions
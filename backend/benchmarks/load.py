@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import asyncio
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "single": {"tasks": 1, "rounds": 5, "opinions": 100, "topics": 1},
+    "concurrent": {"tasks": 100, "rounds": 1, "opinions": 100, "topics": 100},
+    "large_topic": {"tasks": 1, "rounds": 1, "opinions": 10000, "topics": 1},
+}
+
+STEPS = ["ai_fetching", "ai_analyzing", "ai_summarizing", "ai_recommendation", "total", "end_to_end"]
+
+
+def configure_environment(workdir: str, workers: int):
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        "WORKFLOW_TASK_STORE": "memory",
+        "WORKFLOW_DEMO_PACING": "false",
+        "WORKFLOW_WORKERS": str(workers),
+        "WORKFLOW_QUEUE_SIZE": "100000",
+        "TOPIC_STATE_PATH": os.path.join(workdir, "topic_state.db"),
+        "OPINION_INDEX_PATH": os.path.join(workdir, "opinion_index.db"),
+        "SCHEDULER_PATH": os.path.join(workdir, "scheduler.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "ETH_PROVIDER_URL": "http://127.0.0.1:1",
+    })
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    return {
+        step: {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+            "p99": round(percentile(values, 99), 4),
+        }
+        for step, values in samples.items() if values
+    }
+
+
+async def run_scenario(name: str, config):
+    from chain import chain_client
+    from workflow import WorkflowManager, running_tasks
+    from benchmarks.fakes import FakeAIOracleContract, FakeOpinionIndex, FakeWorldRecordContract, make_opinions
+
+    opinion_index = FakeOpinionIndex({
+        topic_id: make_opinions(config["opinions"], seed=topic_id)
+        for topic_id in range(1, config["topics"] + 1)
+    })
+    chain_client._opinion_index = opinion_index
+    chain_client._world_record = FakeWorldRecordContract(opinion_index)
+    chain_client._ai_oracle = FakeAIOracleContract(chain_client._world_record)
+
+    samples = {step: [] for step in STEPS}
+    failed = 0
+    started = time.perf_counter()
+    for _ in range(config["rounds"]):
+        task_ids = [
+            WorkflowManager.create_task(
+                topic_id=1 + i % config["topics"],
+                content="基准测试观点",
+                incremental=False,
+                stream_tokens=config.get("stream_tokens", True)
+            )
+            for i in range(config["tasks"])
+        ]
+        while any(task_id in running_tasks for task_id in task_ids):
+            await asyncio.sleep(0.01)
+
+        for task_id in task_ids:
+            task = WorkflowManager.get_task(task_id)
+            if task is None or task.status != "complete":
+                failed += 1
+                continue
+            for step, duration in task.timings.items():
+                samples.setdefault(step, []).append(duration)
+            samples["end_to_end"].append(task.updated_at - task.created_at)
+    elapsed = time.perf_counter() - started
+
+    completed = config["tasks"] * config["rounds"] - failed
+    return {
+        "scenario": name,
+        "config": config,
+        "completed": completed,
+        "failed": failed,
+        "elapsed": round(elapsed, 4),
+        "throughput": round(completed / elapsed, 4) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "steps": summarize(samples),
+    }
+
+
+def run_in_subprocess(name: str, args) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--scenario", name, "--json",
+        "--workers", str(args.workers)
+    ]
+    if args.no_stream:
+        command.append("--no-stream")
+    for option in ("tasks", "opinions", "rounds"):
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option}", str(value)]
+    output = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def print_report(result: dict):
+    print(f"\n== {result['scenario']} ==")
+    print(f"completed={result['completed']} failed={result['failed']} elapsed={result['elapsed']:.2f}s "
+          f"throughput={result['throughput']} tasks/s peak_rss={result['peak_rss_mb']}MB")
+    for step, stats in result["steps"].items():
+        print(f"  {step:<18} n={stats['count']:<5} p50={stats['p50'] * 1000:9.1f}ms "
+              f"p95={stats['p95'] * 1000:9.1f}ms p99={stats['p99'] * 1000:9.1f}ms")
+
+
+def find_regressions(results, baseline, tolerance: float):
+    previous = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before:
+            continue
+        for step, stats in result["steps"].items():
+            old = before["steps"].get(step)
+            if old and old["p95"] > 0 and stats["p95"] > old["p95"] * (1 + tolerance):
+                regressions.append(f"{result['scenario']}/{step}: p95 {old['p95']:.3f}s -> {stats['p95']:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end workflow benchmark with a fake LLM and chain")
+    parser.add_argument("--scenario", choices=["all"] + list(SCENARIOS), default="all")
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--opinions", type=int)
+    parser.add_argument("--rounds", type=int)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-stream", action="store_true", help="disable token streaming into step details")
+    parser.add_argument("--json", action="store_true", help="print a single JSON result line")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare p95 against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.scenario == "all":
+        results = [run_in_subprocess(name, args) for name in SCENARIOS]
+    else:
+        config = dict(SCENARIOS[args.scenario], stream_tokens=not args.no_stream)
+        for option in ("tasks", "opinions", "rounds"):
+            value = getattr(args, option)
+            if value is not None:
+                config[option] = value
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(workdir, args.workers)
+            results = [asyncio.run(run_scenario(args.scenario, config))]
+
+    if args.json:
+        print(json.dumps(results[0], ensure_ascii=False))
+        return
+
+    for result in results:
+        print_report(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
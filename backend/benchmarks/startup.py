@@ -0,0 +1,58 @@
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import api; "
+    "print(time.perf_counter() - started)"
+)
+
+
+DATABASES = {
+    "WORKFLOW_TASK_STORE_PATH": "workflow_tasks.db",
+    "TOPIC_STATE_PATH": "topic_state.db",
+    "OPINION_INDEX_PATH": "opinion_index.db",
+    "SCHEDULER_PATH": "scheduler.db",
+    "LLM_CACHE_PATH": "llm_cache.db",
+}
+
+
+def measure_import(runs: int, provider_url: str, workdir: str):
+    env = dict(os.environ, ETH_PROVIDER_URL=provider_url)
+    env.update({name: os.path.join(workdir, filename) for name, filename in DATABASES.items()})
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the API module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--provider-url", default="http://127.0.0.1:1",
+                        help="RPC URL used during import; the default is unreachable on purpose")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        timings = measure_import(args.runs, args.provider_url, workdir)
+    print(f"import api: runs={len(timings)} "
+          f"min={min(timings) * 1000:.1f}ms "
+          f"median={statistics.median(timings) * 1000:.1f}ms "
+          f"max={max(timings) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
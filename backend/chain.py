@@ -0,0 +1,794 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import aiohttp
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from eth_utils import to_checksum_address, to_hex
+from transactions import NonceManager, TransactionTracker
+from opinion_index import OpinionIndex, OPINION_INDEX_POLL_INTERVAL
+from metrics import rpc_metrics_middleware, async_rpc_metrics_middleware
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+DEFAULT_PRIVATE_KEY = os.getenv('ETH_PRIVATE_KEY', '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80')
+
+ETH_PROVIDER_URL = os.getenv('ETH_PROVIDER_URL', 'http://localhost:8545')
+AI_ORACLE_ADDRESS = os.getenv('AI_ORACLE_ADDRESS', '0x5FbDB2315678afecb367f032d93F642f64180aa3')
+WORLD_RECORD_ADDRESS = os.getenv('WORLD_RECORD_ADDRESS', '')
+WORLD_RECORD_ADDRESS_CACHE = os.getenv('WORLD_RECORD_ADDRESS_CACHE', '')
+OPINION_READ_BATCH_SIZE = int(os.getenv('OPINION_READ_BATCH_SIZE', '200'))
+OPINION_BATCH_MAX_ITEMS = int(os.getenv('OPINION_BATCH_MAX_ITEMS', '100'))
+OPINION_BATCH_MAX_BYTES = int(os.getenv('OPINION_BATCH_MAX_BYTES', '32000'))
+OPINION_BATCH_MAX_GAS = int(os.getenv('OPINION_BATCH_MAX_GAS', '15000000'))
+GAS_ESTIMATE_MARGIN = float(os.getenv('GAS_ESTIMATE_MARGIN', '1.2'))
+
+ECONOMY_FIELDS = ("GDP", "tariff", "unemployment", "interestRate", "inflation")
+CULTURE_FIELDS = ("protectionism", "liberalism")
+
+ETH_RPC_TIMEOUT = float(os.getenv('ETH_RPC_TIMEOUT', '10'))
+ETH_RPC_RETRIES = int(os.getenv('ETH_RPC_RETRIES', '3'))
+ETH_RPC_RETRY_BACKOFF = float(os.getenv('ETH_RPC_RETRY_BACKOFF', '0.2'))
+ETH_RPC_POOL_SIZE = int(os.getenv('ETH_RPC_POOL_SIZE', '32'))
+
+AI_ORACLE_ABI = [
+    {
+        "type": "constructor",
+        "inputs": [],
+        "stateMutability": "nonpayable"
+    },
+    {
+        "type": "function",
+        "name": "owner",
+        "inputs": [],
+        "outputs": [
+            {
+                "name": "",
+                "type": "address",
+                "internalType": "address"
+            }
+        ],
+        "stateMutability": "view"
+    },
+    {
+        "type": "function",
+        "name": "submitAnalysis",
+        "inputs": [
+            {"name": "_topicId",      "type": "uint256", "internalType": "uint256"},
+            {"name": "_summary",      "type": "string",  "internalType": "string"},
+            {"name": "_GDP",          "type": "string",  "internalType": "string"},
+            {"name": "_tariff",       "type": "string",  "internalType": "string"},
+            {"name": "_unemployment", "type": "string",  "internalType": "string"},
+            {"name": "_interestRate", "type": "string",  "internalType": "string"},
+            {"name": "_inflation",    "type": "string",  "internalType": "string"},
+            {"name": "_protectionism","type": "string",  "internalType": "string"},
+            {"name": "_liberalism",   "type": "string",  "internalType": "string"}
+        ],
+        "outputs": [],
+        "stateMutability": "nonpayable"
+    },
+    {
+        "type": "function",
+        "name": "submitSummaries",
+        "inputs": [
+            {"name": "_topicIds",  "type": "uint256[]", "internalType": "uint256[]"},
+            {"name": "_summaries", "type": "string[]",  "internalType": "string[]"}
+        ],
+        "outputs": [],
+        "stateMutability": "nonpayable"
+    },
+    {
+        "type": "function",
+        "name": "worldRecord",
+        "inputs": [],
+        "outputs": [
+            {
+                "name": "",
+                "type": "address",
+                "internalType": "contract WorldRecord"
+            }
+        ],
+        "stateMutability": "view"
+    }
+]
+
+WORLD_RECORD_ABI = [
+    {"type": "function", "name": "addOpinion", "inputs": [{"name": "_content", "type": "string", "internalType": "string"}], "outputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "addOpinions", "inputs": [{"name": "_contents", "type": "string[]", "internalType": "string[]"}], "outputs": [{"name": "", "type": "bytes32[]", "internalType": "bytes32[]"}], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "aiOracle", "inputs": [], "outputs": [{"name": "", "type": "address", "internalType": "address"}], "stateMutability": "view"},
+    {"type": "function", "name": "allOpinionHashes", "inputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "outputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "stateMutability": "view"},
+    {"type": "function", "name": "civilians", "inputs": [{"name": "", "type": "address", "internalType": "address"}], "outputs": [
+        {"name": "account", "type": "address", "internalType": "address"},
+        {"name": "age", "type": "uint8", "internalType": "uint8"},
+        {"name": "job", "type": "string", "internalType": "string"},
+        {"name": "income", "type": "uint256", "internalType": "uint256"},
+        {"name": "education", "type": "string", "internalType": "string"},
+        {"name": "participance", "type": "uint256", "internalType": "uint256"}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "createTopic", "inputs": [
+        {"name": "_content", "type": "string", "internalType": "string"},
+        {"name": "_priority", "type": "string", "internalType": "string"},
+        {"name": "_urgency", "type": "string", "internalType": "string"},
+        {"name": "_relatedOpinions", "type": "bytes32[]", "internalType": "bytes32[]"}
+    ], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "culture", "inputs": [], "outputs": [
+        {"name": "timestamp", "type": "uint256", "internalType": "uint256"},
+        {"name": "protectionism", "type": "string", "internalType": "string"},
+        {"name": "liberalism", "type": "string", "internalType": "string"}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "economy", "inputs": [], "outputs": [
+        {"name": "timestamp", "type": "uint256", "internalType": "uint256"},
+        {"name": "GDP", "type": "string", "internalType": "string"},
+        {"name": "tariff", "type": "string", "internalType": "string"},
+        {"name": "unemployment", "type": "string", "internalType": "string"},
+        {"name": "interestRate", "type": "string", "internalType": "string"},
+        {"name": "inflation", "type": "string", "internalType": "string"}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "getAllOpinions", "inputs": [], "outputs": [
+        {"name": "", "type": "tuple[]", "internalType": "struct WorldRecord.Opinion[]", "components": [
+            {"name": "hash", "type": "bytes32", "internalType": "bytes32"},
+            {"name": "sender", "type": "address", "internalType": "address"},
+            {"name": "content", "type": "string", "internalType": "string"},
+            {"name": "timestamp", "type": "uint256", "internalType": "uint256"}
+        ]}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "getOpinions", "inputs": [{"name": "_hashes", "type": "bytes32[]", "internalType": "bytes32[]"}], "outputs": [
+        {"name": "", "type": "tuple[]", "internalType": "struct WorldRecord.Opinion[]", "components": [
+            {"name": "hash", "type": "bytes32", "internalType": "bytes32"},
+            {"name": "sender", "type": "address", "internalType": "address"},
+            {"name": "content", "type": "string", "internalType": "string"},
+            {"name": "timestamp", "type": "uint256", "internalType": "uint256"}
+        ]}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "getTopicOpinions", "inputs": [{"name": "_id", "type": "uint256", "internalType": "uint256"}], "outputs": [{"name": "", "type": "bytes32[]", "internalType": "bytes32[]"}], "stateMutability": "view"},
+    {"type": "function", "name": "getOpinionCount", "inputs": [], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "view"},
+    {"type": "function", "name": "nextTopicId", "inputs": [], "outputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "stateMutability": "view"},
+    {"type": "function", "name": "opinions", "inputs": [{"name": "", "type": "bytes32", "internalType": "bytes32"}], "outputs": [
+        {"name": "hash", "type": "bytes32", "internalType": "bytes32"},
+        {"name": "sender", "type": "address", "internalType": "address"},
+        {"name": "content", "type": "string", "internalType": "string"},
+        {"name": "timestamp", "type": "uint256", "internalType": "uint256"}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "registerCivilian", "inputs": [
+        {"name": "_age", "type": "uint8", "internalType": "uint8"},
+        {"name": "_job", "type": "string", "internalType": "string"},
+        {"name": "_income", "type": "uint256", "internalType": "uint256"},
+        {"name": "_education", "type": "string", "internalType": "string"},
+        {"name": "_participance", "type": "uint256", "internalType": "uint256"}
+    ], "outputs": [], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "topics", "inputs": [{"name": "", "type": "uint256", "internalType": "uint256"}], "outputs": [
+        {"name": "id", "type": "uint256", "internalType": "uint256"},
+        {"name": "content", "type": "string", "internalType": "string"},
+        {"name": "priority", "type": "string", "internalType": "string"},
+        {"name": "urgency", "type": "string", "internalType": "string"},
+        {"name": "summary", "type": "string", "internalType": "string"}
+    ], "stateMutability": "view"},
+    {"type": "function", "name": "updateCulture", "inputs": [
+        {"name": "_protectionism", "type": "string", "internalType": "string"},
+        {"name": "_liberalism", "type": "string", "internalType": "string"}
+    ], "outputs": [], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "updateEconomy", "inputs": [
+        {"name": "_GDP", "type": "string", "internalType": "string"},
+        {"name": "_tariff", "type": "string", "internalType": "string"},
+        {"name": "_unemployment", "type": "string", "internalType": "string"},
+        {"name": "_interestRate", "type": "string", "internalType": "string"},
+        {"name": "_inflation", "type": "string", "internalType": "string"}
+    ], "outputs": [], "stateMutability": "nonpayable"},
+    {"type": "function", "name": "updateTopicSummary", "inputs": [
+        {"name": "_id", "type": "uint256", "internalType": "uint256"},
+        {"name": "_summary", "type": "string", "internalType": "string"}
+    ], "outputs": [], "stateMutability": "nonpayable"},
+    {"type": "event", "name": "OpinionAdded", "inputs": [
+        {"name": "hash", "type": "bytes32", "indexed": False, "internalType": "bytes32"},
+        {"name": "sender", "type": "address", "indexed": False, "internalType": "address"}
+    ], "anonymous": False},
+    {"type": "event", "name": "TopicCreated", "inputs": [
+        {"name": "id", "type": "uint256", "indexed": False, "internalType": "uint256"},
+        {"name": "content", "type": "string", "indexed": False, "internalType": "string"}
+    ], "anonymous": False},
+    {"type": "event", "name": "TopicUpdated", "inputs": [
+        {"name": "id", "type": "uint256", "indexed": False, "internalType": "uint256"},
+        {"name": "summary", "type": "string", "indexed": False, "internalType": "string"}
+    ], "anonymous": False}
+]
+
+def create_web3(provider_url=ETH_PROVIDER_URL):
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=ETH_RPC_POOL_SIZE,
+        pool_maxsize=ETH_RPC_POOL_SIZE,
+        max_retries=Retry(
+            total=ETH_RPC_RETRIES,
+            backoff_factor=ETH_RPC_RETRY_BACKOFF,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=None
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    from web3 import Web3
+    from web3.middleware import geth_poa_middleware
+    w3 = Web3(Web3.HTTPProvider(provider_url, request_kwargs={'timeout': ETH_RPC_TIMEOUT}, session=session))
+    w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    w3.middleware_onion.inject(rpc_metrics_middleware, layer=0)
+    return w3
+
+async def create_async_web3(provider_url=ETH_PROVIDER_URL):
+    from web3 import AsyncWeb3, AsyncHTTPProvider
+    from web3.middleware import async_geth_poa_middleware
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=ETH_RPC_POOL_SIZE, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=ETH_RPC_TIMEOUT)
+    )
+    provider = AsyncHTTPProvider(provider_url)
+    await provider.cache_async_session(session)
+
+    w3 = AsyncWeb3(provider)
+    w3.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+    w3.middleware_onion.inject(async_rpc_metrics_middleware, layer=0)
+    return w3, session
+
+async def with_retries(call, *args, retries=ETH_RPC_RETRIES, backoff=ETH_RPC_RETRY_BACKOFF):
+    for attempt in range(retries + 1):
+        try:
+            return await call(*args)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"RPC call failed ({str(e)}), retrying in {backoff * 2 ** attempt:.2f}s")
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+class WorldRecordContract:
+    def __init__(self, web3_instance, contract_address, contract_abi, private_key=None, async_web3=None):
+        self.w3 = web3_instance
+        self.contract_address = to_checksum_address(contract_address)
+        self.contract_abi = contract_abi
+        self.contract = self.w3.eth.contract(address=self.contract_address, abi=contract_abi)
+        self.private_key = private_key
+        self.account = None
+        self.nonce_manager = None
+        self.async_w3 = None
+        self.async_contract = None
+
+        if async_web3 is not None:
+            self.attach_async(async_web3)
+        
+        if private_key:
+            from eth_account import Account
+            self.account = Account.from_key(private_key)
+            self.nonce_manager = NonceManager(self.w3, self.account.address)
+            logger.info(f"Initialized account: {self.account.address}")
+
+            try:
+                self.w3.eth.default_account = self.account.address
+                logger.info(f"Set default account to: {self.account.address}")
+
+                try:
+                    ai_oracle = self.contract.functions.aiOracle().call()
+                    logger.info(f"Contract AI Oracle address: {ai_oracle}")
+                    logger.info(f"Current account is AI Oracle: {ai_oracle.lower() == self.account.address.lower()}")
+                except Exception as e:
+                    logger.error(f"Error getting AI Oracle address: {str(e)}")
+                    
+            except Exception as e:
+                logger.warning(f"Could not set default account: {str(e)}")
+            
+    def attach_async(self, async_web3):
+        self.async_w3 = async_web3
+        self.async_contract = async_web3.eth.contract(address=self.contract_address, abi=self.contract_abi)
+
+    def get_account_address(self):
+        return self.account.address if self.account else None
+
+    async def _acall(self, contract_function, sync_fallback, *args):
+        if self.async_contract is None:
+            return await asyncio.to_thread(sync_fallback, *args)
+        return await with_retries(contract_function(*args).call)
+
+    async def aget_opinion_count(self):
+        return await self._acall(
+            lambda: self.async_contract.functions.getOpinionCount(), self.get_opinion_count
+        )
+
+    async def aget_topic_opinions(self, topic_id):
+        return await self._acall(
+            lambda i: self.async_contract.functions.getTopicOpinions(i), self.get_topic_opinions, topic_id
+        )
+
+    async def aread_opinions(self, opinion_ids, batch_size=OPINION_READ_BATCH_SIZE):
+        if self.async_contract is None:
+            return await asyncio.to_thread(self.read_opinions, opinion_ids, batch_size)
+
+        batches = [list(opinion_ids[i:i + batch_size]) for i in range(0, len(opinion_ids), batch_size)]
+        results = await asyncio.gather(*[
+            with_retries(self.async_contract.functions.getOpinions(batch).call) for batch in batches
+        ])
+        return [opinion for batch in results for opinion in batch]
+
+    async def aread_topic_opinions(self, topic_id):
+        return await self.aread_opinions(await self.aget_topic_opinions(topic_id))
+
+    async def astatus(self):
+        if self.async_w3 is None:
+            return await asyncio.to_thread(self.status)
+
+        async def block_number():
+            return await self.async_w3.eth.block_number
+
+        async def chain_id():
+            return await self.async_w3.eth.chain_id
+
+        connected, network, latest_block = await asyncio.gather(
+            self.async_w3.is_connected(),
+            with_retries(chain_id),
+            with_retries(block_number)
+        )
+        return {
+            "contract_address": self.contract_address,
+            "connected": connected,
+            "network": network,
+            "latest_block": latest_block
+        }
+
+    def status(self):
+        return {
+            "contract_address": self.contract_address,
+            "connected": self.w3.is_connected(),
+            "network": self.w3.eth.chain_id,
+            "latest_block": self.w3.eth.block_number
+        }
+        
+    def read_opinion(self, opinion_id):
+        try:
+            opinion = self.contract.functions.opinions(opinion_id).call()
+            return opinion[2]
+        except Exception as e:
+            logger.error(f"Error reading opinion {opinion_id}: {str(e)}")
+            raise
+        
+    def get_topic_opinions(self, topic_id):
+        try:
+            return self.contract.functions.getTopicOpinions(topic_id).call()
+        except Exception as e:
+            logger.error(f"Error reading opinions of topic {topic_id}: {str(e)}")
+            raise
+
+    def read_opinions(self, opinion_ids, batch_size=OPINION_READ_BATCH_SIZE):
+        opinions = []
+        for start in range(0, len(opinion_ids), batch_size):
+            batch = list(opinion_ids[start:start + batch_size])
+            try:
+                opinions.extend(self.contract.functions.getOpinions(batch).call())
+            except Exception as e:
+                logger.error(f"Error reading opinions {start}-{start + len(batch)}: {str(e)}")
+                raise
+        return opinions
+
+    def read_topic_opinions(self, topic_id):
+        return self.read_opinions(self.get_topic_opinions(topic_id))
+
+    def get_next_topic_id(self):
+        try:
+            return self.contract.functions.nextTopicId().call()
+        except Exception as e:
+            logger.error(f"Error getting next topic id: {str(e)}")
+            raise
+
+    def read_topic(self, topic_id):
+        try:
+            topic = self.contract.functions.topics(topic_id).call()
+            return {
+                "id": topic[0],
+                "content": topic[1],
+                "priority": topic[2],
+                "urgency": topic[3],
+                "summary": topic[4]
+            }
+        except Exception as e:
+            logger.error(f"Error reading topic {topic_id}: {str(e)}")
+            raise
+
+    def read_world_state(self):
+        try:
+            economy = self.contract.functions.economy().call()
+            culture = self.contract.functions.culture().call()
+            return {
+                "economy": dict(zip(ECONOMY_FIELDS, economy[1:])),
+                "culture": dict(zip(CULTURE_FIELDS, culture[1:]))
+            }
+        except Exception as e:
+            logger.error(f"Error reading world state: {str(e)}")
+            raise
+
+    def get_opinion_count(self):
+        try:
+            return self.contract.functions.getOpinionCount().call()
+        except Exception as e:
+            logger.error(f"Error getting opinion count: {str(e)}")
+            raise
+            
+    def getAllOpinions(self):
+        try:
+            opinions = self.contract.functions.getAllOpinions().call()
+            return opinions
+        except Exception as e:
+            logger.error(f"Error reading opinions: {str(e)}")
+            raise
+    
+    def estimate_gas(self, contract_function):
+        estimate = contract_function.estimate_gas({'from': self.account.address})
+        return int(estimate * GAS_ESTIMATE_MARGIN)
+
+    def send_transaction(self, contract_function, gas=None):
+        if not self.account:
+            raise ValueError("No account configured for transaction. Set private key first.")
+
+        if gas is None:
+            gas = self.estimate_gas(contract_function)
+
+        with self.nonce_manager.lock:
+            nonce = self.nonce_manager.allocate()
+            try:
+                tx = contract_function.build_transaction({
+                    'from': self.account.address,
+                    'nonce': nonce,
+                    'gas': gas,
+                    'gasPrice': self.w3.eth.gas_price
+                })
+
+                signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
+
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            except Exception:
+                self.nonce_manager.resync()
+                raise
+
+        logger.info(f"Transaction sent: {tx_hash.hex()} (nonce {nonce})")
+        return tx_hash.hex(), nonce
+
+    def opinion_hashes_from_receipt(self, receipt):
+        events = self.contract.events.OpinionAdded().process_receipt(receipt)
+        return [to_hex(event['args']['hash']) for event in events]
+
+    def _pack_opinions(self, contents):
+        batches = []
+        current, size = [], 0
+        for i, content in enumerate(contents):
+            content_size = len(content.encode('utf-8'))
+            if current and (len(current) >= OPINION_BATCH_MAX_ITEMS or size + content_size > OPINION_BATCH_MAX_BYTES):
+                batches.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += content_size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _fit_gas(self, contents, items):
+        function = self.contract.functions.addOpinions([contents[i] for i in items])
+        try:
+            gas = self.estimate_gas(function)
+        except Exception as e:
+            if len(items) == 1:
+                raise
+            logger.info(f"Gas estimation failed for {len(items)} opinions ({str(e)}), splitting batch")
+            gas = None
+        if gas is not None and (gas <= OPINION_BATCH_MAX_GAS or len(items) == 1):
+            return [(items, function, gas)]
+        middle = len(items) // 2
+        return self._fit_gas(contents, items[:middle]) + self._fit_gas(contents, items[middle:])
+
+    def add_opinions(self, contents):
+        try:
+            plans = [plan for batch in self._pack_opinions(contents) for plan in self._fit_gas(contents, batch)]
+        except Exception as e:
+            logger.error(f"Error preparing opinion batch: {str(e)}")
+            raise
+
+        transactions = []
+        failure = None
+        for items, function, gas in plans:
+            if failure is None:
+                try:
+                    tx_hash, nonce = self.send_transaction(function, gas=gas)
+                except Exception as e:
+                    failure = e
+                    logger.error(f"Error adding opinion batch, {len(transactions)} of {len(plans)} sent: {str(e)}")
+                else:
+                    transactions.append({
+                        'transaction_hash': tx_hash,
+                        'nonce': nonce,
+                        'gas': gas,
+                        'items': items,
+                        'status': 'pending'
+                    })
+                    continue
+            transactions.append({
+                'transaction_hash': None,
+                'nonce': None,
+                'gas': gas,
+                'items': items,
+                'status': 'not_sent',
+                'error': str(failure)
+            })
+        if transactions[0]['transaction_hash'] is None:
+            raise failure
+        return transactions
+
+    def wait_for_receipt(self, tx_hash):
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        logger.info(f"Transaction confirmed in block {receipt['blockNumber']}. Status: {receipt['status']}")
+
+        if receipt['status'] == 1:
+            return {
+                'success': True,
+                'transaction_hash': tx_hash,
+                'block_number': receipt['blockNumber']
+            }
+        else:
+            return {
+                'success': False,
+                'transaction_hash': tx_hash,
+                'error': 'Transaction failed'
+            }
+
+    def add_opinion(self, content, wait=False):
+        try:
+            tx_hash, nonce = self.send_transaction(self.contract.functions.addOpinion(content))
+            if wait:
+                return self.wait_for_receipt(tx_hash)
+
+            return {
+                'success': True,
+                'transaction_hash': tx_hash,
+                'nonce': nonce,
+                'status': 'pending'
+            }
+                
+        except Exception as e:
+            logger.error(f"Error adding opinion: {str(e)}")
+            raise
+
+
+class AIOracleContract:
+    def __init__(self, world_record, contract_address, contract_abi=AI_ORACLE_ABI):
+        self.world_record = world_record
+        self.contract_address = to_checksum_address(contract_address)
+        self.contract = world_record.w3.eth.contract(address=self.contract_address, abi=contract_abi)
+
+    def submit_analysis(self, topic_id, summary, economy, culture):
+        try:
+            function = self.contract.functions.submitAnalysis(
+                topic_id,
+                summary,
+                *[economy[field] for field in ECONOMY_FIELDS],
+                *[culture[field] for field in CULTURE_FIELDS]
+            )
+            return self.world_record.send_transaction(function)
+        except Exception as e:
+            logger.error(f"Error submitting analysis for topic {topic_id}: {str(e)}")
+            raise
+
+    def submit_summaries(self, summaries):
+        try:
+            function = self.contract.functions.submitSummaries(list(summaries), list(summaries.values()))
+            return self.world_record.send_transaction(function)
+        except Exception as e:
+            logger.error(f"Error submitting summaries for topics {list(summaries)}: {str(e)}")
+            raise
+
+
+class ChainClient:
+    def __init__(self, provider_url=ETH_PROVIDER_URL, ai_oracle_address=AI_ORACLE_ADDRESS,
+                 private_key=DEFAULT_PRIVATE_KEY, world_record_address=WORLD_RECORD_ADDRESS,
+                 address_cache_path=WORLD_RECORD_ADDRESS_CACHE):
+        self.provider_url = provider_url
+        self.ai_oracle_address = to_checksum_address(ai_oracle_address)
+        self.private_key = private_key
+        self.world_record_address = world_record_address or None
+        self.address_cache_path = address_cache_path
+        self.async_w3 = None
+        self.last_error = None
+        self._session = None
+        self._tasks = []
+        self._world_record = None
+        self._ai_oracle = None
+        self._opinion_index = None
+        self._w3 = None
+        self._tx_tracker = None
+        self._lock = threading.Lock()
+        self._w3_lock = threading.Lock()
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            with self._w3_lock:
+                if self._w3 is None:
+                    self._w3 = create_web3(self.provider_url)
+        return self._w3
+
+    @property
+    def tx_tracker(self) -> TransactionTracker:
+        if self._tx_tracker is None:
+            w3 = self.w3
+            with self._w3_lock:
+                if self._tx_tracker is None:
+                    self._tx_tracker = TransactionTracker(w3)
+        return self._tx_tracker
+
+    def _load_cached_address(self):
+        if not self.address_cache_path or not os.path.exists(self.address_cache_path):
+            return None
+        try:
+            with open(self.address_cache_path) as f:
+                cached = json.load(f)
+            if cached.get("ai_oracle") == self.ai_oracle_address:
+                return cached.get("world_record")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable address cache {self.address_cache_path}: {str(e)}")
+        return None
+
+    def _store_cached_address(self, address):
+        if not self.address_cache_path:
+            return
+        try:
+            with open(self.address_cache_path, "w") as f:
+                json.dump({"ai_oracle": self.ai_oracle_address, "world_record": address}, f)
+        except Exception as e:
+            logger.warning(f"Could not persist WorldRecord address: {str(e)}")
+
+    def resolve_world_record_address(self):
+        if self.world_record_address:
+            return self.world_record_address
+
+        address = self._load_cached_address()
+        if address and self.w3.eth.get_code(to_checksum_address(address)):
+            logger.info(f"WorldRecord address (cached): {address}")
+        else:
+            ai_oracle = self.w3.eth.contract(address=self.ai_oracle_address, abi=AI_ORACLE_ABI)
+            address = ai_oracle.functions.worldRecord().call()
+            logger.info(f"WorldRecord address (fetched): {address}")
+            self._store_cached_address(address)
+
+        self.world_record_address = address
+        return address
+
+    @property
+    def world_record(self) -> "WorldRecordContract":
+        if self._world_record is None:
+            with self._lock:
+                if self._world_record is None:
+                    try:
+                        world_record = WorldRecordContract(
+                            web3_instance=self.w3,
+                            contract_address=self.resolve_world_record_address(),
+                            contract_abi=WORLD_RECORD_ABI,
+                            private_key=self.private_key,
+                            async_web3=self.async_w3
+                        )
+                    except Exception as e:
+                        self.last_error = str(e)
+                        raise
+                    if world_record.nonce_manager:
+                        self.tx_tracker.nonce_managers.append(world_record.nonce_manager)
+                    self._world_record = world_record
+                    self.last_error = None
+        return self._world_record
+
+    @property
+    def ai_oracle(self) -> AIOracleContract:
+        if self._ai_oracle is None:
+            world_record = self.world_record
+            with self._lock:
+                if self._ai_oracle is None:
+                    self._ai_oracle = AIOracleContract(world_record, self.ai_oracle_address)
+        return self._ai_oracle
+
+    @property
+    def opinion_index(self) -> OpinionIndex:
+        if self._opinion_index is None:
+            world_record = self.world_record
+            with self._lock:
+                if self._opinion_index is None:
+                    self._opinion_index = OpinionIndex(self.w3, world_record)
+        return self._opinion_index
+
+    async def get_world_record(self) -> "WorldRecordContract":
+        if self._world_record is not None:
+            return self._world_record
+        return await asyncio.to_thread(lambda: self.world_record)
+
+    async def get_ai_oracle(self) -> AIOracleContract:
+        if self._ai_oracle is not None:
+            return self._ai_oracle
+        return await asyncio.to_thread(lambda: self.ai_oracle)
+
+    async def get_opinion_index(self) -> OpinionIndex:
+        if self._opinion_index is not None:
+            return self._opinion_index
+        return await asyncio.to_thread(lambda: self.opinion_index)
+
+    @property
+    def syncing(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def link_receipt_to_topic(self, topic_id):
+        def on_receipt(receipt):
+            hashes = self.world_record.opinion_hashes_from_receipt(receipt)
+            linked = self.opinion_index.link_opinions(topic_id, hashes, receipt["blockNumber"])
+            return {"opinion_hashes": hashes, "linked_opinions": linked}
+        return on_receipt
+
+    async def _sync_opinion_index(self, interval=OPINION_INDEX_POLL_INTERVAL):
+        while True:
+            try:
+                index = await self.get_opinion_index()
+                await asyncio.to_thread(index.sync)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error syncing opinion index: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def start(self):
+        self.async_w3, self._session = await create_async_web3(self.provider_url)
+        if self._world_record is not None:
+            self._world_record.attach_async(self.async_w3)
+        self._tasks = [
+            asyncio.create_task(self._sync_opinion_index()),
+            asyncio.create_task(self.tx_tracker.run())
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def health(self):
+        started = time.perf_counter()
+        try:
+            if self.async_w3 is not None:
+                latest_block = await self.async_w3.eth.block_number
+            else:
+                latest_block = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+            rpc_ok = True
+        except Exception as e:
+            latest_block = None
+            rpc_ok = False
+            self.last_error = str(e)
+
+        index_block = None
+        if self._opinion_index is not None:
+            index_block = await asyncio.to_thread(self._opinion_index.last_block)
+
+        ready = rpc_ok and self._world_record is not None
+        if ready:
+            status = "ok"
+        elif rpc_ok and self.last_error is None:
+            status = "starting"
+        else:
+            status = "degraded"
+        return {
+            "status": status,
+            "rpc": {
+                "connected": rpc_ok,
+                "latest_block": latest_block,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+            },
+            "world_record_address": self.world_record_address,
+            "opinion_index_block": index_block,
+            "error": None if ready else self.last_error
+        }
+
+
+chain_client = ChainClient()
@@ -0,0 +1,116 @@
+import os
+import zlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DEDUP_SHINGLE_SIZE = int(os.getenv('DEDUP_SHINGLE_SIZE', '2'))
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', '64'))
+DEDUP_BANDS = int(os.getenv('DEDUP_BANDS', '16'))
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.7'))
+DEDUP_CACHE_SIZE = int(os.getenv('DEDUP_CACHE_SIZE', '50000'))
+DEDUP_BATCH_SIZE = 1000
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return "".join(ch for ch in text if not unicodedata.category(ch)[0] in ("P", "Z", "C", "S"))
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> List[str]:
+    if len(text) <= size:
+        return [text]
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS,
+                 cache_size: int = DEDUP_CACHE_SIZE, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compute(self, texts: List[str]) -> np.ndarray:
+        hashes, offsets = [], []
+        for text in texts:
+            offsets.append(len(hashes))
+            hashes.extend(zlib.crc32(s.encode("utf-8")) for s in shingles(text))
+        values = np.asarray(hashes, dtype=np.uint64) % MERSENNE_PRIME
+        permuted = (self._a * values + self._b) % MERSENNE_PRIME
+        return np.minimum.reduceat(permuted, offsets, axis=1).T.astype(np.uint32)
+
+    def signatures(self, texts: List[str]) -> List[np.ndarray]:
+        with self._lock:
+            cached = {text: self._cache[text] for text in texts if text in self._cache}
+            for text in cached:
+                self._cache.move_to_end(text)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+        for start in range(0, len(missing), DEDUP_BATCH_SIZE):
+            batch = missing[start:start + DEDUP_BATCH_SIZE]
+            for text, signature in zip(batch, self._compute(batch)):
+                cached[text] = signature
+
+        with self._lock:
+            for text in missing:
+                self._cache[text] = cached[text]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return [cached[text] for text in texts]
+
+    def band_keys(self, signature: np.ndarray):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+
+def collapse(texts: List[str], threshold: float = DEDUP_THRESHOLD,
+             hasher: Optional["MinHasher"] = None) -> List[Dict]:
+    hasher = hasher or minhasher
+    normalized = [normalize(text) for text in texts]
+    signatures = hasher.signatures(normalized)
+
+    groups: List[Dict] = []
+    exact: Dict[str, int] = {}
+    buckets: Dict[tuple, List[int]] = {}
+    group_signatures: List[np.ndarray] = []
+
+    for text, key, signature in zip(texts, normalized, signatures):
+        match = exact.get(key)
+        if match is None:
+            band_keys = hasher.band_keys(signature)
+            candidates = dict.fromkeys(g for band_key in band_keys for g in buckets.get(band_key, ()))
+            for candidate in candidates:
+                if np.mean(group_signatures[candidate] == signature) >= threshold:
+                    match = candidate
+                    break
+            if match is None:
+                match = len(groups)
+                groups.append({"text": text, "count": 0})
+                group_signatures.append(signature)
+                for band_key in band_keys:
+                    buckets.setdefault(band_key, []).append(match)
+            exact[key] = match
+        groups[match]["count"] += 1
+    return groups
+
+
+def format_groups(groups: List[Dict]) -> List[str]:
+    return [
+        group["text"] if group["count"] == 1 else f"{group['text']}（相同或相近观点共 {group['count']} 条）"
+        for group in groups
+    ]
+
+
+minhasher = MinHasher()
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+EVENT_BUS_MAX_EVENTS = int(os.getenv('EVENT_BUS_MAX_EVENTS', '200'))
+EVENT_BUS_MAX_TASKS = int(os.getenv('EVENT_BUS_MAX_TASKS', '1000'))
+EVENT_BUS_HEARTBEAT = float(os.getenv('EVENT_BUS_HEARTBEAT', '15'))
+
+
+def event_id_at(timestamp: float) -> int:
+    return int(timestamp * 1000)
+
+
+class TaskEventBus:
+    def __init__(self, max_events: int = EVENT_BUS_MAX_EVENTS, max_tasks: int = EVENT_BUS_MAX_TASKS):
+        self.max_events = max_events
+        self.max_tasks = max_tasks
+        self._logs: "OrderedDict[str, Deque[Tuple[int, Dict]]]" = OrderedDict()
+        self._last_id: Dict[str, int] = {}
+        self._closed: Set[str] = set()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def has(self, task_id: str) -> bool:
+        return task_id in self._logs
+
+    def publish(self, task_id: str, event: Dict, final: bool = False):
+        if task_id not in self._logs:
+            self._logs[task_id] = deque(maxlen=self.max_events)
+            self._last_id[task_id] = 0
+            while len(self._logs) > self.max_tasks:
+                evicted, _ = self._logs.popitem(last=False)
+                self._last_id.pop(evicted, None)
+                self._closed.discard(evicted)
+        self._logs.move_to_end(task_id)
+
+        event_id = max(self._last_id[task_id] + 1, event_id_at(time.time()))
+        self._last_id[task_id] = event_id
+        self._logs[task_id].append((event_id, event))
+        if final:
+            self._closed.add(task_id)
+
+        for queue in self._subscribers.get(task_id, ()):
+            queue.put_nowait((event_id, event))
+
+    async def stream(self, task_id: str, last_event_id: int = 0,
+                     heartbeat: float = EVENT_BUS_HEARTBEAT) -> AsyncIterator[Optional[Tuple[int, Dict]]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        try:
+            for event_id, event in list(self._logs.get(task_id, ())):
+                if event_id > last_event_id:
+                    yield event_id, event
+                    last_event_id = event_id
+            if task_id in self._closed:
+                return
+
+            while True:
+                try:
+                    event_id, event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event_id <= last_event_id:
+                    continue
+                yield event_id, event
+                last_event_id = event_id
+                if task_id in self._closed and event_id == self._last_id.get(task_id):
+                    return
+        finally:
+            subscribers = self._subscribers.get(task_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[task_id]
+
+
+def format_sse(event_id: Optional[int], event: Optional[Dict], name: str = "status") -> str:
+    if event is None:
+        return f": keep-alive {int(time.time())}\n\n"
+    data = json.dumps(event, ensure_ascii=False)
+    return f"id: {event_id}\nevent: {name}\ndata: {data}\n\n"
+
+
+task_events = TaskEventBus()
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import hashlib
+import random
+from typing import AsyncIterator, List
+
+FAKE_LLM_LATENCY = float(os.getenv('FAKE_LLM_LATENCY', '0.3'))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '50'))
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv('FAKE_LLM_OUTPUT_TOKENS', '200'))
+
+VOCABULARY = [
+    "人类", "观点", "共识", "冲突", "需求", "焦虑", "规则", "信任", "技术", "市场",
+    "自由", "责任", "效率", "公平", "未来", "现实", "，", "。", "但是", "其实"
+]
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeLLM:
+    def __init__(self, latency: float = FAKE_LLM_LATENCY,
+                 tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND,
+                 output_tokens: int = FAKE_LLM_OUTPUT_TOKENS):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.calls = 0
+
+    def _tokens(self, prompt: str) -> List[str]:
+        seed = int.from_bytes(hashlib.sha256(prompt.encode()).digest()[:8], "big")
+        rng = random.Random(seed)
+        return [rng.choice(VOCABULARY) for _ in range(self.output_tokens)]
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for token in self._tokens(prompt):
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def ainvoke(self, prompt: str) -> FakeMessage:
+        self.calls += 1
+        tokens = self._tokens(prompt)
+        duration = self.latency
+        if self.tokens_per_second > 0:
+            duration += len(tokens) / self.tokens_per_second
+        await asyncio.sleep(duration)
+        return FakeMessage("".join(tokens))
@@ -1,11 +1,104 @@
-from langchain_community.chat_models import ChatOpenAI
 import os
+import json
+from contextvars import ContextVar
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-llm = ChatOpenAI(
-    model_name="gpt-4o",
-    temperature=0.7,
-    openai_api_key=os.getenv("OPENAI_API_KEY")
-)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+LLM_TASK_COST_BUDGET = float(os.getenv("LLM_TASK_COST_BUDGET", "0"))
+
+LLM_ROUTES = {
+    "map": LLM_FAST_MODEL,
+    "reduce": LLM_FAST_MODEL,
+    "integration": LLM_FAST_MODEL,
+    "sentiment": LLM_FAST_MODEL,
+    "merge": LLM_FAST_MODEL,
+    "summary": LLM_MODEL,
+    "recommendation": LLM_MODEL,
+}
+LLM_ROUTES.update({
+    route: os.environ[f"LLM_MODEL_{route.upper()}"]
+    for route in LLM_ROUTES if os.getenv(f"LLM_MODEL_{route.upper()}")
+})
+
+LLM_ROUTE_TIMEOUTS = {
+    route: float(os.environ[f"LLM_TIMEOUT_{route.upper()}"])
+    for route in LLM_ROUTES if os.getenv(f"LLM_TIMEOUT_{route.upper()}")
+}
+
+# USD per million tokens (input, output)
+LLM_PRICES = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "fake": (0.0, 0.0),
+}
+LLM_PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+llm_usage: ContextVar[Optional[Dict]] = ContextVar("llm_usage", default=None)
+
+_llms = {}
+
+def get_llm(model: Optional[str] = None):
+    model = model or LLM_MODEL
+    if model not in _llms:
+        if LLM_PROVIDER == "fake" or model == "fake":
+            from fake_llm import FakeLLM
+
+            _llms[model] = FakeLLM()
+        elif LLM_PROVIDER == "openai":
+            from langchain_community.chat_models import ChatOpenAI
+
+            _llms[model] = ChatOpenAI(
+                model_name=model,
+                temperature=LLM_TEMPERATURE,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0
+            )
+        else:
+            raise ValueError(f"Unknown LLM provider: {LLM_PROVIDER}")
+    return _llms[model]
+
+def set_llm(llm, model: Optional[str] = None):
+    _llms[model or LLM_MODEL] = llm
+
+def cost_of(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = LLM_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+def route_model(route: str) -> str:
+    model = LLM_ROUTES.get(route, LLM_MODEL)
+    usage = llm_usage.get()
+    if usage is not None and LLM_TASK_COST_BUDGET > 0 and usage["cost"] >= LLM_TASK_COST_BUDGET:
+        return LLM_FAST_MODEL
+    return model
+
+def new_usage() -> Dict:
+    return {"cost": 0.0, "models": {}}
+
+def record_usage(route: str, model: str, prompt_tokens: int, completion_tokens: int,
+                 latency: float, cached: bool = False):
+    usage = llm_usage.get()
+    if usage is None:
+        return
+    cost = 0.0 if cached else cost_of(model, prompt_tokens, completion_tokens)
+    entry = usage["models"].setdefault(model, {
+        "calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        "cost": 0.0, "latency": 0.0, "routes": []
+    })
+    entry["cached_calls" if cached else "calls"] += 1
+    if not cached:
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["latency"] = round(entry["latency"] + latency, 4)
+    entry["cost"] = round(entry["cost"] + cost, 6)
+    if route not in entry["routes"]:
+        entry["routes"].append(route)
+    usage["cost"] = round(usage["cost"] + cost, 6)
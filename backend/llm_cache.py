@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'llm_cache.db'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '5000'))
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+def make_key(template: str, model: str, temperature: float, variables: Dict[str, Any]) -> str:
+    inputs = hashlib.sha256(
+        json.dumps(variables, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    material = json.dumps([template, model, temperature, inputs], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            self._evict()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} cached LLM responses")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+
+llm_cache = LLMCache() if LLM_CACHE_ENABLED else None
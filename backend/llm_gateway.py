@@ -0,0 +1,246 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+from llm import get_llm
+from metrics import LLM_CONCURRENCY_LIMIT, LLM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+LLM_RPM = float(os.getenv('LLM_RPM', '500'))
+LLM_TPM = float(os.getenv('LLM_TPM', '30000'))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv('LLM_EXPECTED_COMPLETION_TOKENS', '800'))
+LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_INITIAL_CONCURRENCY = int(os.getenv('LLM_INITIAL_CONCURRENCY', '4'))
+LLM_TARGET_LATENCY = float(os.getenv('LLM_TARGET_LATENCY', '30'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))
+LLM_RETRY_BASE = float(os.getenv('LLM_RETRY_BASE', '1'))
+LLM_RETRY_MAX = float(os.getenv('LLM_RETRY_MAX', '60'))
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APITimeoutError", "APIConnectionError", "TimeoutError", "ServerDisconnectedError"}
+
+llm_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.available >= amount else (amount - self.available) / self.rate
+
+    def consume(self, amount: float):
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    return _status_code(error) in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS \
+        or isinstance(error, asyncio.TimeoutError)
+
+
+class LLMGateway:
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                 min_concurrency: int = LLM_MIN_CONCURRENCY, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 initial_concurrency: int = LLM_INITIAL_CONCURRENCY, target_latency: float = LLM_TARGET_LATENCY,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.throttled = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._last_decrease = 0.0
+        self._cooldown_until = 0.0
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    def _dispatch(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: str, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(priority, 0), next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+        try:
+            if self._rate_lock is None:
+                self._rate_lock = asyncio.Lock()
+            async with self._rate_lock:
+                delay = max(self.requests.delay(1), self.tokens.delay(tokens),
+                            self._cooldown_until - time.monotonic())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                self.tokens.consume(tokens)
+        except BaseException:
+            self._release()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _on_success(self, latency: float):
+        if latency > self.target_latency:
+            self._decrease(0.9)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            LLM_CONCURRENCY_LIMIT.set(self.limit)
+            self._dispatch()
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < 1:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(LLM_RETRY_MAX, LLM_RETRY_BASE * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, LLM_RETRY_BASE))
+        return delay
+
+    async def _handle_failure(self, attempt: int, error: Exception):
+        status = _status_code(error)
+        if status == 429:
+            self.throttled += 1
+            self._decrease(0.5)
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+        delay = self._backoff(attempt, error)
+        LLM_RETRIES.labels(str(status or type(error).__name__)).inc()
+        logger.warning(f"LLM call failed ({status or type(error).__name__}), retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def ainvoke(self, prompt: str, tokens: int = 0, llm=None):
+        expected = tokens + LLM_EXPECTED_COMPLETION_TOKENS
+        for attempt in itertools.count():
+            await self._acquire(llm_priority.get(), expected)
+            started = time.monotonic()
+            error = None
+            try:
+                result = await (llm or get_llm()).ainvoke(prompt)
+            except Exception as e:
+                error = e
+            finally:
+                self._release()
+            if error is not None:
+                await self._handle_failure(attempt, error)
+                continue
+            self._on_success(time.monotonic() - started)
+            return result
+
+    async def astream(self, prompt: str, tokens: int = 0, llm=None) -> AsyncIterator:
+        expected = tokens + LLM_EXPECTED_COMPLETION_TOKENS
+        for attempt in itertools.count():
+            await self._acquire(llm_priority.get(), expected)
+            started = time.monotonic()
+            received = False
+            try:
+                async for chunk in (llm or get_llm()).astream(prompt):
+                    received = True
+                    yield chunk
+            except Exception as e:
+                self._release()
+                if received:
+                    raise
+                await self._handle_failure(attempt, e)
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release()
+            self._on_success(time.monotonic() - started)
+            return
+
+    def settle(self, estimated: int, actual: int):
+        if actual < estimated:
+            self.tokens.refund(estimated - actual)
+        elif actual > estimated:
+            self.tokens.consume(actual - estimated)
+
+    def stats(self):
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "throttled": self.throttled,
+            "request_budget": round(self.requests.available, 1),
+            "token_budget": round(self.tokens.available, 1)
+        }
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,236 @@
+import os
+import re
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+import numpy as np
+from dedup import normalize
+
+LOCAL_ANALYSIS_MAX_FEATURES = int(os.getenv('LOCAL_ANALYSIS_MAX_FEATURES', '1000'))
+LOCAL_ANALYSIS_CLUSTERS = int(os.getenv('LOCAL_ANALYSIS_CLUSTERS', '5'))
+LOCAL_ANALYSIS_ITERATIONS = int(os.getenv('LOCAL_ANALYSIS_ITERATIONS', '20'))
+LOCAL_ANALYSIS_CACHE_SIZE = int(os.getenv('LOCAL_ANALYSIS_CACHE_SIZE', '100000'))
+LOCAL_ANALYSIS_MAX_DF = 0.5
+NGRAM_RANGE = (2, 4)
+TERMS_PER_TOPIC = 3
+
+POSITIVE_WORDS = [
+    "好", "支持", "赞同", "同意", "希望", "期待", "喜欢", "满意", "进步", "改善", "提高", "机会", "创新",
+    "透明", "公平", "信任", "安全", "稳定", "繁荣", "便利", "高效", "有效", "成功", "乐观", "美好", "值得",
+    "受益", "发展", "自由", "合理", "积极", "感谢", "开心", "优秀", "靠谱"
+]
+NEGATIVE_WORDS = [
+    "差", "坏", "反对", "担心", "担忧", "害怕", "焦虑", "失望", "不满", "愤怒", "危险", "风险", "问题",
+    "取代", "失业", "泡沫", "骗", "割韭菜", "垄断", "不公平", "压力", "困难", "买不起", "太高", "太贵",
+    "混乱", "腐败", "浪费", "糟糕", "悲观", "痛苦", "崩溃", "恶化", "封闭", "侵权", "波动"
+]
+NEGATIONS = "不没别非无未"
+
+_lexicon = {word: 1 for word in POSITIVE_WORDS}
+_lexicon.update({word: -1 for word in NEGATIVE_WORDS})
+_lexicon_pattern = re.compile("|".join(sorted(map(re.escape, _lexicon), key=len, reverse=True)))
+
+
+def sentiment_score(text: str) -> int:
+    score = 0
+    for match in _lexicon_pattern.finditer(text):
+        polarity = _lexicon[match.group()]
+        start = match.start()
+        if start > 0 and text[start - 1] in NEGATIONS and not match.group()[0] in NEGATIONS:
+            polarity = -polarity
+        score += polarity
+    return score
+
+
+def ngrams(text: str) -> List[str]:
+    low, high = NGRAM_RANGE
+    return [text[i:i + n] for n in range(low, high + 1) for i in range(len(text) - n + 1)]
+
+
+class OpinionFeatureCache:
+    def __init__(self, max_size: int = LOCAL_ANALYSIS_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, np.ndarray, int]]" = OrderedDict()
+        self._terms: Dict[str, int] = {}
+        self._vocabulary: List[str] = []
+        self._lock = threading.Lock()
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = self._terms[term] = len(self._vocabulary)
+            self._vocabulary.append(term)
+        return term_id
+
+    def _compute(self, text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        normalized = normalize(text)
+        counts = Counter(ngrams(normalized))
+        ids = np.fromiter((self._term_id(term) for term in counts), dtype=np.int64, count=len(counts))
+        return ids, np.fromiter(counts.values(), dtype=np.float32, count=len(counts)), sentiment_score(normalized)
+
+    def features(self, texts: List[str]) -> Tuple[List[Tuple[np.ndarray, np.ndarray, int]], List[str]]:
+        keys = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._lock:
+            if len(self._terms) > 50 * self.max_size:
+                self._entries.clear()
+                self._terms.clear()
+                self._vocabulary.clear()
+            features = {}
+            for key, text in zip(keys, texts):
+                if key in features:
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    entry = self._entries[key] = self._compute(text)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                features[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            used = np.unique(np.concatenate([ids for ids, _, _ in features.values()] or [np.empty(0, np.int64)]))
+            vocabulary = [self._vocabulary[i] for i in used]
+        return [
+            (np.searchsorted(used, ids), counts, score)
+            for ids, counts, score in (features[key] for key in keys)
+        ], vocabulary
+
+
+def tfidf(features: List[Tuple[np.ndarray, np.ndarray, int]], terms: List[str],
+          max_features: int = LOCAL_ANALYSIS_MAX_FEATURES) -> Tuple[np.ndarray, List[str]]:
+    documents = len(features)
+    ids = np.concatenate([term_ids for term_ids, _, _ in features])
+    counts = np.concatenate([term_counts for _, term_counts, _ in features])
+    rows = np.repeat(np.arange(documents), [len(term_ids) for term_ids, _, _ in features])
+
+    df = np.bincount(ids, minlength=len(terms))
+    limit = max(1, int(LOCAL_ANALYSIS_MAX_DF * documents)) if documents > 10 else documents
+    candidates = np.flatnonzero((df > 0) & (df <= limit))
+    selected = candidates[np.argsort(-df[candidates], kind="stable")][:max_features]
+
+    columns = np.full(len(terms), -1, dtype=np.int64)
+    columns[selected] = np.arange(len(selected))
+    cols = columns[ids]
+    keep = cols >= 0
+
+    matrix = np.zeros((documents, len(selected)), dtype=np.float32)
+    np.add.at(matrix, (rows[keep], cols[keep]), np.log1p(counts[keep]))
+    matrix *= np.log((1 + documents) / (1 + df[selected].astype(np.float32))) + 1
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix, [terms[i] for i in selected]
+
+
+def kmeans(matrix: np.ndarray, k: int, iterations: int = LOCAL_ANALYSIS_ITERATIONS,
+           seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    centroids = [matrix[rng.integers(len(matrix))]]
+    distance = np.full(len(matrix), np.inf, dtype=np.float32)
+    for _ in range(1, k):
+        distance = np.minimum(distance, 1 - matrix @ centroids[-1])
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        index = rng.choice(len(matrix), p=weights / total) if total > 0 else rng.integers(len(matrix))
+        centroids.append(matrix[index])
+    centroids = np.stack(centroids)
+
+    labels = None
+    for _ in range(iterations):
+        new_labels = np.argmax(matrix @ centroids.T, axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        assignment = np.zeros((k, len(matrix)), dtype=np.float32)
+        assignment[labels, np.arange(len(matrix))] = 1
+        sums = assignment @ matrix
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return labels, centroids
+
+
+def _join(left: str, right: str) -> str:
+    for overlap in range(min(len(left), len(right)) - 1, 1, -1):
+        if left.endswith(right[:overlap]):
+            return left + right[overlap:]
+        if right.endswith(left[:overlap]):
+            return right + left[overlap:]
+    return ""
+
+
+def top_terms(centroid: np.ndarray, vocabulary: List[str], count: int = TERMS_PER_TOPIC,
+              max_length: int = 8) -> List[str]:
+    terms = []
+    for index in np.argsort(-centroid)[:count * 10]:
+        if centroid[index] <= 0:
+            break
+        term = vocabulary[index]
+        if any(term in chosen for chosen in terms):
+            continue
+        for i, chosen in enumerate(terms):
+            joined = chosen if term in chosen else term if chosen in term else _join(chosen, term)
+            if joined and len(joined) <= max_length:
+                terms[i] = joined
+                break
+        else:
+            if len(terms) < count:
+                terms.append(term)
+    return [term for term in terms if not any(term != other and term in other for other in terms)]
+
+
+def percentages(counts: Dict[str, int]) -> Dict[str, float]:
+    total = sum(counts.values())
+    tenths = {label: 1000 * value / total for label, value in counts.items()}
+    rounded = {label: int(value) for label, value in tenths.items()}
+    remainder = 1000 - sum(rounded.values())
+    for label in sorted(tenths, key=lambda label: rounded[label] - tenths[label])[:remainder]:
+        rounded[label] += 1
+    return {label: value / 10 for label, value in rounded.items()}
+
+
+def analyze(texts: List[str], clusters: int = LOCAL_ANALYSIS_CLUSTERS) -> Dict:
+    if not texts:
+        return {"sentiment_analysis": {"positive": 0, "neutral": 0, "negative": 0}, "key_topics": [], "clusters": []}
+
+    features, terms = feature_cache.features(texts)
+    scores = np.array([score for _, _, score in features])
+    sentiment = np.sign(scores)
+    counts = {
+        "positive": int((sentiment > 0).sum()),
+        "neutral": int((sentiment == 0).sum()),
+        "negative": int((sentiment < 0).sum())
+    }
+
+    matrix, vocabulary = tfidf(features, terms)
+    k = min(clusters, len(texts), max(1, len(vocabulary)))
+    if not vocabulary:
+        labels, centroids = np.zeros(len(texts), dtype=np.intp), np.zeros((1, 0), dtype=np.float32)
+    else:
+        labels, centroids = kmeans(matrix, k)
+
+    groups = []
+    for cluster in range(len(centroids)):
+        members = labels == cluster
+        size = int(members.sum())
+        if not size:
+            continue
+        groups.append({
+            "size": size,
+            "terms": top_terms(centroids[cluster], vocabulary),
+            "sentiment": round(float(sentiment[members].mean()), 3),
+            "example": texts[int(np.argmax(members))]
+        })
+    groups.sort(key=lambda group: group["size"], reverse=True)
+
+    return {
+        "sentiment_analysis": percentages(counts),
+        "sentiment_counts": counts,
+        "key_topics": ["、".join(group["terms"]) for group in groups if group["terms"]],
+        "clusters": groups
+    }
+
+
+feature_cache = OpinionFeatureCache()
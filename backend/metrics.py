@@ -0,0 +1,90 @@
+import os
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+logger = logging.getLogger(__name__)
+
+METRICS_OTEL_ENABLED = os.getenv('METRICS_OTEL_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+_tracer = None
+if METRICS_OTEL_ENABLED:
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("metaempire")
+    except ImportError:
+        logger.warning("METRICS_OTEL_ENABLED is set but opentelemetry is not installed")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "metaempire_http_request_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+WORKFLOW_STEP_SECONDS = Histogram(
+    "metaempire_workflow_step_seconds", "Workflow step duration",
+    ["step", "status"], buckets=LATENCY_BUCKETS
+)
+WORKFLOW_TASKS = Counter("metaempire_workflow_tasks_total", "Finished workflow tasks", ["status"])
+WORKFLOW_IN_FLIGHT = Gauge("metaempire_workflow_tasks_in_flight", "Workflow tasks queued or running in this process")
+WORKFLOW_QUEUE_DEPTH = Gauge("metaempire_workflow_queue_depth", "Workflow jobs waiting for a worker")
+TASK_STORE_SIZE = Gauge("metaempire_task_store_size", "Tasks held by the workflow task store")
+LLM_REQUEST_SECONDS = Histogram(
+    "metaempire_llm_request_seconds", "LLM completion latency",
+    ["model", "mode"], buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Histogram("metaempire_llm_tokens", "Tokens per LLM call", ["model", "kind"], buckets=TOKEN_BUCKETS)
+LLM_ERRORS = Counter("metaempire_llm_errors_total", "Failed LLM calls", ["model"])
+LLM_CACHE_LOOKUPS = Counter("metaempire_llm_cache_lookups_total", "LLM cache lookups", ["result"])
+LLM_CONCURRENCY_LIMIT = Gauge("metaempire_llm_concurrency_limit", "Adaptive LLM concurrency limit")
+LLM_RETRIES = Counter("metaempire_llm_retries_total", "Retried LLM calls", ["reason"])
+RPC_REQUEST_SECONDS = Histogram(
+    "metaempire_rpc_request_seconds", "Ethereum JSON-RPC latency",
+    ["method"], buckets=LATENCY_BUCKETS
+)
+RPC_ERRORS = Counter("metaempire_rpc_errors_total", "Failed Ethereum JSON-RPC requests", ["method"])
+CHAIN_WRITE_BACKS = Counter("metaempire_chain_write_backs_total", "Analysis write-back events", ["outcome"])
+
+
+def span(name: str, **attributes):
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+@contextmanager
+def rpc_timer(method: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        RPC_ERRORS.labels(method).inc()
+        raise
+    finally:
+        RPC_REQUEST_SECONDS.labels(method).observe(time.perf_counter() - started)
+
+
+def rpc_metrics_middleware(make_request, w3):
+    def middleware(method, params):
+        with rpc_timer(method):
+            response = make_request(method, params)
+        if "error" in response:
+            RPC_ERRORS.labels(method).inc()
+        return response
+    return middleware
+
+
+async def async_rpc_metrics_middleware(make_request, w3):
+    async def middleware(method, params):
+        with rpc_timer(method):
+            response = await make_request(method, params)
+        if "error" in response:
+            RPC_ERRORS.labels(method).inc()
+        return response
+    return middleware
+
+
+def render():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,484 @@
+import os
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OPINION_INDEX_PATH = os.getenv('OPINION_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opinion_index.db'))
+OPINION_INDEX_START_BLOCK = int(os.getenv('OPINION_INDEX_START_BLOCK', '0'))
+OPINION_INDEX_BATCH_BLOCKS = int(os.getenv('OPINION_INDEX_BATCH_BLOCKS', '2000'))
+OPINION_INDEX_CHECKPOINTS = int(os.getenv('OPINION_INDEX_CHECKPOINTS', '128'))
+OPINION_INDEX_POLL_INTERVAL = float(os.getenv('OPINION_INDEX_POLL_INTERVAL', '2'))
+OPINION_INDEX_READ_CACHE = int(os.getenv('OPINION_INDEX_READ_CACHE', '512'))
+
+DEFAULT_TOPIC_ID = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS opinions (
+    idx          INTEGER PRIMARY KEY,
+    hash         TEXT NOT NULL UNIQUE,
+    sender       TEXT NOT NULL,
+    content      TEXT NOT NULL,
+    timestamp    INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS opinions_block ON opinions (block_number);
+CREATE TABLE IF NOT EXISTS topic_opinions (
+    topic_id     INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    opinion_hash TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    PRIMARY KEY (topic_id, position)
+);
+CREATE INDEX IF NOT EXISTS topic_opinions_hash ON topic_opinions (opinion_hash);
+CREATE TABLE IF NOT EXISTS topics (
+    topic_id     INTEGER PRIMARY KEY,
+    content      TEXT NOT NULL,
+    priority     TEXT NOT NULL,
+    urgency      TEXT NOT NULL,
+    summary      TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS receipt_links (
+    topic_id     INTEGER NOT NULL,
+    opinion_hash TEXT NOT NULL,
+    PRIMARY KEY (topic_id, opinion_hash)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash   TEXT NOT NULL
+);
+"""
+
+
+def _hex(value) -> str:
+    if isinstance(value, str):
+        return value if value.startswith("0x") else "0x" + value
+    h = value.hex()
+    return h if h.startswith("0x") else "0x" + h
+
+
+class OpinionIndex:
+    def __init__(self, web3_instance, world_record, path: str = OPINION_INDEX_PATH,
+                 start_block: int = OPINION_INDEX_START_BLOCK,
+                 batch_blocks: int = OPINION_INDEX_BATCH_BLOCKS,
+                 max_checkpoints: int = OPINION_INDEX_CHECKPOINTS,
+                 read_cache_size: int = OPINION_INDEX_READ_CACHE):
+        self.w3 = web3_instance
+        self.world_record = world_record
+        self.start_block = start_block
+        self.batch_blocks = max(1, batch_blocks)
+        self.max_checkpoints = max(1, max_checkpoints)
+        self.read_cache_size = read_cache_size
+        self._read_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._listeners: List[Callable[[int, str], None]] = []
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+        events = self.world_record.contract.events
+        self._opinion_added = events.OpinionAdded()
+        self._topic_created = events.TopicCreated()
+        self._topic_updated = events.TopicUpdated()
+        self._opinion_added_topic = _hex(self.w3.keccak(text="OpinionAdded(bytes32,address)"))
+        self._topic_created_topic = _hex(self.w3.keccak(text="TopicCreated(uint256,string)"))
+        self._topic_updated_topic = _hex(self.w3.keccak(text="TopicUpdated(uint256,string)"))
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def last_block(self) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(block_number) AS n FROM checkpoints").fetchone()
+            return row["n"]
+
+    def generation(self) -> int:
+        with self._lock:
+            return int(self._get_meta("generation") or 0)
+
+    def version(self) -> str:
+        with self._lock:
+            return f"{self.generation()}.{self._get_meta('changed_block') or -1}.{self._get_meta('links') or 0}"
+
+    def _invalidate(self):
+        self._read_cache.clear()
+
+    def _cached(self, key: tuple, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._read_cache:
+                self._read_cache.move_to_end(key)
+                return self._read_cache[key]
+            value = load()
+            self._read_cache[key] = value
+            while len(self._read_cache) > self.read_cache_size:
+                self._read_cache.popitem(last=False)
+            return value
+
+    def subscribe(self, listener: Callable[[int, str], None]):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _notify(self, changes: Dict[int, str]):
+        for topic_id, reason in changes.items():
+            for listener in self._listeners:
+                try:
+                    listener(topic_id, reason)
+                except Exception as e:
+                    logger.error(f"Error notifying change of topic {topic_id}: {str(e)}")
+
+    def _block_hash(self, block_number: int) -> str:
+        return _hex(self.w3.eth.get_block(block_number)["hash"])
+
+    def _reset(self, keep_links: bool = False):
+        logger.warning("Resetting opinion index")
+        generation = self.generation()
+        tables = ["opinions", "topic_opinions", "topics", "checkpoints", "meta"]
+        if not keep_links:
+            tables.append("receipt_links")
+        with self._conn:
+            for table in tables:
+                self._conn.execute(f"DELETE FROM {table}")
+            self._set_meta("contract_address", self.world_record.contract_address)
+            self._set_meta("generation", str(generation + 1))
+        self._invalidate()
+
+    def _find_fork_point(self, head: int) -> Optional[int]:
+        rows = self._conn.execute(
+            "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+        for i, row in enumerate(rows):
+            number = row["block_number"]
+            if number <= head and self._block_hash(number) == row["block_hash"]:
+                return None if i == 0 else number
+        return self.start_block - 1
+
+    def _rollback(self, block_number: int):
+        logger.warning(f"Chain reorganization detected, rolling opinion index back to block {block_number}")
+        if block_number < self.start_block:
+            self._reset(keep_links=True)
+            return
+        with self._conn:
+            self._conn.execute("DELETE FROM opinions WHERE block_number > ?", (block_number,))
+            self._conn.execute("DELETE FROM topic_opinions WHERE block_number > ?", (block_number,))
+            self._conn.execute("DELETE FROM topics")
+            self._conn.execute("DELETE FROM checkpoints WHERE block_number > ?", (block_number,))
+            self._set_meta("generation", str(self.generation() + 1))
+            self._set_meta("changed_block", str(block_number))
+        self._invalidate()
+
+    def _store_topic(self, topic_id: int, block_number: int):
+        try:
+            hashes = self.world_record.get_topic_opinions(topic_id)
+        except Exception as e:
+            logger.warning(f"Could not index opinions of topic {topic_id}: {str(e)}")
+            return
+        self._conn.execute("DELETE FROM topic_opinions WHERE topic_id = ?", (topic_id,))
+        self._conn.executemany(
+            "INSERT INTO topic_opinions (topic_id, position, opinion_hash, block_number) VALUES (?, ?, ?, ?)",
+            [(topic_id, position, _hex(h), block_number) for position, h in enumerate(hashes)]
+        )
+
+    def _store_topic_details(self, topic_id: int, block_number: int):
+        try:
+            topic = self.world_record.read_topic(topic_id)
+        except Exception as e:
+            logger.warning(f"Could not index topic {topic_id}: {str(e)}")
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO topics (topic_id, content, priority, urgency, summary, block_number) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (topic_id, topic["content"], topic["priority"], topic["urgency"], topic["summary"], block_number)
+        )
+
+    def _bootstrap_topics(self, block_number: int):
+        try:
+            next_topic_id = self.world_record.get_next_topic_id()
+        except Exception as e:
+            logger.warning(f"Could not list topics: {str(e)}")
+            return
+        with self._conn:
+            for topic_id in range(DEFAULT_TOPIC_ID, max(DEFAULT_TOPIC_ID + 1, next_topic_id)):
+                self._store_topic_details(topic_id, block_number)
+                if self.latest_topic_position(topic_id) is None:
+                    self._store_topic(topic_id, block_number)
+        self._invalidate()
+
+    def _relink(self):
+        rows = self._conn.execute(
+            "SELECT r.topic_id, r.opinion_hash, o.block_number FROM receipt_links r "
+            "JOIN opinions o ON o.hash = r.opinion_hash "
+            "LEFT JOIN topic_opinions t ON t.topic_id = r.topic_id AND t.opinion_hash = r.opinion_hash "
+            "WHERE t.opinion_hash IS NULL ORDER BY o.idx"
+        ).fetchall()
+        for row in rows:
+            position = self.latest_topic_position(row["topic_id"])
+            self._conn.execute(
+                "INSERT INTO topic_opinions (topic_id, position, opinion_hash, block_number) VALUES (?, ?, ?, ?)",
+                (row["topic_id"], 0 if position is None else position + 1, row["opinion_hash"], row["block_number"])
+            )
+        if rows:
+            logger.info(f"Restored {len(rows)} receipt links to topics")
+
+    def _apply_logs(self, logs: List, to_block: int, to_block_hash: str, notify: bool = True):
+        logs = sorted(logs, key=lambda l: (l["blockNumber"], l["logIndex"]))
+        added = [
+            (log, self._opinion_added.process_log(log))
+            for log in logs if _hex(log["topics"][0]) == self._opinion_added_topic
+        ]
+        records = self.world_record.read_opinions([event["args"]["hash"] for _, event in added])
+        contents = {_hex(record[0]): record for record in records}
+
+        next_idx = self._conn.execute("SELECT COUNT(*) AS n FROM opinions").fetchone()["n"]
+        with self._conn:
+            for log, event in added:
+                opinion_hash = _hex(event["args"]["hash"])
+                opinion = contents[opinion_hash]
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO opinions (idx, hash, sender, content, timestamp, block_number, log_index) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (next_idx, opinion_hash, event["args"]["sender"], opinion[2], opinion[3],
+                     log["blockNumber"], log["logIndex"])
+                )
+                next_idx += 1
+
+            changes = {}
+            if notify and added:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT t.topic_id FROM topic_opinions t JOIN opinions o ON o.hash = t.opinion_hash "
+                    "WHERE o.block_number BETWEEN ? AND ?",
+                    (added[0][0]["blockNumber"], added[-1][0]["blockNumber"])
+                ).fetchall()
+                changes.update((row["topic_id"], "opinion_added") for row in rows)
+
+            for log in logs:
+                signature = _hex(log["topics"][0])
+                if signature == self._topic_created_topic:
+                    event = self._topic_created.process_log(log)
+                    self._store_topic(event["args"]["id"], log["blockNumber"])
+                    self._store_topic_details(event["args"]["id"], log["blockNumber"])
+                    if notify:
+                        changes[event["args"]["id"]] = "topic_created"
+                elif signature == self._topic_updated_topic:
+                    event = self._topic_updated.process_log(log)
+                    self._store_topic_details(event["args"]["id"], log["blockNumber"])
+
+            if logs:
+                self._relink()
+                self._set_meta("changed_block", str(to_block))
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (block_number, block_hash) VALUES (?, ?)",
+                (to_block, to_block_hash)
+            )
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (self.max_checkpoints,)
+            )
+        if logs:
+            self._invalidate()
+        self._notify(changes)
+
+    def sync(self) -> Optional[int]:
+        with self._lock:
+            if self._get_meta("contract_address") != self.world_record.contract_address:
+                self._reset()
+
+            head = self.w3.eth.block_number
+            last = self.last_block()
+            catching_up = last is None
+            if last is not None:
+                fork = self._find_fork_point(head)
+                if fork is not None:
+                    self._rollback(fork)
+                    last = self.last_block()
+
+            if last is None:
+                with self._conn:
+                    self._store_topic(DEFAULT_TOPIC_ID, self.start_block - 1)
+                from_block = self.start_block
+            else:
+                from_block = last + 1
+
+            has_topics = self._conn.execute("SELECT 1 FROM topics LIMIT 1").fetchone()
+            if not has_topics:
+                self._bootstrap_topics(from_block - 1)
+
+            while from_block <= head:
+                to_block = min(from_block + self.batch_blocks - 1, head)
+                to_block_hash = self._block_hash(to_block)
+                logs = self.w3.eth.get_logs({
+                    "address": self.world_record.contract_address,
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "topics": [[self._opinion_added_topic, self._topic_created_topic, self._topic_updated_topic]]
+                })
+                self._apply_logs(logs, to_block, to_block_hash, notify=not catching_up)
+                if logs:
+                    logger.info(f"Indexed {len(logs)} WorldRecord events from blocks {from_block}-{to_block}")
+                from_block = to_block + 1
+
+            return self.last_block()
+
+    @staticmethod
+    def _row_to_opinion(row) -> Dict:
+        return {
+            "index": row["idx"],
+            "hash": row["hash"],
+            "sender": row["sender"],
+            "content": row["content"],
+            "timestamp": row["timestamp"],
+            "block_number": row["block_number"]
+        }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) AS n FROM opinions").fetchone()["n"]
+
+    def get_opinions(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM opinions ORDER BY idx").fetchall()
+        return [self._row_to_opinion(row) for row in rows]
+
+    def latest_index(self) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute("SELECT MAX(idx) AS n FROM opinions").fetchone()["n"]
+
+    def get_opinions_since(self, index: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM opinions WHERE idx > ? ORDER BY idx", (index,)).fetchall()
+        return [self._row_to_opinion(row) for row in rows]
+
+    def get_opinion_contents(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT content FROM opinions ORDER BY idx").fetchall()
+        return [row["content"] for row in rows]
+
+    def get_topic_opinions(self, topic_id: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT o.* FROM topic_opinions t JOIN opinions o ON o.hash = t.opinion_hash "
+                "WHERE t.topic_id = ? ORDER BY t.position",
+                (topic_id,)
+            ).fetchall()
+        return [self._row_to_opinion(row) for row in rows]
+
+    def _page(self, rows, limit: int, cursor_key: str, convert) -> Dict:
+        items = [convert(row) for row in rows[:limit]]
+        next_cursor = rows[limit - 1][cursor_key] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def page_opinions(self, after: Optional[int] = None, limit: int = 50) -> Dict:
+        def load():
+            rows = self._conn.execute(
+                "SELECT * FROM opinions WHERE idx > ? ORDER BY idx LIMIT ?",
+                (-1 if after is None else after, limit + 1)
+            ).fetchall()
+            return self._page(rows, limit, "idx", self._row_to_opinion)
+        return self._cached(("opinions", after, limit), load)
+
+    def page_topic_opinions(self, topic_id: int, after: Optional[int] = None, limit: int = 50) -> Dict:
+        def load():
+            rows = self._conn.execute(
+                "SELECT o.*, t.position FROM topic_opinions t JOIN opinions o ON o.hash = t.opinion_hash "
+                "WHERE t.topic_id = ? AND t.position > ? ORDER BY t.position LIMIT ?",
+                (topic_id, -1 if after is None else after, limit + 1)
+            ).fetchall()
+            total = self._conn.execute(
+                "SELECT COUNT(*) AS n FROM topic_opinions WHERE topic_id = ?", (topic_id,)
+            ).fetchone()["n"]
+            return dict(self._page(rows, limit, "position", self._row_to_opinion), total=total)
+        return self._cached(("topic_opinions", topic_id, after, limit), load)
+
+    def page_topics(self, after: Optional[int] = None, limit: int = 50) -> Dict:
+        def load():
+            rows = self._conn.execute(
+                "SELECT t.*, (SELECT COUNT(*) FROM topic_opinions o WHERE o.topic_id = t.topic_id) AS opinion_count "
+                "FROM topics t WHERE t.topic_id > ? ORDER BY t.topic_id LIMIT ?",
+                (-1 if after is None else after, limit + 1)
+            ).fetchall()
+            return self._page(rows, limit, "topic_id", lambda row: {
+                "id": row["topic_id"],
+                "content": row["content"],
+                "priority": row["priority"],
+                "urgency": row["urgency"],
+                "summary": row["summary"],
+                "opinion_count": row["opinion_count"],
+                "block_number": row["block_number"]
+            })
+        return self._cached(("topics", after, limit), load)
+
+    def link_opinions(self, topic_id: int, hashes: List[str], block_number: int) -> int:
+        with self._lock:
+            linked = {
+                row["opinion_hash"] for row in self._conn.execute(
+                    "SELECT opinion_hash FROM topic_opinions WHERE topic_id = ?", (topic_id,)
+                )
+            }
+            new_hashes = [h for h in dict.fromkeys(_hex(h) for h in hashes) if h not in linked]
+            if not new_hashes:
+                return 0
+            position = self.latest_topic_position(topic_id)
+            start = 0 if position is None else position + 1
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO topic_opinions (topic_id, position, opinion_hash, block_number) VALUES (?, ?, ?, ?)",
+                    [(topic_id, start + i, h, block_number) for i, h in enumerate(new_hashes)]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO receipt_links (topic_id, opinion_hash) VALUES (?, ?)",
+                    [(topic_id, h) for h in new_hashes]
+                )
+                self._set_meta("links", str(int(self._get_meta("links") or 0) + 1))
+            self._invalidate()
+        self._notify({topic_id: "opinion_added"})
+        return len(new_hashes)
+
+    def topics_for_opinion(self, opinion_hash: str) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT topic_id FROM topic_opinions WHERE opinion_hash = ? ORDER BY topic_id",
+                (_hex(opinion_hash),)
+            ).fetchall()
+        return [row["topic_id"] for row in rows]
+
+    def latest_topic_position(self, topic_id: int) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT MAX(position) AS n FROM topic_opinions WHERE topic_id = ?", (topic_id,)
+            ).fetchone()["n"]
+
+    def indexed_topic_position(self, topic_id: int) -> Optional[int]:
+        with self._lock:
+            gap = self._conn.execute(
+                "SELECT MIN(t.position) AS n FROM topic_opinions t WHERE t.topic_id = ? "
+                "AND NOT EXISTS (SELECT 1 FROM opinions o WHERE o.hash = t.opinion_hash)",
+                (topic_id,)
+            ).fetchone()["n"]
+            return self._conn.execute(
+                "SELECT MAX(position) AS n FROM topic_opinions WHERE topic_id = ? AND position < ?",
+                (topic_id, float("inf") if gap is None else gap)
+            ).fetchone()["n"]
+
+    def get_topic_opinion_contents(self, topic_id: int, after: int = -1,
+                                   until: Optional[int] = None) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT o.content FROM topic_opinions t JOIN opinions o ON o.hash = t.opinion_hash "
+                "WHERE t.topic_id = ? AND t.position > ? AND t.position <= ? ORDER BY t.position",
+                (topic_id, after, float("inf") if until is None else until)
+            ).fetchall()
+        return [row["content"] for row in rows]
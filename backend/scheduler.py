@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from chain import chain_client
+from topic_state import topic_state
+from worker_pool import QueueFull
+from workflow import WorkflowManager, running_tasks
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SCHEDULER_PATH = os.getenv('SCHEDULER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scheduler.db'))
+SCHEDULER_DEBOUNCE = float(os.getenv('SCHEDULER_DEBOUNCE', '30'))
+SCHEDULER_MAX_STALENESS = float(os.getenv('SCHEDULER_MAX_STALENESS', '300'))
+SCHEDULER_MIN_INTERVAL = float(os.getenv('SCHEDULER_MIN_INTERVAL', '120'))
+SCHEDULER_MAX_RUNS_PER_MINUTE = int(os.getenv('SCHEDULER_MAX_RUNS_PER_MINUTE', '10'))
+SCHEDULER_LEASE_TTL = float(os.getenv('SCHEDULER_LEASE_TTL', '15'))
+SCHEDULER_TICK = float(os.getenv('SCHEDULER_TICK', '1'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirty_topics (
+    topic_id    INTEGER PRIMARY KEY,
+    first_event REAL NOT NULL,
+    last_event  REAL NOT NULL,
+    events      INTEGER NOT NULL,
+    reasons     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS topic_runs (
+    topic_id INTEGER PRIMARY KEY,
+    last_run REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name       TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class AnalysisScheduler:
+    def __init__(self, path: str = SCHEDULER_PATH, debounce: float = SCHEDULER_DEBOUNCE,
+                 max_staleness: float = SCHEDULER_MAX_STALENESS, min_interval: float = SCHEDULER_MIN_INTERVAL,
+                 max_runs_per_minute: int = SCHEDULER_MAX_RUNS_PER_MINUTE, lease_ttl: float = SCHEDULER_LEASE_TTL):
+        self.debounce = debounce
+        self.max_staleness = max_staleness
+        self.min_interval = min_interval
+        self.max_runs_per_minute = max(1, max_runs_per_minute)
+        self.lease_ttl = lease_ttl
+        self.owner = uuid.uuid4().hex
+        self.leader = False
+        self.events = 0
+        self.runs = 0
+        self.skipped = 0
+        self.opinion_index = None
+        self._active: Dict[int, str] = {}
+        self._recent_runs: Deque[float] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def mark_dirty(self, topic_id: int, reason: str = "opinion_added"):
+        now = time.time()
+        with self._lock, self._conn:
+            self.events += 1
+            row = self._conn.execute("SELECT reasons FROM dirty_topics WHERE topic_id = ?", (topic_id,)).fetchone()
+            reasons = set(row["reasons"].split(",")) if row else set()
+            reasons.add(reason)
+            self._conn.execute(
+                "INSERT INTO dirty_topics (topic_id, first_event, last_event, events, reasons) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (topic_id) DO UPDATE SET last_event = excluded.last_event, events = events + 1, "
+                "reasons = excluded.reasons",
+                (topic_id, now, now, ",".join(sorted(reasons)))
+            )
+
+    def note_run(self, topic_id: int, task_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dirty_topics WHERE topic_id = ?", (topic_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topic_runs (topic_id, last_run) VALUES (?, ?)", (topic_id, time.time())
+            )
+            self._active[topic_id] = task_id
+
+    def _clear(self, topic_id: int, last_event: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM dirty_topics WHERE topic_id = ? AND last_event <= ?", (topic_id, last_event)
+            )
+
+    def try_lead(self) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES ('scheduler', ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (self.owner, now + self.lease_ttl, now)
+            )
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = 'scheduler'").fetchone()
+        leader = row["owner"] == self.owner
+        if leader != self.leader:
+            logger.info(f"Re-analysis scheduler {'acquired' if leader else 'lost'} leadership")
+        self.leader = leader
+        return leader
+
+    def release(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM leases WHERE name = 'scheduler' AND owner = ?", (self.owner,))
+        self.leader = False
+
+    def _covered(self, topic_id: int, reasons: List[str]) -> bool:
+        if self.opinion_index is None or "topic_created" in reasons:
+            return False
+        state = topic_state.get(topic_id)
+        latest = self.opinion_index.indexed_topic_position(topic_id)
+        return state is not None and latest is not None and state["watermark"] >= latest
+
+    def due_topics(self) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.*, r.last_run FROM dirty_topics d LEFT JOIN topic_runs r ON r.topic_id = d.topic_id "
+                "WHERE (d.last_event <= ? OR d.first_event <= ?) AND (r.last_run IS NULL OR r.last_run <= ?) "
+                "ORDER BY d.first_event",
+                (now - self.debounce, now - self.max_staleness, now - self.min_interval)
+            ).fetchall()
+
+        due = []
+        for row in rows:
+            entry = dict(row, reasons=row["reasons"].split(","))
+            if self._active.get(entry["topic_id"]) in running_tasks:
+                continue
+            if self._covered(entry["topic_id"], entry["reasons"]):
+                self._clear(entry["topic_id"], entry["last_event"])
+                self.skipped += 1
+                logger.info(f"Topic {entry['topic_id']} changes are already analysed, skipping re-analysis")
+                continue
+            due.append(entry)
+        return due
+
+    async def tick(self):
+        if not await asyncio.to_thread(self.try_lead):
+            return
+        now = time.monotonic()
+        while self._recent_runs and now - self._recent_runs[0] >= 60:
+            self._recent_runs.popleft()
+
+        for entry in await asyncio.to_thread(self.due_topics):
+            topic_id = entry["topic_id"]
+            if len(self._recent_runs) >= self.max_runs_per_minute:
+                logger.debug(f"Re-analysis rate limit reached, deferring topic {topic_id}")
+                return
+            try:
+                task_id = WorkflowManager.create_task(topic_id=topic_id, priority="batch")
+            except QueueFull:
+                logger.warning(f"Workflow queue is full, deferring re-analysis of topic {topic_id}")
+                return
+            await asyncio.to_thread(self.note_run, topic_id, task_id)
+            self._recent_runs.append(now)
+            self.runs += 1
+            logger.info(
+                f"Scheduled re-analysis of topic {topic_id} as task {task_id} after "
+                f"{entry['events']} events ({', '.join(entry['reasons'])})"
+            )
+
+    async def _subscribe(self):
+        opinion_index = await chain_client.get_opinion_index()
+        opinion_index.subscribe(self.mark_dirty)
+        self.opinion_index = opinion_index
+        logger.info("Re-analysis scheduler watching opinion index events")
+
+    async def run(self, interval: float = SCHEDULER_TICK):
+        while True:
+            try:
+                if self.opinion_index is None:
+                    await self._subscribe()
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Error scheduling re-analysis: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def start(self):
+        if SCHEDULER_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            await asyncio.to_thread(self.release)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            dirty = self._conn.execute("SELECT COUNT(*) AS n FROM dirty_topics").fetchone()["n"]
+        return {
+            "enabled": SCHEDULER_ENABLED,
+            "leader": self.leader,
+            "dirty_topics": dirty,
+            "events": self.events,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "runs_last_minute": len(self._recent_runs)
+        }
+
+
+analysis_scheduler = AnalysisScheduler()
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Type
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_TASK_STORE = os.getenv('WORKFLOW_TASK_STORE', 'sqlite')
+WORKFLOW_TASK_STORE_PATH = os.getenv('WORKFLOW_TASK_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workflow_tasks.db'))
+WORKFLOW_TASK_MAX = int(os.getenv('WORKFLOW_TASK_MAX', '10000'))
+WORKFLOW_TASK_TTL = float(os.getenv('WORKFLOW_TASK_TTL', str(24 * 3600)))
+WORKFLOW_TASK_PRUNE_EVERY = int(os.getenv('WORKFLOW_TASK_PRUNE_EVERY', '100'))
+
+TRANSIENT_FIELDS = {"history", "step_started"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id    TEXT PRIMARY KEY,
+    topic_id   INTEGER NOT NULL,
+    status     TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_topic ON tasks (topic_id, updated_at);
+CREATE INDEX IF NOT EXISTS tasks_updated ON tasks (updated_at);
+CREATE TABLE IF NOT EXISTS task_steps (
+    task_id   TEXT NOT NULL,
+    step_id   TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    details   TEXT,
+    timestamp REAL NOT NULL,
+    progress  INTEGER,
+    PRIMARY KEY (task_id, step_id)
+);
+"""
+
+
+class TaskStore(ABC):
+    @abstractmethod
+    def save(self, task: BaseModel):
+        ...
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[BaseModel]:
+        ...
+
+    @abstractmethod
+    def find_by_topic(self, topic_id: int, limit: int = 20) -> List[BaseModel]:
+        ...
+
+    @abstractmethod
+    def prune(self) -> int:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryTaskStore(TaskStore):
+    def __init__(self, model: Type[BaseModel], max_tasks: int = WORKFLOW_TASK_MAX, ttl: float = WORKFLOW_TASK_TTL):
+        self.model = model
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self._tasks: "OrderedDict[str, BaseModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, task: BaseModel):
+        with self._lock:
+            self._tasks[task.task_id] = task
+            self._tasks.move_to_end(task.task_id)
+            while len(self._tasks) > self.max_tasks:
+                self._tasks.popitem(last=False)
+
+    def get(self, task_id: str) -> Optional[BaseModel]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            if time.time() - task.updated_at > self.ttl:
+                del self._tasks[task_id]
+                return None
+            return task
+
+    def find_by_topic(self, topic_id: int, limit: int = 20) -> List[BaseModel]:
+        with self._lock:
+            matches = [task for task in reversed(self._tasks.values()) if task.topic_id == topic_id]
+        return matches[:limit]
+
+    def prune(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [task_id for task_id, task in self._tasks.items() if task.updated_at < cutoff]
+            for task_id in expired:
+                del self._tasks[task_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+class SQLiteTaskStore(TaskStore):
+    def __init__(self, model: Type[BaseModel], path: str = WORKFLOW_TASK_STORE_PATH,
+                 max_tasks: int = WORKFLOW_TASK_MAX, ttl: float = WORKFLOW_TASK_TTL,
+                 prune_every: int = WORKFLOW_TASK_PRUNE_EVERY):
+        self.model = model
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self.prune_every = prune_every
+        self._saves = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def save(self, task: BaseModel):
+        data = task.model_dump_json(exclude=TRANSIENT_FIELDS)
+        steps = [
+            (task.task_id, entry["step_id"], entry["status"], entry.get("details"),
+             entry["timestamp"], entry.get("progress"))
+            for entry in task.history
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, topic_id, status, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+                (task.task_id, task.topic_id, task.status, task.updated_at, data)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO task_steps (task_id, step_id, status, details, timestamp, progress) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                steps
+            )
+            self._saves += 1
+            if self._saves % self.prune_every == 0:
+                self._prune()
+
+    def _load(self, row) -> BaseModel:
+        task = self.model.model_validate(json.loads(row[0]))
+        steps = self._conn.execute(
+            "SELECT step_id, status, details, timestamp, progress FROM task_steps "
+            "WHERE task_id = ? ORDER BY timestamp",
+            (task.task_id,)
+        ).fetchall()
+        task.history = [
+            {"step_id": s[0], "status": s[1], "details": s[2], "timestamp": s[3], "progress": s[4]}
+            for s in steps
+        ]
+        return task
+
+    def get(self, task_id: str) -> Optional[BaseModel]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE task_id = ? AND updated_at >= ?",
+                (task_id, time.time() - self.ttl)
+            ).fetchone()
+            return self._load(row) if row else None
+
+    def find_by_topic(self, topic_id: int, limit: int = 20) -> List[BaseModel]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM tasks WHERE topic_id = ? ORDER BY updated_at DESC LIMIT ?",
+                (topic_id, limit)
+            ).fetchall()
+            return [self._load(row) for row in rows]
+
+    def _prune(self) -> int:
+        cutoff = time.time() - self.ttl
+        removed = self._conn.execute(
+            "DELETE FROM tasks WHERE updated_at < ? OR task_id IN "
+            "(SELECT task_id FROM tasks ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (cutoff, self.max_tasks)
+        ).rowcount
+        self._conn.execute("DELETE FROM task_steps WHERE task_id NOT IN (SELECT task_id FROM tasks)")
+        if removed:
+            logger.info(f"Pruned {removed} workflow tasks")
+        return removed
+
+    def prune(self) -> int:
+        with self._lock, self._conn:
+            return self._prune()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def create_task_store(model: Type[BaseModel], backend: str = WORKFLOW_TASK_STORE) -> TaskStore:
+    if backend == "memory":
+        return MemoryTaskStore(model)
+    if backend == "sqlite":
+        return SQLiteTaskStore(model)
+    raise ValueError(f"Unknown workflow task store: {backend}")
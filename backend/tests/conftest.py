@@ -0,0 +1,17 @@
+import os
+import sys
+
+os.environ.update({
+    "LLM_PROVIDER": "fake",
+    "LLM_CACHE_ENABLED": "false",
+    "FAKE_LLM_LATENCY": "0",
+    "FAKE_LLM_TOKENS_PER_SECOND": "0",
+    "WORKFLOW_TASK_STORE": "memory",
+    "WORKFLOW_DEMO_PACING": "false",
+    "TOPIC_STATE_PATH": ":memory:",
+    "OPINION_INDEX_PATH": ":memory:",
+    "SCHEDULER_PATH": ":memory:",
+    "ETH_PROVIDER_URL": "http://127.0.0.1:1",
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,80 @@
+import asyncio
+
+import analysis
+from fake_llm import FakeMessage
+import llm
+from llm import LLM_FAST_MODEL, LLM_MODEL, LLM_TEMPERATURE
+from llm_cache import LLMCache, make_key
+
+PROMPT = "总结：{analysis}"
+
+
+class FixedLLM:
+    def __init__(self, text: str, delay: float = 0):
+        self.text = text
+        self.delay = delay
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.delay)
+        return FakeMessage(self.text)
+
+
+def test_route_timeout_falls_back_and_caches_under_the_answering_model(monkeypatch):
+    cache = LLMCache(":memory:")
+    monkeypatch.setattr(analysis, "llm_cache", cache)
+    monkeypatch.setattr(analysis, "LLM_ROUTE_TIMEOUTS", {"summary": 0.05})
+    monkeypatch.setitem(llm._llms, LLM_MODEL, FixedLLM("slow", delay=5))
+    monkeypatch.setitem(llm._llms, LLM_FAST_MODEL, FixedLLM("fast"))
+
+    text = asyncio.run(analysis.complete(PROMPT, route="summary", analysis="整合结果"))
+
+    assert text == "fast"
+    variables = {"analysis": "整合结果"}
+    assert cache.get(make_key(PROMPT, LLM_FAST_MODEL, LLM_TEMPERATURE, variables)) == "fast"
+    assert cache.get(make_key(PROMPT, LLM_MODEL, LLM_TEMPERATURE, variables)) is None
+    assert analysis.llm_gateway.in_flight == 0
+
+
+def test_chunks_stay_within_the_token_budget():
+    texts = [f"第{i}条观点：" + "内容" * (i % 7 + 1) for i in range(60)]
+    budget = 40
+    batches = analysis.chunk_texts(texts, budget)
+
+    assert [text for batch in batches for text in batch] == texts
+    for batch in batches:
+        assert sum(analysis.count_tokens(text) for text in batch) <= budget
+    for batch, following in zip(batches, batches[1:]):
+        used = sum(analysis.count_tokens(text) for text in batch)
+        assert used + analysis.count_tokens(following[0]) > budget
+
+
+def test_oversized_text_gets_its_own_chunk():
+    long_text = "很长的观点" * 100
+    assert analysis.chunk_texts(["短", long_text, "短"], budget=20) == [["短"], [long_text], ["短"]]
+
+
+def test_map_reduce_reduces_until_one_group_fits(monkeypatch):
+    calls = []
+    active = [0, 0]
+
+    async def complete(prompt, use_cache=True, route="summary", **variables):
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        await asyncio.sleep(0)
+        calls.append(route)
+        active[0] -= 1
+        return "部分结论" * 5
+
+    monkeypatch.setattr(analysis, "complete", complete)
+    texts = ["观点" * 10] * 32
+    budget = analysis.count_tokens(texts[0]) * 2
+
+    result = asyncio.run(analysis.map_reduce(texts, "{opinions}", "{partials}", budget=budget, concurrency=3))
+
+    maps = calls.count("map")
+    assert result == "部分结论" * 5
+    assert maps == 16
+    assert calls[:maps] == ["map"] * maps
+    assert calls[maps:] and set(calls[maps:]) == {"reduce"}
+    assert len(calls) - maps < maps
+    assert active[1] <= 3
@@ -0,0 +1,40 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from chain import chain_client
+
+
+class PagedIndex:
+    def __init__(self, opinions):
+        self.opinions = opinions
+
+    def version(self):
+        return 1
+
+    def page_topic_opinions(self, topic_id, cursor, limit):
+        items = self.opinions.get(topic_id, [])
+        return {"total": len(items), "items": items[:limit], "next_cursor": None}
+
+
+@pytest.fixture
+def chain_down(monkeypatch):
+    async def unavailable():
+        raise ConnectionError("rpc down")
+
+    monkeypatch.setattr(chain_client, "get_world_record", unavailable)
+    monkeypatch.setattr(chain_client, "_opinion_index", PagedIndex({
+        1: [{"hash": "0x01", "content": "观点", "sender": "0xabc", "timestamp": 1}]
+    }))
+    return TestClient(api.app)
+
+
+def test_topic_opinions_are_served_from_the_index_while_the_chain_is_down(chain_down):
+    response = chain_down.get("/topics/1/opinions")
+
+    assert response.status_code == 200
+    assert response.json()["opinions"][0]["content"] == "观点"
+
+
+def test_unindexed_topic_needs_the_chain(chain_down):
+    assert chain_down.get("/topics/2/opinions").status_code == 503
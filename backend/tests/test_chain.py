@@ -0,0 +1,91 @@
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import chain
+from chain import WorldRecordContract
+
+
+def make_contract(max_items_per_tx: int, fail_on_send: int = None):
+    contract = object.__new__(WorldRecordContract)
+    sent = []
+
+    def estimate_gas(function):
+        if len(function) > max_items_per_tx:
+            raise ValueError("exceeds block gas limit")
+        return 100_000 * len(function)
+
+    def send_transaction(function, gas=None):
+        if fail_on_send is not None and len(sent) == fail_on_send:
+            raise ConnectionError("rpc down")
+        sent.append(list(function))
+        return f"0x{len(sent):064x}", len(sent)
+
+    contract.contract = SimpleNamespace(functions=SimpleNamespace(addOpinions=list))
+    contract.estimate_gas = estimate_gas
+    contract.send_transaction = send_transaction
+    return contract, sent
+
+
+def test_estimation_failure_splits_the_batch():
+    contract, sent = make_contract(max_items_per_tx=3)
+    contents = [f"观点{i}" for i in range(10)]
+
+    transactions = contract.add_opinions(contents)
+
+    assert all(tx["status"] == "pending" for tx in transactions)
+    assert all(len(items) <= 3 for items in sent)
+    assert [i for tx in transactions for i in tx["items"]] == list(range(10))
+
+
+def test_single_opinion_estimation_failure_raises_before_sending():
+    contract, sent = make_contract(max_items_per_tx=0)
+
+    with pytest.raises(ValueError):
+        contract.add_opinions(["太长的观点"])
+    assert sent == []
+
+
+def test_send_failure_returns_sent_transactions(monkeypatch):
+    monkeypatch.setattr(chain, "OPINION_BATCH_MAX_ITEMS", 2)
+    contract, sent = make_contract(max_items_per_tx=2, fail_on_send=1)
+
+    transactions = contract.add_opinions([f"观点{i}" for i in range(6)])
+
+    assert [tx["transaction_hash"] is not None for tx in transactions] == [True, False, False]
+    assert transactions[0]["items"] == [0, 1]
+    assert [tx["status"] for tx in transactions[1:]] == ["not_sent", "not_sent"]
+    assert transactions[1]["error"] == "rpc down"
+    assert len(sent) == 1
+
+
+def test_first_send_failure_raises(monkeypatch):
+    contract, _ = make_contract(max_items_per_tx=10, fail_on_send=0)
+
+    with pytest.raises(ConnectionError):
+        contract.add_opinions(["观点"])
+
+
+def test_health_reports_starting_before_the_contract_resolves():
+    client = chain.ChainClient(world_record_address="0x" + "11" * 20, address_cache_path=None)
+    client._w3 = SimpleNamespace(eth=SimpleNamespace(block_number=7))
+
+    health = asyncio.run(client.health())
+    assert health["status"] == "starting"
+    assert health["rpc"]["latest_block"] == 7
+
+    client.last_error = "boom"
+    assert asyncio.run(client.health())["status"] == "degraded"
+
+    client._world_record = object()
+    client.last_error = None
+    assert asyncio.run(client.health())["status"] == "ok"
+
+
+def test_importing_the_api_does_not_load_web3():
+    code = "import sys, api; sys.exit(any(m in sys.modules for m in ('web3', 'langchain')))"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(chain.__file__)).returncode == 0
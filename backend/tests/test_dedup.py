@@ -0,0 +1,41 @@
+import pytest
+
+from dedup import MinHasher, collapse, format_groups, normalize
+
+
+def test_normalize_ignores_case_punctuation_and_width():
+    assert normalize("Ｈｅｌｌｏ, World！") == normalize("hello world")
+
+
+def test_exact_and_near_duplicates_collapse_into_one_group():
+    base = "政府应该加大对基础教育的投入，尤其是农村地区的师资建设和校舍改造"
+    texts = [
+        base,
+        base + "！",
+        base.replace("尤其是", "特别是"),
+        "房价太高了，年轻人根本买不起房子，希望出台更多限购和保障房政策",
+    ]
+    groups = collapse(texts, hasher=MinHasher())
+
+    assert [group["count"] for group in groups] == [3, 1]
+    assert groups[0]["text"] == base
+    assert format_groups(groups)[0].endswith("（相同或相近观点共 3 条）")
+
+
+def test_signatures_estimate_jaccard_similarity():
+    hasher = MinHasher(num_perm=128, bands=16)
+    same, similar, different = hasher.signatures([
+        normalize("我支持提高最低工资标准"),
+        normalize("我支持提高最低工资标准，越快越好"),
+        normalize("天气预报说明天会下雨"),
+    ])
+    agreement = lambda a, b: (a == b).mean()
+
+    assert agreement(same, same) == 1.0
+    assert agreement(same, similar) > 0.4
+    assert agreement(same, different) < 0.1
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=64, bands=10)
@@ -0,0 +1,50 @@
+import asyncio
+
+from event_bus import TaskEventBus, format_sse
+
+
+def collect(bus, task_id, last_event_id=0, heartbeat=1.0):
+    async def run():
+        return [item async for item in bus.stream(task_id, last_event_id, heartbeat=heartbeat)]
+    return asyncio.run(run())
+
+
+def test_reconnect_replays_only_events_after_last_event_id():
+    bus = TaskEventBus()
+    for step in ("fetching", "analyzing", "complete"):
+        bus.publish("t", {"step_id": step}, final=step == "complete")
+
+    events = collect(bus, "t")
+    assert [event["step_id"] for _, event in events] == ["fetching", "analyzing", "complete"]
+    assert [event_id for event_id, _ in events] == sorted({event_id for event_id, _ in events})
+
+    resumed = collect(bus, "t", last_event_id=events[0][0])
+    assert resumed == events[1:]
+    assert collect(bus, "t", last_event_id=events[-1][0]) == []
+
+
+def test_live_subscriber_receives_new_events_until_final():
+    async def run():
+        bus = TaskEventBus()
+        bus.publish("t", {"step_id": "fetching"})
+        received = []
+
+        async def consume():
+            async for item in bus.stream("t", heartbeat=0.01):
+                received.append(item)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.03)
+        bus.publish("t", {"step_id": "complete"}, final=True)
+        await asyncio.wait_for(consumer, 1)
+        return received
+
+    received = asyncio.run(run())
+    steps = [item[1]["step_id"] for item in received if item is not None]
+    assert steps == ["fetching", "complete"]
+    assert None in received
+
+
+def test_format_sse():
+    assert format_sse(7, {"step": "完成"}) == 'id: 7\nevent: status\ndata: {"step": "完成"}\n\n'
+    assert format_sse(None, None).startswith(": keep-alive")
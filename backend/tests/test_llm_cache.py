@@ -0,0 +1,76 @@
+import asyncio
+
+import analysis
+import llm
+import llm_cache
+from fake_llm import FakeMessage
+from llm import LLM_FAST_MODEL, LLM_MODEL, LLM_TEMPERATURE
+from llm_cache import LLMCache, make_key
+
+PROMPT = "总结：{analysis}"
+VARIABLES = {"analysis": "整合结果"}
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return FakeMessage(f"answer {self.calls}")
+
+
+def test_repeated_prompt_hits_the_cache(monkeypatch):
+    cache = LLMCache(":memory:")
+    model = CountingLLM()
+    monkeypatch.setattr(analysis, "llm_cache", cache)
+    monkeypatch.setitem(llm._llms, LLM_MODEL, model)
+
+    first = asyncio.run(analysis.complete(PROMPT, route="summary", **VARIABLES))
+    second = asyncio.run(analysis.complete(PROMPT, route="summary", **VARIABLES))
+    uncached = asyncio.run(analysis.complete(PROMPT, use_cache=False, route="summary", **VARIABLES))
+
+    assert first == second == "answer 1"
+    assert uncached == "answer 2"
+    assert model.calls == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_different_inputs_model_or_temperature_miss():
+    key = make_key(PROMPT, LLM_MODEL, LLM_TEMPERATURE, VARIABLES)
+
+    assert key == make_key(PROMPT, LLM_MODEL, LLM_TEMPERATURE, dict(VARIABLES))
+    assert key != make_key(PROMPT, LLM_FAST_MODEL, LLM_TEMPERATURE, VARIABLES)
+    assert key != make_key(PROMPT, LLM_MODEL, LLM_TEMPERATURE + 0.1, VARIABLES)
+    assert key != make_key(PROMPT, LLM_MODEL, LLM_TEMPERATURE, {"analysis": "别的结果"})
+    assert key != make_key("摘要：{analysis}", LLM_MODEL, LLM_TEMPERATURE, VARIABLES)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMCache(":memory:", ttl=60)
+    cache.set("key", "value")
+
+    now[0] += 59
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMCache(":memory:", max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set(key, key)
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", "c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
@@ -0,0 +1,70 @@
+import asyncio
+
+from llm_gateway import LLMGateway
+
+
+class SlowLLM:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return prompt
+
+
+def make_gateway(limit: int) -> LLMGateway:
+    return LLMGateway(rpm=0, tpm=0, min_concurrency=limit, max_concurrency=limit, initial_concurrency=limit)
+
+
+def test_cancelled_calls_release_their_slot():
+    async def run():
+        gateway = make_gateway(2)
+        slow = SlowLLM(10)
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(gateway.ainvoke("slow", llm=slow), 0.01)
+            except asyncio.TimeoutError:
+                pass
+        assert gateway.in_flight == 0
+        return await asyncio.wait_for(gateway.ainvoke("fast", llm=SlowLLM(0)), 1)
+
+    assert asyncio.run(run()) == "fast"
+
+
+def test_cancelling_a_queued_call_does_not_leak():
+    async def run():
+        gateway = make_gateway(1)
+        running = asyncio.create_task(gateway.ainvoke("first", llm=SlowLLM(0.05)))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(gateway.ainvoke("second", llm=SlowLLM(0)))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        assert await running == "first"
+        assert gateway.in_flight == 0
+        assert await gateway.ainvoke("third", llm=SlowLLM(0)) == "third"
+
+    asyncio.run(run())
+
+
+def test_retries_retryable_errors():
+    class Flaky:
+        def __init__(self):
+            self.calls = 0
+
+        async def ainvoke(self, prompt):
+            self.calls += 1
+            if self.calls == 1:
+                raise asyncio.TimeoutError()
+            return prompt
+
+    async def run():
+        gateway = make_gateway(1)
+        gateway._backoff = lambda attempt, error: 0
+        flaky = Flaky()
+        assert await gateway.ainvoke("ok", llm=flaky) == "ok"
+        assert flaky.calls == 2
+        assert gateway.in_flight == 0
+
+    asyncio.run(run())
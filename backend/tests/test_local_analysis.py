@@ -0,0 +1,61 @@
+import pytest
+
+from local_analysis import OpinionFeatureCache, analyze, percentages, sentiment_score
+
+OPINIONS = [
+    "房价太高了，年轻人买不起房子",
+    "房价太高，买不起房子压力很大",
+    "希望房价稳定，支持保障房建设",
+    "支持人工智能创新，期待更多机会",
+    "人工智能会取代工作，担心失业",
+    "人工智能发展很快，值得期待",
+    "今天天气不错",
+]
+
+
+def test_sentiment_respects_negation():
+    assert sentiment_score("支持") == 1
+    assert sentiment_score("不支持") == -1
+    assert sentiment_score("不满") == -1
+
+
+@pytest.mark.parametrize("counts", [
+    {"positive": 1, "neutral": 1, "negative": 1},
+    {"positive": 2, "neutral": 3, "negative": 2},
+    {"positive": 0, "neutral": 0, "negative": 5},
+])
+def test_percentages_sum_to_100(counts):
+    result = percentages(counts)
+    assert round(sum(result.values()), 1) == 100
+    assert all(abs(result[label] - 100 * counts[label] / sum(counts.values())) < 0.1 for label in counts)
+
+
+def test_analyze_extracts_sentiment_and_key_topics():
+    result = analyze(OPINIONS, clusters=2)
+
+    assert result["sentiment_counts"] == {"positive": 3, "neutral": 1, "negative": 3}
+    assert round(sum(result["sentiment_analysis"].values()), 1) == 100
+    topics = "".join(result["key_topics"])
+    assert "房价" in topics
+    assert "人工智能" in topics or "智能" in topics
+    assert sum(cluster["size"] for cluster in result["clusters"]) == len(OPINIONS)
+
+
+def test_empty_input():
+    assert analyze([])["key_topics"] == []
+
+
+def test_features_are_cached_per_opinion_with_a_per_call_vocabulary():
+    cache = OpinionFeatureCache(max_size=10)
+    features, vocabulary = cache.features(OPINIONS[:2])
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    cache.features(OPINIONS[3:6])
+    repeated, repeated_vocabulary = cache.features(OPINIONS[:2] + OPINIONS[:1])
+    assert (cache.hits, cache.misses) == (2, 5)
+
+    assert repeated_vocabulary == vocabulary
+    for (ids, counts, score), (expected_ids, expected_counts, expected_score) in zip(repeated, features + features[:1]):
+        assert [vocabulary[i] for i in ids] == [vocabulary[i] for i in expected_ids]
+        assert list(counts) == list(expected_counts)
+        assert score == expected_score
@@ -0,0 +1,137 @@
+import hashlib
+
+import pytest
+from eth_abi import encode
+from web3 import Web3
+
+from chain import WORLD_RECORD_ABI
+from opinion_index import OpinionIndex
+
+ADDRESS = Web3.to_checksum_address("0x" + "11" * 20)
+SENDER = Web3.to_checksum_address("0x" + "22" * 20)
+OPINION_ADDED = Web3.keccak(text="OpinionAdded(bytes32,address)")
+
+
+def opinion_hash(content: str) -> bytes:
+    return hashlib.sha256(content.encode()).digest()
+
+
+class FakeChain:
+    def __init__(self, topic_opinions):
+        self.eth = self
+        self.contract = Web3().eth.contract(address=ADDRESS, abi=WORLD_RECORD_ABI)
+        self.contract_address = ADDRESS
+        self.topic_opinions = topic_opinions
+        self.contents = {}
+        self.blocks = [{"hash": b"\x00" * 32, "logs": []}]
+
+    def keccak(self, text):
+        return Web3.keccak(text=text)
+
+    @property
+    def block_number(self):
+        return len(self.blocks) - 1
+
+    def get_block(self, number):
+        return {"hash": self.blocks[number]["hash"]}
+
+    def get_logs(self, params):
+        return [log for number in range(params["fromBlock"], params["toBlock"] + 1)
+                for log in self.blocks[number]["logs"]]
+
+    def mine(self, *contents, fork: str = ""):
+        number = len(self.blocks)
+        block_hash = hashlib.sha256(f"{number}{fork}".encode()).digest()
+        logs = []
+        for i, content in enumerate(contents):
+            self.contents[opinion_hash(content)] = content
+            logs.append({
+                "address": ADDRESS,
+                "topics": [OPINION_ADDED],
+                "data": encode(["bytes32", "address"], [opinion_hash(content), SENDER]),
+                "blockNumber": number,
+                "blockHash": block_hash,
+                "logIndex": i,
+                "transactionIndex": i,
+                "transactionHash": hashlib.sha256(f"{number}{fork}{i}".encode()).digest(),
+            })
+        self.blocks.append({"hash": block_hash, "logs": logs})
+
+    def reorg(self, number: int):
+        del self.blocks[number:]
+
+    def read_opinions(self, hashes):
+        return [(h, SENDER, self.contents[h], 0) for h in hashes]
+
+    def get_topic_opinions(self, topic_id):
+        return [opinion_hash(content) for content in self.topic_opinions.get(topic_id, [])]
+
+    def get_next_topic_id(self):
+        return 2
+
+    def read_topic(self, topic_id):
+        return {"id": topic_id, "content": "默认话题", "priority": "medium", "urgency": "normal", "summary": ""}
+
+
+@pytest.fixture
+def chain():
+    return FakeChain({1: ["链上观点"]})
+
+
+@pytest.fixture
+def index(chain):
+    return OpinionIndex(chain, chain, path=":memory:")
+
+
+def test_reorg_rolls_back_and_keeps_receipt_links(chain, index):
+    chain.mine("链上观点")
+    index.sync()
+    chain.mine("用户观点")
+    index.sync()
+    index.link_opinions(1, ["0x" + opinion_hash("用户观点").hex()], 2)
+    assert index.get_topic_opinion_contents(1) == ["链上观点", "用户观点"]
+    generation = index.generation()
+
+    chain.reorg(2)
+    chain.mine(fork="b")
+    index.sync()
+
+    assert index.generation() == generation + 1
+    assert index.count() == 1
+    assert index.get_topic_opinion_contents(1) == ["链上观点"]
+
+    chain.mine("用户观点", fork="b")
+    index.sync()
+
+    assert index.count() == 2
+    assert index.get_topic_opinion_contents(1) == ["链上观点", "用户观点"]
+
+
+def test_notifies_topic_changes_only_after_catch_up(chain, index):
+    changes = []
+    index.subscribe(lambda topic_id, reason: changes.append((topic_id, reason)))
+    chain.mine("链上观点")
+    index.sync()
+    assert changes == []
+
+    index.link_opinions(1, ["0x" + opinion_hash("新观点").hex()], 1)
+    chain.mine("新观点")
+    index.sync()
+
+    assert changes == [(1, "opinion_added"), (1, "opinion_added")]
+
+
+def test_watermark_stops_at_links_the_index_has_not_synced(chain, index):
+    chain.mine("链上观点")
+    index.sync()
+    index.link_opinions(1, ["0x" + opinion_hash("用户观点").hex()], 2)
+
+    assert index.latest_topic_position(1) == 1
+    assert index.indexed_topic_position(1) == 0
+    assert index.get_topic_opinion_contents(1, until=index.indexed_topic_position(1)) == ["链上观点"]
+
+    chain.mine("用户观点")
+    index.sync()
+
+    assert index.indexed_topic_position(1) == 1
+    assert index.get_topic_opinion_contents(1, 0, 1) == ["用户观点"]
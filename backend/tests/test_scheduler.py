@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from scheduler import AnalysisScheduler
+from topic_state import topic_state
+
+
+class FakeIndex:
+    def __init__(self, positions):
+        self.positions = positions
+
+    def indexed_topic_position(self, topic_id):
+        return self.positions.get(topic_id)
+
+
+@pytest.fixture
+def created(monkeypatch):
+    tasks = []
+
+    def create_task(topic_id, priority):
+        tasks.append((topic_id, priority))
+        return f"task-{len(tasks)}"
+
+    monkeypatch.setattr(scheduler.WorkflowManager, "create_task", staticmethod(create_task))
+    return tasks
+
+
+def make_scheduler(path, **options):
+    settings = dict(debounce=0.05, max_staleness=10, min_interval=0, max_runs_per_minute=10)
+    settings.update(options)
+    return AnalysisScheduler(path=str(path), **settings)
+
+
+def tick(instance, delay=0.0):
+    async def run():
+        await asyncio.sleep(delay)
+        await instance.tick()
+    asyncio.run(run())
+
+
+def test_burst_of_events_runs_one_analysis_after_debounce(tmp_path, created):
+    instance = make_scheduler(tmp_path / "s.db")
+    for _ in range(10):
+        instance.mark_dirty(1)
+    instance.mark_dirty(2, "topic_created")
+
+    tick(instance)
+    assert created == []
+
+    tick(instance, 0.06)
+    assert created == [(1, "batch"), (2, "batch")]
+    tick(instance, 0.06)
+    assert len(created) == 2
+
+
+def test_max_staleness_fires_during_continuous_activity(tmp_path, created):
+    instance = make_scheduler(tmp_path / "s.db", debounce=10, max_staleness=0.05)
+    instance.mark_dirty(1)
+    tick(instance, 0.06)
+    instance.mark_dirty(1)
+    tick(instance)
+
+    assert created == [(1, "batch")]
+
+
+def test_min_interval_and_rate_limit(tmp_path, created):
+    instance = make_scheduler(tmp_path / "s.db", debounce=0, min_interval=60, max_runs_per_minute=2)
+    for topic_id in (1, 2, 3):
+        instance.mark_dirty(topic_id)
+    tick(instance)
+    assert [topic_id for topic_id, _ in created] == [1, 2]
+
+    instance.mark_dirty(1)
+    tick(instance)
+    assert len(created) == 2
+
+
+def test_only_the_lease_holder_schedules(tmp_path, created):
+    first = make_scheduler(tmp_path / "s.db", debounce=0)
+    second = make_scheduler(tmp_path / "s.db", debounce=0)
+    assert first.try_lead()
+    assert not second.try_lead()
+
+    second.mark_dirty(1)
+    tick(second)
+    assert created == []
+    tick(first)
+    assert created == [(1, "batch")]
+
+    first.release()
+    assert second.try_lead()
+
+
+def test_changes_covered_by_the_last_run_are_skipped(tmp_path, created):
+    instance = make_scheduler(tmp_path / "s.db", debounce=0)
+    instance.opinion_index = FakeIndex({7: 4})
+    topic_state.save(7, "整合", "分析", 4, 5, 0)
+    try:
+        instance.note_run(7, "interactive-task")
+        instance.mark_dirty(7)
+        tick(instance)
+        assert created == []
+        assert instance.skipped == 1
+
+        instance.opinion_index.positions[7] = 5
+        instance.mark_dirty(7)
+        tick(instance)
+        assert created == [(7, "batch")]
+    finally:
+        topic_state.reset(7)
@@ -0,0 +1,43 @@
+import pytest
+
+import workflow
+from task_store import MemoryTaskStore, TaskStore
+from workflow import StatusUpdate, WorkflowManager, WorkflowTask, running_tasks
+
+
+class CountingStore(MemoryTaskStore):
+    def __init__(self):
+        super().__init__(WorkflowTask)
+        self.saves = 0
+
+    def save(self, task):
+        self.saves += 1
+        super().save(task)
+
+
+def test_task_store_is_abstract():
+    with pytest.raises(TypeError):
+        TaskStore()
+
+
+def test_streamed_partials_are_not_persisted(monkeypatch):
+    store = CountingStore()
+    monkeypatch.setattr(workflow, "task_store", store)
+    task = WorkflowTask(task_id="partials", topic_id=1)
+    running_tasks[task.task_id] = task
+    try:
+        update = lambda status, details: WorkflowManager.update_task_status(
+            task.task_id, StatusUpdate(step_id="ai_summarizing", status=status, details=details)
+        )
+        update("processing", "")
+        for i in range(50):
+            update("processing", "x" * i)
+        assert store.saves == 1
+        assert task.history[-1]["details"] == "x" * 49
+
+        update("complete", "done")
+        WorkflowManager.update_task_status(task.task_id, StatusUpdate(step_id="complete", status="complete"))
+        assert store.saves == 3
+        assert store.get(task.task_id).status == "complete"
+    finally:
+        running_tasks.pop(task.task_id, None)
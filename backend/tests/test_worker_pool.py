@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from worker_pool import QueueFull, WorkerPool
+
+
+def test_jobs_for_the_same_topic_never_overlap():
+    async def scenario():
+        pool = WorkerPool(workers=4, max_queue=20)
+        running = {1: 0, 2: 0}
+        peak = {1: 0, 2: 0}
+        order = []
+
+        def job(topic_id, n):
+            async def run():
+                running[topic_id] += 1
+                peak[topic_id] = max(peak[topic_id], running[topic_id])
+                await asyncio.sleep(0.01)
+                order.append((topic_id, n))
+                running[topic_id] -= 1
+            return run
+
+        for n in range(3):
+            pool.submit(1, job(1, n))
+            pool.submit(2, job(2, n))
+        while pool.completed < 6:
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return peak, order
+
+    peak, order = asyncio.run(scenario())
+    assert peak == {1: 1, 2: 1}
+    assert [n for topic_id, n in order if topic_id == 1] == [0, 1, 2]
+
+
+def test_full_queue_raises_with_retry_after():
+    async def scenario():
+        pool = WorkerPool(workers=1, max_queue=2)
+        pool.avg_duration = 10.0
+        release = asyncio.Event()
+
+        async def job():
+            await release.wait()
+
+        pool.submit(1, job)
+        await asyncio.sleep(0)
+        pool.submit(1, job)
+        pool.submit(2, job)
+        with pytest.raises(QueueFull) as excinfo:
+            pool.submit(3, job)
+        release.set()
+        await pool.stop()
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after == 30
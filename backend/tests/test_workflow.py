@@ -0,0 +1,96 @@
+import uuid
+import asyncio
+
+import pytest
+
+import workflow
+from analysis import ANALYSIS_FAILED
+from benchmarks.fakes import FakeAIOracleContract, FakeOpinionIndex, FakeWorldRecordContract, make_opinions
+from chain import chain_client
+from topic_state import topic_state
+from workflow import WorkflowManager, WorkflowTask, running_tasks
+
+
+@pytest.fixture
+def opinion_index(monkeypatch):
+    index = FakeOpinionIndex({1: make_opinions(20, seed=1)})
+    world_record = FakeWorldRecordContract(index)
+    monkeypatch.setattr(chain_client, "_opinion_index", index)
+    monkeypatch.setattr(chain_client, "_world_record", world_record)
+    monkeypatch.setattr(chain_client, "_ai_oracle", FakeAIOracleContract(world_record))
+    topic_state.reset(1)
+    yield index
+    topic_state.reset(1)
+
+
+def run_task(content=None, **options):
+    task = WorkflowTask(task_id=str(uuid.uuid4()), topic_id=1, content=content,
+                        demo_pacing=False, use_cache=False, stream_tokens=False, **options)
+    running_tasks[task.task_id] = task
+
+    async def run():
+        await WorkflowManager.process_task(task.task_id, content)
+        await workflow.write_back.stop()
+
+    asyncio.run(run())
+    return task
+
+
+def test_run_without_content_saves_topic_state(opinion_index):
+    task = run_task()
+
+    assert task.status == "complete"
+    state = topic_state.get(1)
+    assert state["watermark"] == opinion_index.indexed_topic_position(1)
+    assert state["total_opinions"] == 20
+
+
+def test_submitted_opinion_outside_the_watermark_is_not_saved(opinion_index):
+    task = run_task(content="一条还没有上链的新观点")
+
+    assert task.status == "complete"
+    assert task.result["total_opinions"] == 21
+    assert topic_state.get(1) is None
+
+
+def test_failed_analysis_is_not_saved(opinion_index, monkeypatch):
+    async def failed(*args, **kwargs):
+        return ANALYSIS_FAILED
+
+    monkeypatch.setattr(workflow, "analyze_topics_and_sentiment", failed)
+    task = run_task()
+
+    assert task.status == "complete"
+    assert topic_state.get(1) is None
+
+
+def test_sync_failure_still_reads_the_local_index(opinion_index, monkeypatch):
+    def broken_sync():
+        raise ConnectionError("rpc down")
+
+    monkeypatch.setattr(opinion_index, "sync", broken_sync)
+    task = run_task()
+
+    assert task.status == "complete"
+    assert task.result["total_opinions"] == 20
+
+
+def test_link_that_lands_before_the_index_syncs_is_merged_later(opinion_index, monkeypatch):
+    latest = opinion_index.latest_topic_position(1)
+    monkeypatch.setattr(opinion_index, "indexed_topic_position", lambda topic_id: latest - 1)
+    run_task()
+    assert topic_state.get(1)["watermark"] == latest - 1
+
+    merged = []
+
+    async def merge(previous, opinions, use_cache=True):
+        merged.extend(opinions)
+        return previous
+
+    monkeypatch.setattr(workflow, "merge_analysis", merge)
+    monkeypatch.setattr(opinion_index, "indexed_topic_position", lambda topic_id: latest)
+    run_task()
+
+    assert merged == opinion_index.get_topic_opinion_contents(1, latest - 1)
+    assert len(merged) == 1
+    assert topic_state.get(1)["watermark"] == latest
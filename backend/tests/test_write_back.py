@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeAIOracleContract, FakeOpinionIndex, FakeWorldRecordContract
+from chain import chain_client
+from transactions import TransactionTracker
+from write_back import WriteBackQueue
+
+ECONOMY = {"field": 1}
+CULTURE = {"field": 2}
+
+
+class RecordingOracle(FakeAIOracleContract):
+    def __init__(self, world_record, failures):
+        super().__init__(world_record)
+        self.failures = failures
+        self.calls = []
+
+    def _maybe_fail(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("rpc down")
+
+    def submit_analysis(self, topic_id, summary, economy, culture):
+        self._maybe_fail()
+        self.calls.append(("analysis", [topic_id], economy, culture))
+        return super().submit_analysis(topic_id, summary, economy, culture)
+
+    def submit_summaries(self, summaries):
+        self._maybe_fail()
+        self.calls.append(("summaries", list(summaries)))
+        return super().submit_summaries(summaries)
+
+
+class CountingWorldRecord(FakeWorldRecordContract):
+    reads = 0
+
+    def read_world_state(self):
+        self.reads += 1
+        return super().read_world_state()
+
+
+@pytest.fixture
+def oracle(monkeypatch):
+    def install(failures=0):
+        world_record = CountingWorldRecord(FakeOpinionIndex({}))
+        ai_oracle = RecordingOracle(world_record, failures)
+        monkeypatch.setattr(chain_client, "_ai_oracle", ai_oracle)
+        monkeypatch.setattr(chain_client, "_tx_tracker", TransactionTracker(None))
+        return ai_oracle
+    return install
+
+
+def run(queue, *steps):
+    async def scenario():
+        for step in steps:
+            await step()
+        await queue.stop()
+    asyncio.run(scenario())
+
+
+def test_summaries_coalesce_per_topic_and_batch_across_topics(oracle):
+    ai_oracle = oracle()
+    queue = WriteBackQueue(interval=60, max_batch=2)
+
+    async def submit():
+        for n in range(3):
+            queue.submit(1, f"summary {n}")
+        queue.submit(2, "other")
+        queue.submit(3, "third")
+
+    run(queue, submit, queue.flush)
+
+    assert ai_oracle.calls == [("summaries", [1, 2]), ("summaries", [3])]
+    assert ai_oracle.summaries == {1: "summary 2", 2: "other", 3: "third"}
+    assert ai_oracle.world_record.reads == 0
+    assert queue.stats()["coalesced"] == 2
+    assert queue.stats()["transactions"] == 2
+    assert queue.stats()["in_flight"] == 3
+
+
+def test_economy_and_culture_are_sent_only_when_produced(oracle):
+    ai_oracle = oracle()
+    queue = WriteBackQueue(interval=60)
+
+    async def submit():
+        queue.submit(1, "summary", economy=ECONOMY)
+        queue.submit(2, "summary only")
+
+    run(queue, submit, queue.flush)
+
+    state = ai_oracle.world_record.read_world_state()
+    assert ai_oracle.calls == [("analysis", [1], ECONOMY, state["culture"]), ("summaries", [2])]
+
+
+def test_failed_batch_is_retried_topic_by_topic(oracle):
+    ai_oracle = oracle(failures=1)
+    queue = WriteBackQueue(interval=60, backoff=0.01)
+
+    async def submit():
+        queue.submit(1, "one")
+        queue.submit(2, "two")
+
+    async def wait():
+        await asyncio.sleep(0.02)
+
+    run(queue, submit, queue.flush, wait, queue.flush)
+
+    assert ai_oracle.calls == [("summaries", [1]), ("summaries", [2])]
+    assert ai_oracle.summaries == {1: "one", 2: "two"}
+    assert queue.stats()["sent"] == 2
+
+
+def test_reverted_transaction_is_resubmitted_then_given_up(oracle):
+    ai_oracle = oracle()
+    queue = WriteBackQueue(interval=60, max_retries=1, backoff=0)
+
+    async def submit():
+        queue.submit(1, "summary")
+
+    async def revert():
+        for tx_hash in chain_client.tx_tracker.pending():
+            chain_client.tx_tracker._update(tx_hash, status="failed", error="reverted")
+        queue._check_receipts()
+
+    run(queue, submit, queue.flush, revert, queue.flush, revert)
+
+    assert ai_oracle.transactions == 2
+    assert queue.stats()["failed"] == 1
+    assert queue.stats()["pending"] == 0
@@ -0,0 +1,49 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+TOPIC_STATE_PATH = os.getenv('TOPIC_STATE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topic_state.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topic_state (
+    topic_id         INTEGER PRIMARY KEY,
+    integration      TEXT NOT NULL,
+    analysis         TEXT NOT NULL,
+    watermark        INTEGER NOT NULL,
+    total_opinions   INTEGER NOT NULL,
+    incremental_runs INTEGER NOT NULL,
+    updated_at       REAL NOT NULL
+);
+"""
+
+
+class TopicStateStore:
+    def __init__(self, path: str = TOPIC_STATE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def get(self, topic_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM topic_state WHERE topic_id = ?", (topic_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save(self, topic_id: int, integration: str, analysis: str, watermark: int,
+             total_opinions: int, incremental_runs: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topic_state "
+                "(topic_id, integration, analysis, watermark, total_opinions, incremental_runs, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (topic_id, integration, analysis, watermark, total_opinions, incremental_runs, time.time())
+            )
+
+    def reset(self, topic_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM topic_state WHERE topic_id = ?", (topic_id,))
+
+
+topic_state = TopicStateStore()
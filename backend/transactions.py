@@ -0,0 +1,135 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TX_POLL_INTERVAL = float(os.getenv('TX_POLL_INTERVAL', '1'))
+TX_RECEIPT_TIMEOUT = float(os.getenv('TX_RECEIPT_TIMEOUT', '300'))
+TX_TRACKER_MAX_RECORDS = int(os.getenv('TX_TRACKER_MAX_RECORDS', '10000'))
+
+
+class NonceManager:
+    def __init__(self, web3_instance, address: str):
+        self.w3 = web3_instance
+        self.address = address
+        self.lock = threading.RLock()
+        self._next_nonce: Optional[int] = None
+
+    def allocate(self) -> int:
+        if self._next_nonce is None:
+            self._next_nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+        nonce = self._next_nonce
+        self._next_nonce += 1
+        return nonce
+
+    def resync(self):
+        with self.lock:
+            self._next_nonce = None
+        logger.info(f"Nonce for {self.address} will be resynced from the node")
+
+
+class TransactionTracker:
+    def __init__(self, web3_instance, nonce_managers=None, max_records: int = TX_TRACKER_MAX_RECORDS,
+                 receipt_timeout: float = TX_RECEIPT_TIMEOUT):
+        self.w3 = web3_instance
+        self.nonce_managers = [m for m in (nonce_managers or []) if m is not None]
+        self.max_records = max_records
+        self.receipt_timeout = receipt_timeout
+        self._records: "OrderedDict[str, Dict]" = OrderedDict()
+        self._callbacks: Dict[str, Callable[[Dict], Dict]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, tx_hash: str, kind: str, on_receipt: Optional[Callable[[Dict], Dict]] = None, **meta) -> Dict:
+        record = {
+            "transaction_hash": tx_hash,
+            "kind": kind,
+            "status": "pending",
+            "submitted_at": time.time(),
+            "block_number": None,
+            "gas_used": None,
+            "error": None,
+            **meta
+        }
+        with self._lock:
+            self._records[tx_hash] = record
+            if on_receipt:
+                self._callbacks[tx_hash] = on_receipt
+            while len(self._records) > self.max_records:
+                evicted, _ = self._records.popitem(last=False)
+                self._callbacks.pop(evicted, None)
+        return record
+
+    def get(self, tx_hash: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._records.get(tx_hash)
+            return dict(record) if record else None
+
+    def pending(self):
+        with self._lock:
+            return [h for h, r in self._records.items() if r["status"] == "pending"]
+
+    def _update(self, tx_hash: str, **fields):
+        with self._lock:
+            record = self._records.get(tx_hash)
+            if record:
+                record.update(fields)
+
+    def poll_once(self):
+        from web3.exceptions import TransactionNotFound
+        dropped = False
+        for tx_hash in self.pending():
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                record = self.get(tx_hash)
+                if record and time.time() - record["submitted_at"] > self.receipt_timeout:
+                    self._update(tx_hash, status="dropped", error="Receipt not found before timeout")
+                    with self._lock:
+                        self._callbacks.pop(tx_hash, None)
+                    logger.warning(f"Transaction {tx_hash} dropped after {self.receipt_timeout}s")
+                    dropped = True
+                continue
+
+            status = "confirmed" if receipt["status"] == 1 else "failed"
+            extra = {}
+            with self._lock:
+                callback = self._callbacks.pop(tx_hash, None)
+            if callback and status == "confirmed":
+                try:
+                    extra = callback(receipt)
+                except Exception as e:
+                    logger.error(f"Error handling receipt of {tx_hash}: {str(e)}")
+            self._update(
+                tx_hash,
+                status=status,
+                block_number=receipt["blockNumber"],
+                gas_used=receipt["gasUsed"],
+                error=None if status == "confirmed" else "Transaction failed",
+                **extra
+            )
+            logger.info(f"Transaction {tx_hash} {status} in block {receipt['blockNumber']}")
+
+        if dropped:
+            for nonce_manager in self.nonce_managers:
+                nonce_manager.resync()
+
+    async def wait(self, tx_hash: str, interval: float = TX_POLL_INTERVAL) -> Dict:
+        while True:
+            record = self.get(tx_hash)
+            if record is None or record["status"] != "pending":
+                return record
+            await asyncio.sleep(interval)
+
+    async def run(self, interval: float = TX_POLL_INTERVAL):
+        while True:
+            try:
+                if self.pending():
+                    await asyncio.to_thread(self.poll_once)
+            except Exception as e:
+                logger.error(f"Error polling transaction receipts: {str(e)}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,106 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_WORKERS = int(os.getenv('WORKFLOW_WORKERS', '4'))
+WORKFLOW_QUEUE_SIZE = int(os.getenv('WORKFLOW_QUEUE_SIZE', '100'))
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Workflow queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    def __init__(self, workers: int = WORKFLOW_WORKERS, max_queue: int = WORKFLOW_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.avg_duration: Optional[float] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._active_topics = set()
+        self._deferred: Dict[int, Deque[Callable[[], Awaitable[None]]]] = {}
+
+    def _ensure_started(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} workflow workers (queue size {self.max_queue})")
+
+    def depth(self) -> int:
+        queued = self._queue.qsize() if self._queue else 0
+        return queued + sum(len(jobs) for jobs in self._deferred.values())
+
+    def retry_after(self) -> int:
+        per_job = self.avg_duration or 30.0
+        return max(1, math.ceil(per_job * (self.depth() + 1) / self.workers))
+
+    def submit(self, topic_id: int, job: Callable[[], Awaitable[None]]) -> int:
+        self._ensure_started()
+        if self.depth() >= self.max_queue:
+            raise QueueFull(self.retry_after())
+        self._queue.put_nowait((topic_id, job))
+        return self.depth()
+
+    async def _run(self, index: int, job: Callable[[], Awaitable[None]]):
+        started = time.perf_counter()
+        self.busy += 1
+        try:
+            await job()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Workflow worker {index} job failed: {str(e)}")
+        finally:
+            self.busy -= 1
+            duration = time.perf_counter() - started
+            self.avg_duration = duration if self.avg_duration is None else 0.8 * self.avg_duration + 0.2 * duration
+
+    async def _worker(self, index: int):
+        while True:
+            topic_id, job = await self._queue.get()
+            if topic_id in self._active_topics:
+                self._deferred.setdefault(topic_id, deque()).append(job)
+                continue
+
+            self._active_topics.add(topic_id)
+            try:
+                while job is not None:
+                    await self._run(index, job)
+                    pending = self._deferred.get(topic_id)
+                    job = pending.popleft() if pending else None
+                    if pending is not None and not pending:
+                        del self._deferred[topic_id]
+            finally:
+                self._active_topics.discard(topic_id)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queue_depth": self.depth(),
+            "queue_capacity": self.max_queue,
+            "active_topics": len(self._active_topics),
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_duration": round(self.avg_duration, 3) if self.avg_duration is not None else None
+        }
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+workflow_pool = WorkerPool()
@@ -1,14 +1,37 @@
+import os
 import uuid
 import time
 import logging
-from typing import Dict, List, Optional
-from analysis import integrate_opinions, analyze_topics_and_sentiment, generate_summary, generate_recommendation
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from analysis import (
+    ANALYSIS_FAILED, integrate_opinions, analyze_topics_and_sentiment, generate_summary, generate_recommendation,
+    merge_integration, merge_analysis
+)
+from chain import chain_client
+from topic_state import topic_state
+from dedup import DEDUP_ENABLED, collapse, format_groups
+from local_analysis import analyze as analyze_locally
+from task_store import create_task_store
+from worker_pool import QueueFull, workflow_pool
+from write_back import write_back
+from llm import llm_usage, new_usage
+from llm_gateway import llm_priority
+from event_bus import EVENT_BUS_HEARTBEAT, event_id_at, task_events
+from metrics import (
+    TASK_STORE_SIZE, WORKFLOW_IN_FLIGHT, WORKFLOW_QUEUE_DEPTH, WORKFLOW_STEP_SECONDS, WORKFLOW_TASKS, span
+)
 import asyncio
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+WORKFLOW_DEMO_PACING = os.getenv('WORKFLOW_DEMO_PACING', 'false').lower() in ('1', 'true', 'yes')
+WORKFLOW_INCREMENTAL = os.getenv('WORKFLOW_INCREMENTAL', 'true').lower() in ('1', 'true', 'yes')
+WORKFLOW_RECOMPACT_EVERY = int(os.getenv('WORKFLOW_RECOMPACT_EVERY', '10'))
+WORKFLOW_STREAM_TOKENS = os.getenv('WORKFLOW_STREAM_TOKENS', 'true').lower() in ('1', 'true', 'yes')
+WORKFLOW_STREAM_POLL_INTERVAL = float(os.getenv('WORKFLOW_STREAM_POLL_INTERVAL', '1'))
+
 STEPS = [
     {
         "id": "waiting",
@@ -59,7 +82,7 @@ class StatusUpdate(BaseModel):
     step_id: str
     status: str
     details: Optional[str] = None
-    timestamp: float = time.time()
+    timestamp: float = Field(default_factory=time.time)
     progress: Optional[int] = None
 
 class WorkflowTask(BaseModel):
@@ -71,21 +94,176 @@ class WorkflowTask(BaseModel):
     status: str = "pending"
     history: List[Dict] = []
     result: Optional[Dict] = None
-    created_at: float = time.time()
-    updated_at: float = time.time()
+    created_at: float = Field(default_factory=time.time)
+    updated_at: float = Field(default_factory=time.time)
     error: Optional[str] = None
+    demo_pacing: bool = False
+    use_cache: bool = True
+    incremental: bool = True
+    stream_tokens: bool = True
+    priority: str = "interactive"
+    step_started: Dict[str, float] = {}
+    timings: Dict[str, float] = {}
+
+task_store = create_task_store(WorkflowTask)
+running_tasks: Dict[str, WorkflowTask] = {}
+
+WORKFLOW_IN_FLIGHT.set_function(lambda: len(running_tasks))
+WORKFLOW_QUEUE_DEPTH.set_function(workflow_pool.depth)
+TASK_STORE_SIZE.set_function(lambda: len(task_store))
+
+def read_topic_opinions(opinion_index, topic_id: int, state: Optional[Dict]) -> Tuple:
+    watermark = opinion_index.indexed_topic_position(topic_id)
+    if watermark is None:
+        return None, None, [], []
+    if state and state["watermark"] <= watermark and state["incremental_runs"] < WORKFLOW_RECOMPACT_EVERY:
+        opinion_contents = opinion_index.get_topic_opinion_contents(topic_id, state["watermark"], watermark)
+        corpus = opinion_index.get_topic_opinion_contents(topic_id, until=watermark)
+        logger.info(f"Topic {topic_id} opinion count: {len(corpus)}, new since last summary: {len(opinion_contents)}")
+        return watermark, state, opinion_contents, corpus
+    opinion_contents = opinion_index.get_topic_opinion_contents(topic_id, until=watermark)
+    logger.info(f"Topic {topic_id} opinion count: {len(opinion_contents)}")
+    return watermark, None, opinion_contents, opinion_contents
+
+async def fetch_opinions(task: WorkflowTask, results: Dict[str, Any]) -> Dict[str, Any]:
+    previous = None
+    watermark = None
+    uncovered = False
+    try:
+        opinion_index = await chain_client.get_opinion_index()
+        if not chain_client.syncing:
+            try:
+                await asyncio.to_thread(opinion_index.sync)
+            except Exception as e:
+                logger.warning(f"Opinion index sync failed, reading the local index: {str(e)}")
+        state = topic_state.get(task.topic_id) if task.incremental else None
+        watermark, previous, opinion_contents, corpus = await asyncio.to_thread(
+            read_topic_opinions, opinion_index, task.topic_id, state
+        )
+
+        if task.content and task.content not in corpus:
+            opinion_contents = opinion_contents + [task.content]
+            corpus = corpus + [task.content]
+            uncovered = True
+        total = len(corpus)
+    except Exception as e:
+        logger.error(f"Error in opinion processing: {str(e)}")
+        opinion_contents = [task.content] if task.content else []
+        corpus = opinion_contents
+        total = len(corpus)
+        uncovered = bool(task.content)
+        previous = None
+        watermark = None
+
+    fetched = len(opinion_contents)
+    if DEDUP_ENABLED and fetched > 1:
+        opinion_contents = format_groups(await asyncio.to_thread(collapse, opinion_contents))
+        if len(opinion_contents) < fetched:
+            logger.info(f"Collapsed {fetched} opinions into {len(opinion_contents)} distinct ones")
+    return {
+        "contents": opinion_contents,
+        "corpus": corpus,
+        "total": total,
+        "fetched": fetched,
+        "duplicates": fetched - len(opinion_contents),
+        "watermark": watermark,
+        "uncovered": uncovered,
+        "previous": previous
+    }
 
-tasks: Dict[str, WorkflowTask] = {}
+async def integrate_stage(task: WorkflowTask, results: Dict[str, Any]) -> str:
+    opinions = results["opinions"]
+    previous = opinions["previous"]
+    if previous is None:
+        return await integrate_opinions(opinions["contents"], use_cache=task.use_cache)
+    if not opinions["contents"]:
+        return previous["integration"]
+    return await merge_integration(previous["integration"], opinions["contents"], use_cache=task.use_cache)
+
+async def analysis_stage(task: WorkflowTask, results: Dict[str, Any]) -> str:
+    opinions = results["opinions"]
+    previous = opinions["previous"]
+    if previous is None:
+        return await analyze_topics_and_sentiment(opinions["contents"], use_cache=task.use_cache)
+    if not opinions["contents"]:
+        return previous["analysis"]
+    return await merge_analysis(previous["analysis"], opinions["contents"], use_cache=task.use_cache)
+
+async def local_analysis_stage(task: WorkflowTask, results: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(analyze_locally, results["opinions"]["corpus"])
+
+def partial_details(task: WorkflowTask, step_id: str) -> Optional[Callable[[str], None]]:
+    if not task.stream_tokens:
+        return None
+    return lambda text: WorkflowManager.update_task_status(
+        task.task_id, StatusUpdate(step_id=step_id, status="processing", details=text)
+    )
+
+async def summary_stage(task: WorkflowTask, results: Dict[str, Any]) -> str:
+    return await generate_summary(results["integration"], use_cache=task.use_cache,
+                                  on_partial=partial_details(task, "ai_summarizing"))
+
+async def recommendation_stage(task: WorkflowTask, results: Dict[str, Any]) -> str:
+    return await generate_recommendation(results["integration"], use_cache=task.use_cache,
+                                         on_partial=partial_details(task, "ai_recommendation"))
+
+def describe_opinions(opinions: Dict[str, Any]) -> str:
+    message = f"已收集到 {opinions['total']} 条相关观点"
+    if opinions["previous"] is not None:
+        message += f"，其中新增 {opinions['fetched']} 条"
+    if opinions["duplicates"]:
+        message += f"，合并重复观点 {opinions['duplicates']} 条"
+    return message
+
+def describe_local_analysis(analysis: Dict[str, Any]) -> str:
+    sentiment = analysis["sentiment_analysis"]
+    message = f"情感分布：积极 {sentiment['positive']}%，中立 {sentiment['neutral']}%，消极 {sentiment['negative']}%"
+    if analysis["key_topics"]:
+        message += f"；热点话题：{' / '.join(analysis['key_topics'])}"
+    return message
+
+class Stage:
+    def __init__(self, name: str, step_id: str, run: Callable[[WorkflowTask, Dict[str, Any]], Awaitable[Any]],
+                 deps: Tuple[str, ...] = (), describe: Callable[[Any], str] = None):
+        self.name = name
+        self.step_id = step_id
+        self.run = run
+        self.deps = deps
+        self.describe = describe or (lambda output: output)
+
+STEP_MESSAGES = {
+    "ai_fetching": "正在收集相关观点数据...",
+    "ai_analyzing": "正在进行观点聚类分析...",
+    "ai_summarizing": "正在生成总结和建议...",
+    "ai_recommendation": "正在基于分析结果生成建议..."
+}
+
+WORKFLOW_STAGES = [
+    Stage("opinions", "ai_fetching", fetch_opinions, describe=describe_opinions),
+    Stage("local_analysis", "ai_analyzing", local_analysis_stage, deps=("opinions",),
+          describe=describe_local_analysis),
+    Stage("integration", "ai_analyzing", integrate_stage, deps=("opinions",)),
+    Stage("analysis", "ai_analyzing", analysis_stage, deps=("opinions",)),
+    Stage("summary", "ai_summarizing", summary_stage, deps=("integration",)),
+    Stage("recommendations", "ai_recommendation", recommendation_stage, deps=("integration",)),
+]
 
 class WorkflowManager:
     @staticmethod
-    def create_task(topic_id: int, content: str = None, action: str = "full") -> str:
+    def create_task(topic_id: int, content: str = None, action: str = "full", demo_pacing: Optional[bool] = None,
+                    use_cache: bool = True, incremental: Optional[bool] = None,
+                    stream_tokens: Optional[bool] = None, priority: str = "interactive") -> str:
         task_id = str(uuid.uuid4())
         task = WorkflowTask(
             task_id=task_id,
             topic_id=topic_id,
             content=content,
-            action=action
+            action=action,
+            demo_pacing=WORKFLOW_DEMO_PACING if demo_pacing is None else demo_pacing,
+            use_cache=use_cache,
+            incremental=WORKFLOW_INCREMENTAL if incremental is None else incremental,
+            stream_tokens=WORKFLOW_STREAM_TOKENS if stream_tokens is None else stream_tokens,
+            priority=priority
         )
         
         task.history.append({
@@ -94,27 +272,36 @@ class WorkflowManager:
             "timestamp": time.time()
         })
         
-        tasks[task_id] = task
-        logger.info(f"Created new task: {task_id} for topic: {topic_id}")
-        
-        asyncio.create_task(WorkflowManager.process_task(task_id,content))
+        running_tasks[task_id] = task
+        try:
+            position = workflow_pool.submit(topic_id, lambda: WorkflowManager.process_task(task_id, content))
+        except QueueFull:
+            running_tasks.pop(task_id, None)
+            raise
+        task_store.save(task)
+        task_events.publish(task_id, WorkflowManager.get_current_status(task_id))
+        logger.info(f"Created new task: {task_id} for topic: {topic_id}, queue position: {position}")
         
         return task_id
     
     @staticmethod
     def get_task(task_id: str) -> Optional[WorkflowTask]:
-        return tasks.get(task_id)
+        task = running_tasks.get(task_id)
+        return task if task is not None else task_store.get(task_id)
     
     @staticmethod
     def update_task_status(task_id: str, update: StatusUpdate) -> bool:
-        task = tasks.get(task_id)
+        task = running_tasks.get(task_id)
         if not task:
             return False
         
         task.current_step = update.step_id
         task.status = update.status
         task.updated_at = update.timestamp
-        
+
+        previous = next((entry for entry in task.history if entry["step_id"] == update.step_id), None)
+        transition = previous is None or previous["status"] != update.status
+        task.history = [entry for entry in task.history if entry["step_id"] != update.step_id]
         task.history.append({
             "step_id": update.step_id,
             "status": update.status,
@@ -125,109 +312,56 @@ class WorkflowManager:
         
         if update.status == "error" and update.details:
             task.error = update.details
-        
+
+        now = time.perf_counter()
+        if update.status == "processing":
+            task.step_started.setdefault(update.step_id, now)
+        elif update.status in ("complete", "error") and update.step_id in task.step_started:
+            task.timings[update.step_id] = round(now - task.step_started[update.step_id], 4)
+            WORKFLOW_STEP_SECONDS.labels(update.step_id, update.status).observe(task.timings[update.step_id])
+
+        if transition or WorkflowManager.is_finished(task):
+            task_store.save(task)
+        task_events.publish(
+            task_id,
+            WorkflowManager.get_current_status(task_id),
+            final=WorkflowManager.is_finished(task)
+        )
         logger.info(f"Updated task {task_id} status: {update.step_id} -> {update.status}")
         return True
     
     @staticmethod
     async def process_task(task_id: str,content: str):
-        task = tasks.get(task_id)
+        task = running_tasks.get(task_id)
         if not task:
             logger.error(f"Task {task_id} not found")
             return
         
+        llm_priority.set(task.priority)
+        usage = new_usage()
+        llm_usage.set(usage)
+        started = time.perf_counter()
         try:
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_fetching",
-                "processing",
-                "正在收集相关观点数据...",
-                1
-            )
-            from api import world_record_contract
-            try:
-                print("Getting opinion count...")
-                opinion_count = world_record_contract.get_opinion_count()
-                print(f"Opinion count: {opinion_count}")
-                
-                if opinion_count > 0:
-                    all_opinions = world_record_contract.getAllOpinions()
-                    opinion_contents = [opinion[2] for opinion in all_opinions]  # 获取 content 字段
-                else:
-                    opinion_contents = [content]
-                    print("No opinions found, using input content:", opinion_contents[0])
-                print("Finished fetching opinions")
-            except Exception as e:
-                logger.error(f"Error in opinion processing: {str(e)}")
-                opinion_contents = [content]
-            
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_fetching",
-                "complete",
-                f"已收集到 {len(opinion_contents)} 条相关观点",
-                1
-            )
-            
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_analyzing",
-                "processing",
-                "正在进行观点聚类分析...",
-                1
-            )
-
-            integration_result = await integrate_opinions(opinion_contents)
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_analyzing",
-                "processing",
-                integration_result,
-                1
-            )
-
-            analysis_result = await analyze_topics_and_sentiment(opinion_contents)
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_analyzing",
-                "complete",
-                analysis_result,
-                1
-            )
-
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_summarizing",
-                "processing",
-                "正在生成总结和建议...",
-                1
-            )
-            
-            summary = await generate_summary(integration_result)     
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_summarizing",
-                "complete",
-                summary,
-                0.5
-            )
-            
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_recommendation",
-                "processing",
-                "正在基于分析结果生成建议...",
-                1
-            )
+            with span("workflow.task", task_id=task_id, topic_id=task.topic_id):
+                results = await WorkflowManager._run_stages(task_id, WORKFLOW_STAGES, task)
+            summary = results["summary"]
+            recommendations = results["recommendations"]
 
-            recommendations = await generate_recommendation(integration_result)
-            await WorkflowManager._update_with_delay(
-                task_id,
-                "ai_recommendation",
-                "complete",
-                recommendations,
-                0.5
-            )
+            task.timings["total"] = round(time.perf_counter() - started, 4)
+            WORKFLOW_STEP_SECONDS.labels("total", "complete").observe(task.timings["total"])
+            task.result = {
+                "summary": summary,
+                "recommendations": recommendations,
+                "total_opinions": results["opinions"]["total"],
+                "duplicate_opinions": results["opinions"]["duplicates"],
+                "sentiment_analysis": results["local_analysis"]["sentiment_analysis"],
+                "key_topics": results["local_analysis"]["key_topics"],
+                "clusters": results["local_analysis"]["clusters"],
+                "incremental": results["opinions"]["previous"] is not None,
+                "models": usage["models"],
+                "cost": usage["cost"],
+                "timings": task.timings
+            }
 
             completion_message = "完成分析"
             
@@ -239,24 +373,30 @@ class WorkflowManager:
                 0.5
             )
 
-            task.result = {
-                "summary": summary,
-                "recommendations": recommendations,
-                "total_opinions": len(opinion_contents)
-            }
+            opinions = results["opinions"]
+            if opinions["uncovered"]:
+                logger.info(f"Not saving state of topic {task.topic_id}: submitted opinion is not indexed yet")
+            elif results["analysis"] == ANALYSIS_FAILED:
+                logger.warning(f"Not saving state of topic {task.topic_id}: analysis failed")
+            elif opinions["watermark"] is not None:
+                previous = opinions["previous"]
+                topic_state.save(
+                    task.topic_id,
+                    results["integration"],
+                    results["analysis"],
+                    opinions["watermark"],
+                    opinions["total"],
+                    0 if previous is None else previous["incremental_runs"] + 1
+                )
 
             if task.topic_id is not None:
-                try:
-                    world_record_contract.contract.functions.updateTopicSummary(
-                        task.topic_id,
-                        summary
-                    ).transact()
-                except Exception as e:
-                    logger.warning(f"Failed to update topic summary: {str(e)}")
+                write_back.submit(task.topic_id, summary)
             
-            logger.info(f"Task {task_id} completed successfully")
+            WORKFLOW_TASKS.labels("complete").inc()
+            logger.info(f"Task {task_id} completed successfully, step timings: {task.timings}")
             
         except Exception as e:
+            WORKFLOW_TASKS.labels("error").inc()
             logger.error(f"Error processing task {task_id}: {str(e)}")
             WorkflowManager.update_task_status(
                 task_id, 
@@ -266,7 +406,55 @@ class WorkflowManager:
                     details=f"处理过程中发生错误: {str(e)}"
                 )
             )
+        finally:
+            running_tasks.pop(task_id, None)
     
+    @staticmethod
+    async def _run_stages(task_id: str, stages: List["Stage"], task: WorkflowTask) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        done = {stage.name: asyncio.Event() for stage in stages}
+        pending_by_step: Dict[str, List[str]] = {}
+        for stage in stages:
+            pending_by_step.setdefault(stage.step_id, []).append(stage.name)
+        final_stage = {step_id: names[-1] for step_id, names in pending_by_step.items()}
+        describers = {stage.name: stage.describe for stage in stages}
+        started_steps = set()
+
+        async def run_stage(stage: Stage):
+            for dep in stage.deps:
+                await done[dep].wait()
+
+            if stage.step_id not in started_steps:
+                started_steps.add(stage.step_id)
+                await WorkflowManager._update_with_delay(
+                    task_id, stage.step_id, "processing", STEP_MESSAGES[stage.step_id], 1
+                )
+
+            with span("workflow.stage", stage=stage.name, step=stage.step_id, task_id=task_id):
+                results[stage.name] = await stage.run(task, results)
+
+            pending = pending_by_step[stage.step_id]
+            pending.remove(stage.name)
+            if pending:
+                await WorkflowManager._update_with_delay(
+                    task_id, stage.step_id, "processing", stage.describe(results[stage.name]), 1
+                )
+            else:
+                final = final_stage[stage.step_id]
+                await WorkflowManager._update_with_delay(
+                    task_id, stage.step_id, "complete", describers[final](results[final]), 0.5
+                )
+            done[stage.name].set()
+
+        running = [asyncio.create_task(run_stage(stage)) for stage in stages]
+        try:
+            await asyncio.gather(*running)
+        except Exception:
+            for pending_task in running:
+                pending_task.cancel()
+            raise
+        return results
+
     @staticmethod
     async def _update_with_delay(task_id: str, step_id: str, status: str, details: str, delay: float):
         WorkflowManager.update_task_status(
@@ -277,11 +465,13 @@ class WorkflowManager:
                 details=details
             )
         )
-        await asyncio.sleep(delay)
+        task = running_tasks.get(task_id)
+        if task and task.demo_pacing:
+            await asyncio.sleep(delay)
     
     @staticmethod
     def get_current_status(task_id: str) -> Dict:
-        task = tasks.get(task_id)
+        task = WorkflowManager.get_task(task_id)
         if not task:
             return {
                 "error": "Task not found",
@@ -301,15 +491,45 @@ class WorkflowManager:
             "created_at": task.created_at,
             "updated_at": task.updated_at,
             "action": task.action,
+            "timings": task.timings,
             "result": task.result if task.status == "complete" and task.current_step == "complete" else None
         }
     
+    @staticmethod
+    def is_finished(task: WorkflowTask) -> bool:
+        return task.status == "error" or (task.status == "complete" and task.current_step == "complete")
+
+    @staticmethod
+    async def stream_status(task_id: str, last_event_id: int = 0):
+        if task_events.has(task_id):
+            async for event in task_events.stream(task_id, last_event_id):
+                yield event
+            return
+
+        idle = 0.0
+        while True:
+            task = WorkflowManager.get_task(task_id)
+            if task is None:
+                return
+            event_id = event_id_at(task.updated_at)
+            if event_id > last_event_id:
+                last_event_id = event_id
+                idle = 0.0
+                yield event_id, WorkflowManager.get_current_status(task_id)
+            elif idle >= EVENT_BUS_HEARTBEAT:
+                idle = 0.0
+                yield None
+            if WorkflowManager.is_finished(task):
+                return
+            await asyncio.sleep(WORKFLOW_STREAM_POLL_INTERVAL)
+            idle += WORKFLOW_STREAM_POLL_INTERVAL
+
     @staticmethod
     def get_all_steps(with_status: bool = False, task_id: Optional[str] = None) -> List[Dict]:
         if not with_status or not task_id:
             return STEPS
         
-        task = tasks.get(task_id)
+        task = WorkflowManager.get_task(task_id)
         if not task:
             return STEPS
         
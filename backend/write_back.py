@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from chain import chain_client
+from metrics import CHAIN_WRITE_BACKS
+
+logger = logging.getLogger(__name__)
+
+WRITE_BACK_INTERVAL = float(os.getenv('WRITE_BACK_INTERVAL', '2'))
+WRITE_BACK_MAX_RETRIES = int(os.getenv('WRITE_BACK_MAX_RETRIES', '5'))
+WRITE_BACK_RETRY_BACKOFF = float(os.getenv('WRITE_BACK_RETRY_BACKOFF', '2'))
+WRITE_BACK_MAX_BATCH = int(os.getenv('WRITE_BACK_MAX_BATCH', '20'))
+
+
+class WriteBackQueue:
+    def __init__(self, interval: float = WRITE_BACK_INTERVAL, max_retries: int = WRITE_BACK_MAX_RETRIES,
+                 backoff: float = WRITE_BACK_RETRY_BACKOFF, max_batch: int = WRITE_BACK_MAX_BATCH):
+        self.interval = interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_batch = max(1, max_batch)
+        self.submitted = 0
+        self.coalesced = 0
+        self.transactions = 0
+        self.sent = 0
+        self.confirmed = 0
+        self.failed = 0
+        self._pending: Dict[int, Dict] = {}
+        self._in_flight: Dict[int, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def submit(self, topic_id: int, summary: str, economy: Optional[Dict] = None,
+               culture: Optional[Dict] = None) -> Dict:
+        previous = self._pending.get(topic_id)
+        if previous is not None:
+            self.coalesced += 1
+            CHAIN_WRITE_BACKS.labels("coalesced").inc()
+            economy = economy or previous["economy"]
+            culture = culture or previous["culture"]
+        self._pending[topic_id] = {
+            "topic_id": topic_id,
+            "summary": summary,
+            "economy": economy,
+            "culture": culture,
+            "attempts": 0,
+            "not_before": 0.0,
+            "queued_at": time.time()
+        }
+        self.submitted += 1
+        self._ensure_started()
+        return {"topic_id": topic_id, "status": "queued"}
+
+    def _retry(self, entry: Dict, error: str):
+        topic_id = entry["topic_id"]
+        if topic_id in self._pending:
+            return
+        entry["attempts"] += 1
+        if entry["attempts"] > self.max_retries:
+            self.failed += 1
+            CHAIN_WRITE_BACKS.labels("failed").inc()
+            logger.error(f"Giving up writing analysis of topic {topic_id} after {self.max_retries} retries: {error}")
+            return
+        delay = self.backoff * 2 ** (entry["attempts"] - 1)
+        entry["not_before"] = time.monotonic() + delay
+        self._pending[topic_id] = entry
+        CHAIN_WRITE_BACKS.labels("retried").inc()
+        logger.warning(f"Write-back of topic {topic_id} failed ({error}), retry {entry['attempts']} in {delay:.1f}s")
+
+    def _check_receipts(self):
+        for topic_id, entry in list(self._in_flight.items()):
+            record = chain_client.tx_tracker.get(entry["transaction_hash"])
+            if record is not None and record["status"] == "pending":
+                continue
+            del self._in_flight[topic_id]
+            if record is not None and record["status"] == "confirmed":
+                self.confirmed += 1
+                CHAIN_WRITE_BACKS.labels("confirmed").inc()
+            else:
+                self._retry(entry, record["error"] if record else "Transaction record evicted")
+
+    def _batches(self, entries: List[Dict]) -> List[List[Dict]]:
+        retried = [[entry] for entry in entries if entry["attempts"]]
+        fresh = [entry for entry in entries if not entry["attempts"]]
+        return retried + [fresh[i:i + self.max_batch] for i in range(0, len(fresh), self.max_batch)]
+
+    def _sent(self, entries: List[Dict], tx_hash: str, nonce: int, kind: str):
+        topic_ids = [entry["topic_id"] for entry in entries]
+        chain_client.tx_tracker.track(tx_hash, kind, topic_ids=topic_ids, nonce=nonce)
+        for entry in entries:
+            entry["transaction_hash"] = tx_hash
+            self._in_flight[entry["topic_id"]] = entry
+        self.transactions += 1
+        self.sent += len(entries)
+        CHAIN_WRITE_BACKS.labels("sent").inc(len(entries))
+        logger.info(f"Submitted {kind} of topics {topic_ids}: {tx_hash}")
+
+    async def flush(self):
+        now = time.monotonic()
+        due = [
+            topic_id for topic_id, entry in self._pending.items()
+            if entry["not_before"] <= now and topic_id not in self._in_flight
+        ]
+        if not due:
+            return
+
+        ai_oracle = await chain_client.get_ai_oracle()
+        analyses = [t for t in due if self._pending[t]["economy"] is not None or self._pending[t]["culture"] is not None]
+        state = None
+        if any(self._pending[t]["economy"] is None or self._pending[t]["culture"] is None for t in analyses):
+            state = await asyncio.to_thread(ai_oracle.world_record.read_world_state)
+
+        for topic_id in analyses:
+            entry = self._pending.pop(topic_id)
+            try:
+                tx_hash, nonce = await asyncio.to_thread(
+                    ai_oracle.submit_analysis,
+                    topic_id,
+                    entry["summary"],
+                    entry["economy"] or state["economy"],
+                    entry["culture"] or state["culture"]
+                )
+            except Exception as e:
+                self._retry(entry, str(e))
+                continue
+            self._sent([entry], tx_hash, nonce, "analysis")
+
+        summaries = [self._pending.pop(t) for t in due if t not in analyses]
+        for batch in self._batches(summaries):
+            try:
+                tx_hash, nonce = await asyncio.to_thread(
+                    ai_oracle.submit_summaries, {entry["topic_id"]: entry["summary"] for entry in batch}
+                )
+            except Exception as e:
+                for entry in batch:
+                    self._retry(entry, str(e))
+                continue
+            self._sent(batch, tx_hash, nonce, "summaries")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self._check_receipts()
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error writing analyses back to chain: {str(e)}")
+            if not self._pending and not self._in_flight:
+                self._task = None
+                return
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "transactions": self.transactions,
+            "sent": self.sent,
+            "confirmed": self.confirmed,
+            "failed": self.failed
+        }
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+write_back = WriteBackQueue()
@@ -14,7 +14,7 @@ contract AIOracle {
 
     constructor() {
         owner = msg.sender;
-        worldRecord = new WorldRecord(msg.sender);
+        worldRecord = new WorldRecord(address(this));
     }
 
     function submitAnalysis(
@@ -32,4 +32,11 @@ contract AIOracle {
         worldRecord.updateEconomy(_GDP, _tariff, _unemployment, _interestRate, _inflation);
         worldRecord.updateCulture(_protectionism, _liberalism);
     }
+
+    function submitSummaries(uint256[] calldata _topicIds, string[] calldata _summaries) external onlyOwner {
+        require(_topicIds.length == _summaries.length, "Length mismatch");
+        for (uint256 i = 0; i < _topicIds.length; i++) {
+            worldRecord.updateTopicSummary(_topicIds[i], _summaries[i]);
+        }
+    }
 }
@@ -111,6 +111,14 @@ contract WorldRecord {
         return _addOpinionInternal(_content);
     }
 
+    function addOpinions(string[] calldata _contents) external returns (bytes32[] memory) {
+        bytes32[] memory hashes = new bytes32[](_contents.length);
+        for (uint i = 0; i < _contents.length; i++) {
+            hashes[i] = _addOpinionInternal(_contents[i]);
+        }
+        return hashes;
+    }
+
     function createTopic(
         string memory _content,
         string memory _priority,
@@ -174,6 +182,18 @@ contract WorldRecord {
         return result;
     }
 
+    function getOpinions(bytes32[] calldata _hashes) external view returns (Opinion[] memory) {
+        Opinion[] memory result = new Opinion[](_hashes.length);
+        for (uint i = 0; i < _hashes.length; i++) {
+            result[i] = opinions[_hashes[i]];
+        }
+        return result;
+    }
+
+    function getTopicOpinions(uint256 _id) external view returns (bytes32[] memory) {
+        return topics[_id].relatedOpinions;
+    }
+
     function getOpinionCount() external view returns (uint256) {
         return allOpinionHashes.length;
     }
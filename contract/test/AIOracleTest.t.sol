@@ -14,7 +14,7 @@ contract AIOracleTest is Test {
 
     function setUp() public {
         aiOracle = new AIOracle();
-        worldRecord = new WorldRecord(address(aiOracle));
+        worldRecord = aiOracle.worldRecord();
         vm.startPrank(ai);
         vm.stopPrank();
     }
@@ -53,4 +53,27 @@ contract AIOracleTest is Test {
         assertEq(protectionism, "50");
         assertEq(liberalism, "150");
     }
+
+    function testAIOracleSubmitSummaries() public {
+        bytes32[] memory opinions = new bytes32[](0);
+        uint256 first = worldRecord.createTopic("Tariffs", "Medium", "Normal", opinions);
+        uint256 second = worldRecord.createTopic("Housing", "High", "Urgent", opinions);
+
+        uint256[] memory ids = new uint256[](2);
+        ids[0] = first;
+        ids[1] = second;
+        string[] memory summaries = new string[](2);
+        summaries[0] = "Keep tariffs stable";
+        summaries[1] = "Build more housing";
+        aiOracle.submitSummaries(ids, summaries);
+
+        (, , , , string memory summary) = worldRecord.topics(first);
+        assertEq(summary, "Keep tariffs stable");
+        (, , , , summary) = worldRecord.topics(second);
+        assertEq(summary, "Build more housing");
+
+        vm.prank(user);
+        vm.expectRevert("Only Owner");
+        aiOracle.submitSummaries(ids, summaries);
+    }
 }
@@ -33,4 +33,61 @@ contract WorldRecordTest is Test {
 
         vm.stopPrank();
     }
+
+    function testGetTopicOpinionsReturnsRelatedHashes() public {
+        bytes32[] memory preset = worldRecord.getTopicOpinions(1);
+        assertEq(preset.length, 20);
+        assertEq(preset[0], worldRecord.allOpinionHashes(0));
+
+        vm.prank(user);
+        bytes32 opinionHash = worldRecord.addOpinion("Tariffs raise consumer prices");
+
+        bytes32[] memory opinions = new bytes32[](1);
+        opinions[0] = opinionHash;
+        uint256 topicId = worldRecord.createTopic("Consumer Prices", "High", "Normal", opinions);
+
+        bytes32[] memory related = worldRecord.getTopicOpinions(topicId);
+        assertEq(related.length, 1);
+        assertEq(related[0], opinionHash);
+    }
+
+    function testGetOpinionsReturnsContentsInRequestOrder() public {
+        vm.startPrank(user);
+        bytes32 first = worldRecord.addOpinion("Lower tariffs");
+        bytes32 second = worldRecord.addOpinion("Raise tariffs");
+        vm.stopPrank();
+
+        bytes32[] memory hashes = new bytes32[](3);
+        hashes[0] = second;
+        hashes[1] = first;
+        hashes[2] = bytes32(0);
+
+        WorldRecord.Opinion[] memory result = worldRecord.getOpinions(hashes);
+        assertEq(result.length, 3);
+        assertEq(result[0].content, "Raise tariffs");
+        assertEq(result[1].content, "Lower tariffs");
+        assertEq(result[1].sender, user);
+        assertEq(result[2].hash, bytes32(0));
+    }
+
+    function testAddOpinionsStoresEachContent() public {
+        uint256 countBefore = worldRecord.getOpinionCount();
+
+        string[] memory contents = new string[](2);
+        contents[0] = "Subsidise farmers";
+        contents[1] = "Cut steel tariffs";
+
+        vm.prank(user);
+        bytes32[] memory hashes = worldRecord.addOpinions(contents);
+
+        assertEq(hashes.length, 2);
+        assertEq(worldRecord.getOpinionCount(), countBefore + 2);
+        assertTrue(hashes[0] != hashes[1]);
+
+        (, address sender, string memory first, ) = worldRecord.opinions(hashes[0]);
+        (, , string memory second, ) = worldRecord.opinions(hashes[1]);
+        assertEq(sender, user);
+        assertEq(first, "Subsidise farmers");
+        assertEq(second, "Cut steel tariffs");
+    }
 }
@@ -7,7 +7,7 @@ import { Input } from "@/components/ui/input";
 import { motion, AnimatePresence } from "framer-motion";
 import ProcessFlow, { ProcessStep } from "@/components/ProcessFlow";
 
-import { submitOpinion, getProcessStatus, ProcessStatus, startWorkflow } from "@/services/api";
+import { submitOpinion, getProcessStatus, subscribeProcessStatus, ProcessStatus, startWorkflow } from "@/services/api";
 
 const API_POLLING_INTERVAL = 2000;
 
@@ -126,6 +126,7 @@ export default function ProcessStatusPage() {
         topic_id: topicId,
         content: message,
         action: "full",
+        demo_pacing: true,
       });
       
       if (!workflowResult.success || !workflowResult.data) {
@@ -134,6 +135,49 @@ export default function ProcessStatusPage() {
       
       const task_id  = workflowResult.data.task_id;
       
+      const handleStatus = (status: ProcessStatus): boolean => {
+        updateStepStatus(status.step_id, status.status);
+        if (status.details) {
+          updateStepDetails(status.step_id, status.details);
+        }
+        setActiveStepId(status.step_id);
+
+        if (status.status === "complete" && status.step_id === "complete") {
+          const completedSteps = ["waiting", "blockchain", "ai_fetching", "ai_analyzing", "ai_summarizing", "ai_recommendation", "complete"];
+          completedSteps.forEach(stepId => {
+            updateStepStatus(stepId, "complete");
+          });
+
+          if (status.result) {
+            const { sentiment_analysis, key_topics, total_opinions } = status.result;
+            
+            updateStepDetails("ai_summarizing", status.result.summary);
+            updateStepDetails("ai_recommendation", status.result.recommendations);
+            
+            updateStepDetails("ai_analyzing", 
+              `分析了 ${total_opinions} 条观点\n` +
+              (sentiment_analysis
+                ? `情感分布：积极 ${sentiment_analysis.positive}%，中立 ${sentiment_analysis.neutral}%，消极 ${sentiment_analysis.negative}%\n`
+                : "") +
+              (key_topics && key_topics.length ? `热点话题：${key_topics.join(" / ")}` : "")
+            );
+          }
+          
+          setIsProcessing(false);
+          return true;
+        } else if (status.status === "error") {
+          throw new Error(status.details || "工作流处理出错");
+        }
+        return false;
+      };
+
+      const handleError = (error: unknown) => {
+        const errorMessage = error instanceof Error ? error.message : "AI工作流轮询出错";
+        updateStepStatus(activeStepId, "error");
+        updateStepDetails(activeStepId, errorMessage);
+        setIsProcessing(false);
+      };
+
       const pollStatus = async () => {
         try {
           const result = await getProcessStatus(task_id);
@@ -142,47 +186,36 @@ export default function ProcessStatusPage() {
             throw new Error(result.error || "获取工作流状态失败");
           }
           
-          const status = result.data;
-
-          updateStepStatus(status.step_id, status.status);
-          if (status.details) {
-            updateStepDetails(status.step_id, status.details);
+          if (!handleStatus(result.data)) {
+            setTimeout(pollStatus, API_POLLING_INTERVAL);
           }
-          setActiveStepId(status.step_id);
-
-          if (status.status === "complete" && status.step_id === "complete") {
-            const completedSteps = ["waiting", "blockchain", "ai_fetching", "ai_analyzing", "ai_summarizing", "ai_recommendation", "complete"];
-            completedSteps.forEach(stepId => {
-              updateStepStatus(stepId, "complete");
-            });
-
-            if (status.result) {
-              const { sentiment_analysis, key_topics, total_opinions } = status.result;
-              
-              updateStepDetails("ai_summarizing", status.result.summary);
-              updateStepDetails("ai_recommendation", status.result.recommendations);
-              
-              updateStepDetails("ai_analyzing", 
-                `分析了 ${total_opinions} 条观点\n`
-              );
-            }
-            
-            setIsProcessing(false);
-            return;
-          } else if (status.status === "error") {
-            throw new Error(status.details || "工作流处理出错");
-          }
-
-          setTimeout(pollStatus, API_POLLING_INTERVAL);
         } catch (error) {
-          const errorMessage = error instanceof Error ? error.message : "AI工作流轮询出错";
-          updateStepStatus(activeStepId, "error");
-          updateStepDetails(activeStepId, errorMessage);
-          setIsProcessing(false);
+          handleError(error);
         }
       };
 
-      pollStatus();
+      let finished = false;
+      let unsubscribe = () => {};
+      unsubscribe = subscribeProcessStatus(
+        task_id,
+        (status) => {
+          if (finished) return;
+          try {
+            finished = handleStatus(status);
+          } catch (error) {
+            finished = true;
+            handleError(error);
+          }
+          if (finished) unsubscribe();
+        },
+        () => {
+          unsubscribe();
+          if (!finished) {
+            finished = true;
+            pollStatus();
+          }
+        },
+      );
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : "AI工作流发生错误";
       updateStepStatus(activeStepId, "error");
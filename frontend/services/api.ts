@@ -26,6 +26,33 @@ export interface Topic {
   category: 'economy' | 'ai' | 'web3' | 'crypto' | 'metaverse' | 'copyright';
 }
 
+export interface OpinionPage {
+  topic_id: number;
+  opinion_count: number;
+  opinions: {
+    id: string;
+    content: string;
+    sender: string;
+    timestamp: number;
+  }[];
+  next_cursor: number | null;
+}
+
+export interface ChainTopic {
+  id: number;
+  content: string;
+  priority: string;
+  urgency: string;
+  summary: string;
+  opinion_count: number;
+  block_number: number;
+}
+
+export interface TopicPage {
+  topics: ChainTopic[];
+  next_cursor: number | null;
+}
+
 export interface ProcessStatus {
   step_id: string;
   status: 'pending' | 'processing' | 'complete' | 'error';
@@ -42,15 +69,35 @@ export interface ProcessStatus {
       negative: number;
     };
     key_topics: string[];
+    clusters?: {
+      size: number;
+      terms: string[];
+      sentiment: number;
+      example: string;
+    }[];
     total_opinions: number;
+    duplicate_opinions?: number;
+    models?: Record<string, {
+      calls: number;
+      cached_calls: number;
+      prompt_tokens: number;
+      completion_tokens: number;
+      cost: number;
+      latency: number;
+      routes: string[];
+    }>;
+    cost?: number;
+    timings?: Record<string, number>;
   };
 }
 
 export interface TransactionDetails {
   transaction_hash: string;
-  block_number: number;
-  status: boolean;
-  gas_used: number;
+  nonce?: number;
+  status: 'pending' | 'confirmed' | 'failed' | 'dropped';
+  block_number?: number | null;
+  gas_used?: number | null;
+  error?: string | null;
 }
 
 export interface ApiErrorResponse {
@@ -99,6 +146,24 @@ export const submitOpinion = async (data: OpinionSubmitRequest): Promise<ApiResp
   }
 };
 
+export const getTransactionStatus = async (txHash: string): Promise<ApiResponse<TransactionDetails>> => {
+  try {
+    const response = await fetch(`${API_BASE_URL}/transactions/${txHash}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+
+    return handleResponse(response);
+  } catch (error) {
+    return {
+      success: false,
+      error: error instanceof Error ? error.message : '获取交易状态失败'
+    };
+  }
+};
+
 export const getProcessStatus = async (taskId: string): Promise<ApiResponse<ProcessStatus>> => {
   try {
     const response = await fetch(`${API_BASE_URL}/workflow/status/${taskId}`, {
@@ -117,9 +182,46 @@ export const getProcessStatus = async (taskId: string): Promise<ApiResponse<Proc
   }
 };
 
-export const getOpinionsByTopic = async (topicId: number): Promise<ApiResponse<Opinion[]>> => {
+export const subscribeProcessStatus = (
+  taskId: string,
+  onStatus: (status: ProcessStatus) => void,
+  onError: (error: Error) => void,
+): (() => void) => {
+  if (typeof EventSource === 'undefined') {
+    onError(new Error('当前环境不支持事件流'));
+    return () => {};
+  }
+
+  const source = new EventSource(`${API_BASE_URL}/workflow/stream/${taskId}`);
+
+  source.addEventListener('status', (event) => {
+    try {
+      onStatus(JSON.parse((event as MessageEvent).data));
+    } catch (error) {
+      onError(error instanceof Error ? error : new Error('解析工作流事件失败'));
+    }
+  });
+
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      onError(new Error('工作流事件流连接中断'));
+    }
+  };
+
+  return () => source.close();
+};
+
+export const getOpinionsByTopic = async (
+  topicId: number,
+  cursor?: number | null,
+  limit: number = 50,
+): Promise<ApiResponse<OpinionPage>> => {
   try {
-    const response = await fetch(`${API_BASE_URL}/topics/${topicId}/opinions`, {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor !== undefined && cursor !== null) {
+      params.set('cursor', String(cursor));
+    }
+    const response = await fetch(`${API_BASE_URL}/topics/${topicId}/opinions?${params}`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json',
@@ -135,10 +237,36 @@ export const getOpinionsByTopic = async (topicId: number): Promise<ApiResponse<O
   }
 };
 
+export const getTopics = async (
+  cursor?: number | null,
+  limit: number = 50,
+): Promise<ApiResponse<TopicPage>> => {
+  try {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor !== undefined && cursor !== null) {
+      params.set('cursor', String(cursor));
+    }
+    const response = await fetch(`${API_BASE_URL}/topics?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    });
+
+    return handleResponse(response);
+  } catch (error) {
+    return {
+      success: false,
+      error: error instanceof Error ? error.message : '获取话题列表失败'
+    };
+  }
+};
+
 export const startWorkflow = async (data: {
   topic_id: number;
   content: string;
   action: 'analyze' | 'summarize' | 'full';
+  demo_pacing?: boolean;
 }): Promise<ApiResponse<{task_id: string}>> => {
   try {
     const response = await fetch(`${API_BASE_URL}/workflow/opinions/`, {